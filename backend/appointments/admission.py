@@ -0,0 +1,267 @@
+"""
+Phòng chờ ảo (admission control) cho các route đặt lịch.
+
+Mỗi clinic có một token bucket (rate/giây + burst). Request đặt lịch được
+cho qua ngay nếu hàng chờ trống và bucket còn token; ngược lại được cấp
+queue token (FIFO) kèm vị trí + ETA và nhận 503 Retry-After. Khi tới lượt,
+token chuyển sang trạng thái "admitted" trong ADMIT_TTL giây để client gửi
+lại request đặt lịch với header X-Queue-Token.
+
+Cấu hình qua biến môi trường:
+    BOOKING_ADMIT_RATE          số request/giây/clinic (mặc định 5)
+    BOOKING_ADMIT_BURST         dung lượng bucket (mặc định 10)
+    BOOKING_ADMIT_RATE_OVERRIDES  ghi đè theo clinic, vd "1:10,3:2.5"
+    BOOKING_QUEUE_MAX           số token chờ tối đa/clinic trước khi shed (mặc định 500)
+    BOOKING_ADMIT_TTL           giây giữ lượt đã được cấp (mặc định 60)
+    BOOKING_QUEUE_IDLE_TTL      giây bỏ token không còn poll (mặc định 120)
+"""
+import math
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import HTTPException, status
+
+from backend.metrics.controllers import metrics
+
+
+def _env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except ValueError:
+        return default
+
+
+def _parse_overrides(raw: Optional[str]) -> Dict[int, float]:
+    out: Dict[int, float] = {}
+    for part in (raw or "").split(","):
+        if ":" not in part:
+            continue
+        cid, rate = part.split(":", 1)
+        try:
+            out[int(cid.strip())] = float(rate.strip())
+        except ValueError:
+            continue
+    return out
+
+
+ADMIT_RATE = _env_float("BOOKING_ADMIT_RATE", 5)
+ADMIT_BURST = _env_float("BOOKING_ADMIT_BURST", 10)
+RATE_OVERRIDES = _parse_overrides(os.getenv("BOOKING_ADMIT_RATE_OVERRIDES"))
+QUEUE_MAX = int(_env_float("BOOKING_QUEUE_MAX", 500))
+ADMIT_TTL = _env_float("BOOKING_ADMIT_TTL", 60)
+QUEUE_IDLE_TTL = _env_float("BOOKING_QUEUE_IDLE_TTL", 120)
+
+metrics.describe("booking_admission_total", "Kết quả admission cho route đặt lịch")
+metrics.describe("booking_queue_depth", "Số token đang chờ trong phòng chờ ảo")
+metrics.describe("booking_queue_wait_seconds", "Thời gian chờ từ lúc cấp token tới lúc được vào")
+
+
+@dataclass
+class _Ticket:
+    token: str
+    clinic_id: int
+    patient_id: int
+    issued_at: float
+    last_seen: float
+    admitted_at: Optional[float] = None
+    # client đã quay lại (poll /queue/{token} hoặc gửi lại kèm X-Queue-Token);
+    # token chưa từng được poll không được cấp lượt -> không tiêu token của bucket
+    polled: bool = False
+
+
+@dataclass
+class _ClinicGate:
+    rate: float
+    burst: float
+    tokens: float
+    last_refill: float
+    waiting: "OrderedDict[str, _Ticket]" = field(default_factory=OrderedDict)
+    admitted: Dict[str, _Ticket] = field(default_factory=dict)
+
+
+class AdmissionController:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._gates: Dict[int, _ClinicGate] = {}
+        self._tokens: Dict[str, _Ticket] = {}
+
+    # ---------- nội bộ (gọi khi đang giữ lock) ----------
+    def _gate(self, clinic_id: int, now: float) -> _ClinicGate:
+        gate = self._gates.get(clinic_id)
+        if gate is None:
+            rate = RATE_OVERRIDES.get(clinic_id, ADMIT_RATE)
+            burst = max(ADMIT_BURST, 1.0)
+            gate = _ClinicGate(rate=rate, burst=burst, tokens=burst, last_refill=now)
+            self._gates[clinic_id] = gate
+        return gate
+
+    def _refill(self, clinic_id: int, gate: _ClinicGate, now: float) -> None:
+        gate.tokens = min(gate.burst, gate.tokens + (now - gate.last_refill) * gate.rate)
+        gate.last_refill = now
+
+        # Bỏ token chờ không còn poll & lượt đã cấp nhưng quá hạn
+        for tok in [t for t, tk in gate.waiting.items() if now - tk.last_seen > QUEUE_IDLE_TTL]:
+            gate.waiting.pop(tok)
+            self._tokens.pop(tok, None)
+            metrics.inc("booking_admission_total", clinic_id=clinic_id, result="abandoned")
+        for tok in [t for t, tk in gate.admitted.items() if now - tk.admitted_at > ADMIT_TTL]:
+            gate.admitted.pop(tok)
+            self._tokens.pop(tok, None)
+            metrics.inc("booking_admission_total", clinic_id=clinic_id, result="expired")
+
+        # Cho token đầu hàng vào theo FIFO (bỏ qua token chưa từng poll)
+        for tok, tk in list(gate.waiting.items()):
+            if gate.tokens < 1:
+                break
+            if not tk.polled:
+                continue
+            gate.waiting.pop(tok)
+            tk.admitted_at = now
+            gate.admitted[tok] = tk
+            gate.tokens -= 1
+            metrics.observe("booking_queue_wait_seconds", now - tk.issued_at, clinic_id=clinic_id)
+
+        metrics.set("booking_queue_depth", len(gate.waiting), clinic_id=clinic_id)
+
+    def _position(self, gate: _ClinicGate, token: str) -> int:
+        for i, tok in enumerate(gate.waiting, start=1):
+            if tok == token:
+                return i
+        return 0
+
+    def _eta_seconds(self, gate: _ClinicGate, position: int) -> float:
+        if position <= 0 or gate.rate <= 0:
+            return 0.0
+        return max(position - gate.tokens, 0) / gate.rate
+
+    def _state(self, gate: _ClinicGate, tk: _Ticket) -> dict:
+        if tk.admitted_at is not None:
+            return {
+                "queue_token": tk.token,
+                "clinic_id": tk.clinic_id,
+                "admitted": True,
+                "position": 0,
+                "eta_seconds": 0,
+                "expires_in": max(int(ADMIT_TTL - (time.monotonic() - tk.admitted_at)), 0),
+            }
+        pos = self._position(gate, tk.token)
+        return {
+            "queue_token": tk.token,
+            "clinic_id": tk.clinic_id,
+            "admitted": False,
+            "position": pos,
+            "eta_seconds": math.ceil(self._eta_seconds(gate, pos)),
+            "expires_in": None,
+        }
+
+    def _find(self, gate: _ClinicGate, patient_id: int) -> Optional[_Ticket]:
+        for tk in list(gate.waiting.values()) + list(gate.admitted.values()):
+            if tk.patient_id == patient_id:
+                return tk
+        return None
+
+    def _enqueue(self, gate: _ClinicGate, clinic_id: int, patient_id: int, now: float) -> _Ticket:
+        if len(gate.waiting) >= QUEUE_MAX:
+            metrics.inc("booking_admission_total", clinic_id=clinic_id, result="shed")
+            retry = max(math.ceil(self._eta_seconds(gate, len(gate.waiting))), 1)
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"message": "Hệ thống đang quá tải, vui lòng thử lại sau", "retry_after": retry},
+                headers={"Retry-After": str(retry)},
+            )
+        tk = _Ticket(
+            token=secrets.token_urlsafe(16), clinic_id=clinic_id, patient_id=patient_id,
+            issued_at=now, last_seen=now,
+        )
+        gate.waiting[tk.token] = tk
+        self._tokens[tk.token] = tk
+        metrics.inc("booking_admission_total", clinic_id=clinic_id, result="queued")
+        metrics.set("booking_queue_depth", len(gate.waiting), clinic_id=clinic_id)
+        return tk
+
+    def _busy(self, state: dict) -> HTTPException:
+        retry = max(state["eta_seconds"], 1)
+        return HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"message": "Đang trong hàng chờ đặt lịch", **state},
+            headers={"Retry-After": str(retry)},
+        )
+
+    # ---------- API ----------
+    def join(self, clinic_id: int, patient_id: int) -> dict:
+        """Cấp queue token (hoặc trả lại token đang có của bệnh nhân ở clinic này)."""
+        now = time.monotonic()
+        with self._lock:
+            gate = self._gate(clinic_id, now)
+            self._refill(clinic_id, gate, now)
+            tk = self._find(gate, patient_id)
+            if tk is not None:
+                tk.last_seen = now
+                tk.polled = True
+                return self._state(gate, tk)
+            tk = self._enqueue(gate, clinic_id, patient_id, now)
+            tk.polled = True          # client chủ động xin vào hàng chờ
+            self._refill(clinic_id, gate, now)
+            return self._state(gate, tk)
+
+    def status(self, token: str, patient_id: int) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            tk = self._tokens.get(token)
+            if not tk or tk.patient_id != patient_id:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "Queue token không tồn tại hoặc đã hết hạn")
+            gate = self._gate(tk.clinic_id, now)
+            # dọn token quá hạn TRƯỚC khi ghi nhận lần poll này -> poll muộn không hồi sinh token đã bỏ
+            self._refill(tk.clinic_id, gate, now)
+            if token not in self._tokens:
+                raise HTTPException(status.HTTP_404_NOT_FOUND, "Queue token không tồn tại hoặc đã hết hạn")
+            tk.last_seen = now
+            if not tk.polled:
+                tk.polled = True
+                self._refill(tk.clinic_id, gate, now)
+            return self._state(gate, tk)
+
+    def admit(self, clinic_id: int, patient_id: int, token: Optional[str] = None) -> None:
+        """
+        Gọi ở đầu route đặt lịch. Trả về None nếu được vào, ngược lại raise 503
+        (kèm queue token + vị trí + ETA, header Retry-After).
+        """
+        now = time.monotonic()
+        with self._lock:
+            gate = self._gate(clinic_id, now)
+            self._refill(clinic_id, gate, now)
+
+            # Token gửi kèm, hoặc token sẵn có của bệnh nhân ở clinic này
+            # (client thử lại mà không gửi X-Queue-Token -> không cấp token mới)
+            tk = (gate.admitted.get(token) or gate.waiting.get(token)) if token else None
+            if tk is None or tk.patient_id != patient_id:
+                tk = self._find(gate, patient_id)
+            if tk is not None:
+                if tk.admitted_at is None:
+                    # lần quay lại đầu tiên -> token đủ điều kiện được cấp lượt
+                    tk.last_seen = now
+                    tk.polled = True
+                    self._refill(clinic_id, gate, now)
+                if tk.admitted_at is None:
+                    raise self._busy(self._state(gate, tk))
+                gate.admitted.pop(tk.token, None)
+                self._tokens.pop(tk.token, None)
+                metrics.inc("booking_admission_total", clinic_id=clinic_id, result="admitted")
+                return
+
+            # token chưa từng poll không chặn lượt vào thẳng (chúng tự hết hạn theo IDLE_TTL)
+            if gate.tokens >= 1 and not any(t.polled for t in gate.waiting.values()):
+                gate.tokens -= 1
+                metrics.inc("booking_admission_total", clinic_id=clinic_id, result="direct")
+                return
+
+            tk = self._enqueue(gate, clinic_id, patient_id, now)
+            raise self._busy(self._state(gate, tk))
+
+
+admission = AdmissionController()
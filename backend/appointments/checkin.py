@@ -0,0 +1,69 @@
+"""
+Mã QR check-in có ký HMAC (không cần join DB để xác thực).
+
+Payload gọn, chỉ gồm ký tự thuộc bộ alphanumeric của QR (chữ HOA, số, '.')
+nên mã QR nhỏ (version 2-3) và máy quét đọc nhanh:
+
+    CK1.<appointment_id>.<yymmdd ngày khám>.<chữ ký base32, 16 ký tự>
+
+Chữ ký = HMAC-SHA256(key, "CK1.<id>.<yymmdd>") cắt 10 byte. Key lấy từ
+CHECKIN_QR_SECRET, mặc định dẫn xuất từ APP_SECRET (tách miền bằng nhãn
+"checkin-qr") -> đổi secret là mọi phiếu cũ mất hiệu lực.
+"""
+import base64
+import hashlib
+import hmac
+import os
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+PREFIX = "CK1"
+SIG_BYTES = 10
+
+_key: Optional[bytes] = None
+
+def _signing_key() -> bytes:
+    global _key
+    if _key is None:
+        secret = os.getenv("CHECKIN_QR_SECRET")
+        if secret:
+            _key = secret.encode()
+        else:
+            app_secret = os.getenv("APP_SECRET")
+            if not app_secret:
+                raise EnvironmentError("APP_SECRET environment variable not found")
+            _key = hmac.new(app_secret.encode(), b"checkin-qr", hashlib.sha256).digest()
+    return _key
+
+
+def checkin_key_fingerprint() -> str:
+    """Dấu vân tay ngắn của key ký (không lộ key) -> đưa vào key cache phiếu."""
+    return hashlib.sha256(_signing_key()).hexdigest()[:8]
+
+
+def _sign(body: str) -> str:
+    mac = hmac.new(_signing_key(), body.encode(), hashlib.sha256).digest()[:SIG_BYTES]
+    return base64.b32encode(mac).decode()      # 10 byte -> 16 ký tự, không padding
+
+
+def sign_checkin_payload(appointment_id: int, day: date) -> str:
+    if isinstance(day, datetime):
+        day = day.date()
+    body = f"{PREFIX}.{int(appointment_id)}.{day:%y%m%d}"
+    return f"{body}.{_sign(body)}"
+
+
+def verify_checkin_payload(payload: str) -> Optional[Tuple[int, date]]:
+    """Trả (appointment_id, ngày khám) nếu chữ ký hợp lệ, ngược lại None."""
+    parts = (payload or "").strip().upper().split(".")
+    if len(parts) != 4 or parts[0] != PREFIX:
+        return None
+    _, appt, day, sig = parts
+    if not appt.isdigit() or len(day) != 6 or not day.isdigit():
+        return None
+    if not hmac.compare_digest(sig, _sign(f"{PREFIX}.{appt}.{day}")):
+        return None
+    try:
+        return int(appt), datetime.strptime(day, "%y%m%d").date()
+    except ValueError:
+        return None
@@ -1,23 +1,30 @@
 from fastapi import HTTPException, status
 from backend.database.connector import DatabaseConnector
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Iterator
 from backend.appointments.models import (
     BookByShiftRequestModel,
     AppointmentFilterModel,
-    AppointmentPaymentFilterModel
+    AppointmentPaymentFilterModel,
+    DoctorAppointmentFilterModel,
+    AppointmentExportFilterModel,
+    TicketBatchRequestModel,
 )
 from datetime import datetime, timedelta, timezone
-
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.lib.utils import ImageReader
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-import qrcode
-from io import BytesIO
-from pathlib import Path
-from reportlab.lib import colors
+import threading
+import time
+import csv
+import io
+import tempfile
+from backend.appointments.eta_tracker import eta_tracker
+from backend.schedule_doctors.availability import publish_schedule
+from backend.appointments.pagination import keyset_clause, paginate
+from backend.statistics.controllers import record_booking, record_status_change
+from backend.statistics.today import today_counters
+from backend.appointments.facets import facet_summary, invalidate_facets
+from backend.appointments.ticket_cache import ticket_cache
+from backend.appointments.render_pool import render_pool, render_tickets_batch
+from backend.appointments.checkin import checkin_key_fingerprint, verify_checkin_payload
+from backend.metrics.controllers import metrics
 
 db = DatabaseConnector()
 VN_TZ = timezone(timedelta(hours=7))
@@ -170,7 +177,12 @@ def _book_by_shift_core(
                 (appt_id,),
             )
             row = cur.fetchone()
+            record_booking(cur, row)
             conn.commit()
+            eta_tracker.invalidate(req.schedule_id)
+            publish_schedule({**ds, "booked_patients": ds["booked_patients"] + 1})
+            today_counters.on_booked(row["clinic_id"], row["estimated_time"])
+            invalidate_facets()
             return row
 
     except HTTPException:
@@ -183,6 +195,43 @@ def _book_by_shift_core(
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Database error: {e}")
 
 
+def _resequence_shift_after(cur, schedule_id: int, shift_number: int) -> int:
+    """
+    1 lịch rời ca (hủy / no-show) -> các lịch còn chờ phía sau trong CÙNG ca
+    được kéo sớm lên 1 suất (avg_minutes_per_patient), không sớm hơn giờ bắt đầu ca.
+    Chỉ 1 câu UPDATE trên (schedule_id, shift_number > ?) -> không quét lại cả ngày.
+    Gọi bên trong transaction đang mở, trả số lịch được cập nhật.
+    """
+    cur.execute(
+        """
+        UPDATE appointments a
+        JOIN doctor_schedules ds ON ds.id = a.schedule_id
+        SET a.estimated_time = GREATEST(
+                a.estimated_time - INTERVAL ds.avg_minutes_per_patient MINUTE,
+                TIMESTAMP(ds.work_date, ds.start_time)
+            )
+        WHERE a.schedule_id = %s
+          AND a.shift_number > %s
+          AND a.status IN (0,1)
+          AND a.estimated_time IS NOT NULL
+        """,
+        (schedule_id, shift_number),
+    )
+    return cur.rowcount
+
+
+def _schedule_snapshot(cur, schedule_id: int) -> dict:
+    """Đọc lại số chỗ của ca (trong transaction) để publish sau khi commit."""
+    cur.execute(
+        """
+        SELECT id, clinic_id, doctor_id, work_date, max_patients, booked_patients
+        FROM doctor_schedules WHERE id=%s
+        """,
+        (schedule_id,),
+    )
+    return cur.fetchone()
+
+
 def _pick_schedule_for_offline(cur, clinic_id: int, doctor_id: int, *, today, now_time):
     # Không đổi – chỉ chọn ca còn chỗ trong hôm nay
     cur.execute(
@@ -190,7 +239,7 @@ def _pick_schedule_for_offline(cur, clinic_id: int, doctor_id: int, *, today, no
         SELECT id, doctor_id, clinic_id, work_date, start_time, end_time,
                avg_minutes_per_patient, max_patients, booked_patients, status
         FROM doctor_schedules
-        WHERE clinic_id=%s AND doctor_id=%s AND DATE(work_date)=%s
+        WHERE clinic_id=%s AND doctor_id=%s AND work_date=%s
               AND status=1 AND booked_patients < max_patients
               AND start_time <= %s AND %s < end_time
         ORDER BY start_time LIMIT 1
@@ -205,7 +254,7 @@ def _pick_schedule_for_offline(cur, clinic_id: int, doctor_id: int, *, today, no
         SELECT id, doctor_id, clinic_id, work_date, start_time, end_time,
                avg_minutes_per_patient, max_patients, booked_patients, status
         FROM doctor_schedules
-        WHERE clinic_id=%s AND doctor_id=%s AND DATE(work_date)=%s
+        WHERE clinic_id=%s AND doctor_id=%s AND work_date=%s
               AND status=1 AND booked_patients < max_patients
               AND start_time > %s
         ORDER BY start_time LIMIT 1
@@ -245,46 +294,73 @@ def book_by_shift_offline(patient_id: int, req: BookByShiftRequestModel, has_ins
     return _book_by_shift_core(patient_id, req, has_insurances=has_insurances, channel="offline")
 
 
-def get_my_appointments(patient_id: int, filters: AppointmentFilterModel):
+def _effective_time_range(
+    where: list, params: list, from_date, to_date, *, scheduled_only: bool = False,
+) -> None:
+    """
+    Lọc ngày theo khoảng nửa mở trên cột a.effective_time (có index):
+        from_date 00:00 <= effective_time < (to_date + 1 ngày) 00:00
+    thay vì DATE(...) bọc cột (MySQL không dùng được index).
+
+    effective_time = COALESCE(estimated_time, created_at). Bộ lọc vốn theo
+    DATE(estimated_time) truyền scheduled_only=True để giữ nguyên ngữ nghĩa:
+    lịch chưa có giờ dự kiến không lọt vào kết quả khi có lọc ngày.
+    """
+    if scheduled_only and (from_date or to_date):
+        where.append("a.estimated_time IS NOT NULL")
+    if from_date:
+        where.append("a.effective_time >= %s")
+        params.append(datetime.combine(from_date, datetime.min.time()))
+    if to_date:
+        where.append("a.effective_time < %s")
+        params.append(datetime.combine(to_date + timedelta(days=1), datetime.min.time()))
+
+
+def get_my_appointments(
+    patient_id: int,
+    filters: AppointmentFilterModel
+) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[Dict[str, Any]]]:
     where = ["a.patient_id = %s"]
     params = [patient_id]
-    if filters.from_date:
-        where.append("DATE(a.estimated_time) >= %s"); params.append(filters.from_date)
-    if filters.to_date:
-        where.append("DATE(a.estimated_time) <= %s"); params.append(filters.to_date)
+    _effective_time_range(where, params, filters.from_date, filters.to_date, scheduled_only=True)
+    facets = facet_summary(where, params, status_sel=filters.status_filter) if filters.with_facets else None
     if filters.status_filter is not None:
         where.append("a.status = %s"); params.append(filters.status_filter)
+    if filters.cursor:
+        clause, values = keyset_clause(filters.cursor)
+        where.append(clause); params.extend(values)
 
     sql = f"""
         SELECT a.id, a.patient_id, a.clinic_id, a.service_id, a.doctor_id, a.schedule_id,
                a.queue_number, a.shift_number, a.estimated_time, a.printed, a.status,
                a.booking_channel, a.cur_price,
                s.name AS service_name, s.price AS service_price,
-               d.full_name AS doctor_name, c.name AS clinic_name
+               d.full_name AS doctor_name, c.name AS clinic_name,
+               a.effective_time
         FROM appointments a
         JOIN services s ON a.service_id = s.id
         JOIN doctors  d ON a.doctor_id = d.id
         JOIN clinics  c ON a.clinic_id = c.id
         WHERE {" AND ".join(where)}
-        ORDER BY COALESCE(a.estimated_time, a.created_at) DESC, a.id DESC
+        ORDER BY a.effective_time DESC, a.id DESC
         LIMIT %s OFFSET %s
     """
-    params.extend([filters.limit, filters.offset])
-    return db.query_get(sql, tuple(params))
+    params.extend([filters.limit + 1, 0 if filters.cursor else filters.offset])
+    return (*paginate(db.query_get(sql, tuple(params)), filters.limit, id_key="id"), facets)
 
 def list_patient_appointments_by_payment(
     patient_id: int,
     filters: AppointmentPaymentFilterModel
-) -> List[Dict[str, Any]]:
+) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[Dict[str, Any]]]:
     where = ["a.patient_id = %s"]
     params: list = [patient_id]
 
-    if filters.from_date:
-        where.append("DATE(COALESCE(a.estimated_time, a.created_at)) >= %s")
-        params.append(filters.from_date)
-    if filters.to_date:
-        where.append("DATE(COALESCE(a.estimated_time, a.created_at)) <= %s")
-        params.append(filters.to_date)
+    _effective_time_range(where, params, filters.from_date, filters.to_date)
+    facets = facet_summary(where, params, pay_sel=filters.pay_status) if filters.with_facets else None
+    if filters.cursor:
+        clause, values = keyset_clause(filters.cursor)
+        where.append(clause)
+        params.extend(values)
 
     sql = f"""
         SELECT
@@ -304,9 +380,10 @@ def list_patient_appointments_by_payment(
             a.queue_number,
             CAST(a.cur_price AS SIGNED) AS price_vnd,
             a.estimated_time,
+            a.effective_time,
 
             -- Thanh toán (bản ghi mới nhất)
-            po.status        AS pay_status,
+            COALESCE(po.status, 'UNPAID') AS pay_status,
             po.paid_at,
             po.order_code
         FROM appointments a
@@ -314,32 +391,62 @@ def list_patient_appointments_by_payment(
         JOIN services  s ON s.id = a.service_id
         JOIN clinics   c ON c.id = a.clinic_id
         JOIN doctors   d ON d.id = a.doctor_id
-        LEFT JOIN (
-            SELECT t.*
-            FROM payment_orders t
-            JOIN (
-                SELECT appointment_id, MAX(id) AS max_id
-                FROM payment_orders
-                GROUP BY appointment_id
-            ) z ON z.max_id = t.id
-        ) po ON po.appointment_id = a.id
+        LEFT JOIN payment_orders po ON po.id = a.latest_payment_order_id
         WHERE {" AND ".join(where)}
     """
     if filters.pay_status:
-        sql += " AND po.status = %s "
+        sql += " AND COALESCE(po.status, 'UNPAID') = %s "   # cùng cách chia nhóm với facet
         params.append(filters.pay_status.upper())
 
     sql += """
-        ORDER BY COALESCE(a.estimated_time, a.created_at) DESC, a.id DESC
+        ORDER BY a.effective_time DESC, a.id DESC
         LIMIT %s OFFSET %s
     """
-    params.extend([filters.limit, filters.offset])
+    params.extend([filters.limit + 1, 0 if filters.cursor else filters.offset])
+
+    rows = db.query_get(sql, tuple(params))
+    return (*paginate(rows, filters.limit, id_key="appointment_id"), facets)
+
+
+# Cache user_id -> doctor_id (ánh xạ gần như không đổi), tránh join d.user_id mỗi request
+_DOCTOR_ID_TTL = 300
+_doctor_id_cache: Dict[int, Tuple[int, float]] = {}
+_doctor_id_lock = threading.Lock()
+
+def get_doctor_id_for_user(user_id: int) -> int:
+    now = time.monotonic()
+    with _doctor_id_lock:
+        hit = _doctor_id_cache.get(user_id)
+        if hit and now - hit[1] < _DOCTOR_ID_TTL:
+            return hit[0]
+    doc = db.query_one("SELECT id FROM doctors WHERE user_id=%s", (user_id,))
+    if not doc:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Không tìm thấy bác sĩ ứng với user")
+    doctor_id = int(doc["id"])
+    with _doctor_id_lock:
+        _doctor_id_cache[user_id] = (doctor_id, now)
+    return doctor_id
+
 
-    return db.query_get(sql, tuple(params))
+def get_my_appointments_of_doctor_user(
+    user_id: int,
+    filters: DoctorAppointmentFilterModel
+) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[Dict[str, Any]]]:
+    doctor_id = get_doctor_id_for_user(user_id)
 
+    where = ["a.doctor_id = %s"]
+    params: list = [doctor_id]
+    _effective_time_range(where, params, filters.from_date, filters.to_date, scheduled_only=True)
+    facets = facet_summary(where, params, status_sel=filters.status_filter) if filters.with_facets else None
+    if filters.status_filter is not None:
+        where.append("a.status = %s")
+        params.append(filters.status_filter)
+    if filters.cursor:
+        clause, values = keyset_clause(filters.cursor)
+        where.append(clause)
+        params.extend(values)
 
-def get_my_appointments_of_doctor_user(user_id: int) -> List[Dict[str, Any]]:
-    sql = """
+    sql = f"""
         SELECT
             a.id AS appointment_id,
             a.patient_id,
@@ -352,23 +459,23 @@ def get_my_appointments_of_doctor_user(user_id: int) -> List[Dict[str, Any]]:
             TIME_FORMAT(ds.start_time, '%%H:%%i') AS start_time,
             TIME_FORMAT(ds.end_time,   '%%H:%%i') AS end_time,
             a.status AS appointment_status,
-            a.created_at
+            a.created_at,
+            a.effective_time
         FROM appointments a
-        JOIN doctors d              ON d.id = a.doctor_id
         LEFT JOIN doctor_schedules ds ON ds.id = a.schedule_id
         JOIN patients p             ON p.id = a.patient_id
         JOIN clinics c              ON c.id = a.clinic_id
-        WHERE d.user_id = %s
-        ORDER BY a.created_at DESC
+        WHERE {" AND ".join(where)}
+        ORDER BY a.effective_time DESC, a.id DESC
+        LIMIT %s
     """
-    return db.query_get(sql, (user_id,))
+    params.append(filters.limit + 1)
+    rows = db.query_get(sql, tuple(params))
+    return (*paginate(rows, filters.limit, id_key="appointment_id"), facets)
 
 def update_appointment_status_by_doctor(user_id: int, appointment_id: int, new_status: int) -> dict:
     # Lấy doctor_id từ user_id
-    doc = db.query_one("SELECT id FROM doctors WHERE user_id=%s", (user_id,))
-    if not doc:
-        raise HTTPException(status.HTTP_404_NOT_FOUND, "Không tìm thấy bác sĩ ứng với user")
-    doctor_id = int(doc["id"])
+    doctor_id = get_doctor_id_for_user(user_id)
 
     conn = db.get_connection()
     try:
@@ -377,7 +484,8 @@ def update_appointment_status_by_doctor(user_id: int, appointment_id: int, new_s
 
             # Lock lịch hẹn
             cur.execute("""
-                SELECT id, doctor_id, schedule_id, status
+                SELECT id, doctor_id, clinic_id, service_id, schedule_id, shift_number,
+                       estimated_time, effective_time, status
                 FROM appointments
                 WHERE id=%s
                 FOR UPDATE
@@ -406,14 +514,34 @@ def update_appointment_status_by_doctor(user_id: int, appointment_id: int, new_s
             """, (new_status, appointment_id))
 
             # Nếu hủy -> trả slot
+            released = None
             if new_status == 4 and appt["schedule_id"]:
                 cur.execute("""
                     UPDATE doctor_schedules
                     SET booked_patients = GREATEST(booked_patients - 1, 0)
                     WHERE id=%s
                 """, (appt["schedule_id"],))
+                released = _schedule_snapshot(cur, appt["schedule_id"])
 
+            # Hủy / no-show khi đang chờ -> dồn giờ dự kiến của các lịch phía sau
+            if new_status in (3, 4) and old_status in (0, 1) and appt["schedule_id"]:
+                _resequence_shift_after(cur, appt["schedule_id"], appt["shift_number"])
+
+            record_status_change(cur, appt, old_status, new_status)
             conn.commit()
+            publish_schedule(released)
+            today_counters.on_status_change(appt["clinic_id"], appt["effective_time"], old_status, new_status)
+            invalidate_facets()
+
+            # Ghi nhận mốc kết thúc lượt để tính ETA theo thời lượng thực tế
+            if appt["schedule_id"]:
+                if new_status in (2, 3):
+                    eta_tracker.record(
+                        appt["schedule_id"], datetime.now(VN_TZ).replace(tzinfo=None),
+                        completed=(new_status == 2),
+                    )
+                else:
+                    eta_tracker.invalidate(appt["schedule_id"])
             return {
                 "message": "Cập nhật trạng thái thành công",
                 "old_status": old_status,
@@ -429,21 +557,7 @@ def update_appointment_status_by_doctor(user_id: int, appointment_id: int, new_s
         except: pass
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Lỗi cơ sở dữ liệu: {e}")
 
-def list_all_appointments_by_payment_admin(
-    filters: AppointmentPaymentFilterModel
-) -> List[Dict[str, Any]]:
-    where = ["1=1"]
-    params: list = []
-
-    if filters.from_date:
-        where.append("DATE(COALESCE(a.estimated_time, a.created_at)) >= %s")
-        params.append(filters.from_date)
-    if filters.to_date:
-        where.append("DATE(COALESCE(a.estimated_time, a.created_at)) <= %s")
-        params.append(filters.to_date)
-
-    sql = f"""
-        SELECT
+_ADMIN_PAYMENT_COLUMNS = """
             -- Bệnh nhân
             p.full_name      AS patient_name,
             p.national_id    AS patient_national_id,
@@ -465,34 +579,141 @@ def list_all_appointments_by_payment_admin(
             COALESCE(po.status, 'UNPAID') AS pay_status,
             po.paid_at,
             po.order_code
+"""
 
+_ADMIN_PAYMENT_FROM = """
         FROM appointments a
         JOIN patients  p ON p.id = a.patient_id
         JOIN services  s ON s.id = a.service_id
         JOIN clinics   c ON c.id = a.clinic_id
         JOIN doctors   d ON d.id = a.doctor_id
-        LEFT JOIN (
-            SELECT t.*
-            FROM payment_orders t
-            JOIN (
-                SELECT appointment_id, MAX(id) AS max_id
-                FROM payment_orders
-                GROUP BY appointment_id
-            ) z ON z.max_id = t.id
-        ) po ON po.appointment_id = a.id
-        WHERE {" AND ".join(where)}
-    """
+        LEFT JOIN payment_orders po ON po.id = a.latest_payment_order_id
+"""
+
+def _admin_base_where(filters) -> Tuple[List[str], list]:
+    """Bộ lọc gốc (chỉ khoảng ngày) - dùng cho facet."""
+    where = ["1=1"]
+    params: list = []
+    _effective_time_range(where, params, filters.from_date, filters.to_date)
+    return where, params
+
+def _admin_payment_where(filters) -> Tuple[List[str], list]:
+    """Điều kiện lọc dùng chung cho danh sách admin và export."""
+    where, params = _admin_base_where(filters)
     if filters.pay_status:
-        sql += " AND COALESCE(po.status, 'UNPAID') = %s "
+        where.append("COALESCE(po.status, 'UNPAID') = %s")
         params.append(filters.pay_status.upper())
+    return where, params
 
-    sql += """
-        ORDER BY COALESCE(a.estimated_time, a.created_at) DESC, a.id DESC
+
+def list_all_appointments_by_payment_admin(
+    filters: AppointmentPaymentFilterModel
+) -> Tuple[List[Dict[str, Any]], Optional[str], Optional[Dict[str, Any]]]:
+    facets = facet_summary(*_admin_base_where(filters), pay_sel=filters.pay_status) if filters.with_facets else None
+    where, params = _admin_payment_where(filters)
+    if filters.cursor:
+        clause, values = keyset_clause(filters.cursor)
+        where.append(clause)
+        params.extend(values)
+
+    sql = f"""
+        SELECT {_ADMIN_PAYMENT_COLUMNS},
+            a.effective_time
+        {_ADMIN_PAYMENT_FROM}
+        WHERE {" AND ".join(where)}
+        ORDER BY a.effective_time DESC, a.id DESC
         LIMIT %s OFFSET %s
     """
-    params.extend([filters.limit, filters.offset])
+    params.extend([filters.limit + 1, 0 if filters.cursor else filters.offset])
+
+    rows = db.query_get(sql, tuple(params))
+    return (*paginate(rows, filters.limit, id_key="appointment_id"), facets)
+
+
+EXPORT_COLUMNS = [
+    ("appointment_id", "Mã lịch hẹn"),
+    ("patient_name", "Họ tên"),
+    ("patient_national_id", "CCCD"),
+    ("patient_dob", "Ngày sinh"),
+    ("patient_gender", "Giới tính"),
+    ("patient_phone", "SĐT"),
+    ("service_name", "Dịch vụ"),
+    ("clinic_name", "Phòng khám"),
+    ("doctor_name", "Bác sĩ"),
+    ("shift_number", "STT trong ca"),
+    ("queue_number", "STT"),
+    ("price_vnd", "Giá (VND)"),
+    ("estimated_time", "Thời gian khám"),
+    ("pay_status", "Thanh toán"),
+    ("paid_at", "Thời gian thanh toán"),
+    ("order_code", "Mã đơn"),
+]
+
+def iter_admin_payment_export(filters: AppointmentExportFilterModel) -> Iterator[Dict[str, Any]]:
+    """
+    Duyệt toàn bộ kết quả lọc (cùng projection với /appointments/admin/payment)
+    qua server-side cursor -> bộ nhớ không phụ thuộc số dòng.
+    """
+    where, params = _admin_payment_where(filters)
+    sql = f"""
+        SELECT {_ADMIN_PAYMENT_COLUMNS}
+        {_ADMIN_PAYMENT_FROM}
+        WHERE {" AND ".join(where)}
+        ORDER BY a.effective_time DESC, a.id DESC
+    """
+    return db.query_stream(sql, tuple(params))
+
+
+def _export_cell(v: Any) -> Any:
+    if isinstance(v, datetime):
+        return v.strftime("%Y-%m-%d %H:%M:%S")
+    return "" if v is None else v
 
-    return db.query_get(sql, tuple(params))
+
+def export_admin_payment_csv(filters: AppointmentExportFilterModel) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([title for _, title in EXPORT_COLUMNS])
+    yield ("\ufeff" + buf.getvalue()).encode("utf-8")   # BOM để Excel đọc đúng tiếng Việt
+    buf.seek(0); buf.truncate()
+
+    n = 0
+    for row in iter_admin_payment_export(filters):
+        writer.writerow([_export_cell(row.get(k)) for k, _ in EXPORT_COLUMNS])
+        n += 1
+        if n % 500 == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0); buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def export_admin_payment_xlsx(filters: AppointmentExportFilterModel) -> Iterator[bytes]:
+    """
+    XLSX (openpyxl write-only): ghi từng dòng ra file tạm trên đĩa rồi stream file,
+    không giữ cả workbook trong RAM.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise HTTPException(status.HTTP_501_NOT_IMPLEMENTED, "Server chưa cài openpyxl để xuất XLSX")
+
+    def _gen() -> Iterator[bytes]:
+        with tempfile.TemporaryFile(suffix=".xlsx") as tmp:
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet("Lich hen")
+            ws.append([title for _, title in EXPORT_COLUMNS])
+            for row in iter_admin_payment_export(filters):
+                ws.append([_export_cell(row.get(k)) for k, _ in EXPORT_COLUMNS])
+            wb.save(tmp)
+            tmp.seek(0)
+            while True:
+                chunk = tmp.read(64 * 1024)
+                if not chunk:
+                    break
+                yield chunk
+
+    return _gen()
 
 
 def cancel_my_appointment(appointment_id: int, patient_id: int) -> dict:
@@ -501,7 +722,11 @@ def cancel_my_appointment(appointment_id: int, patient_id: int) -> dict:
         with conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT id, patient_id, schedule_id, status FROM appointments WHERE id=%s AND patient_id=%s FOR UPDATE",
+                """
+                SELECT id, patient_id, clinic_id, doctor_id, service_id, schedule_id,
+                       shift_number, estimated_time, effective_time, status
+                FROM appointments WHERE id=%s AND patient_id=%s FOR UPDATE
+                """,
                 (appointment_id, patient_id),
             )
             appt = cur.fetchone()
@@ -511,12 +736,21 @@ def cancel_my_appointment(appointment_id: int, patient_id: int) -> dict:
                 raise HTTPException(status.HTTP_409_CONFLICT, "Trạng thái hiện tại không cho phép hủy")
 
             cur.execute("UPDATE appointments SET status=4 WHERE id=%s", (appointment_id,))
+            released = None
             if appt["schedule_id"]:
                 cur.execute(
                     "UPDATE doctor_schedules SET booked_patients = GREATEST(booked_patients - 1, 0) WHERE id=%s",
                     (appt["schedule_id"],),
                 )
+                _resequence_shift_after(cur, appt["schedule_id"], appt["shift_number"])
+                released = _schedule_snapshot(cur, appt["schedule_id"])
+            record_status_change(cur, appt, int(appt["status"]), 4)
             conn.commit()
+            publish_schedule(released)
+            today_counters.on_status_change(appt["clinic_id"], appt["effective_time"], int(appt["status"]), 4)
+            invalidate_facets()
+            if appt["schedule_id"]:
+                eta_tracker.invalidate(appt["schedule_id"])
             return {"message": "Hủy lịch hẹn thành công"}
     except HTTPException:
         try: conn.rollback()
@@ -527,66 +761,29 @@ def cancel_my_appointment(appointment_id: int, patient_id: int) -> dict:
         except: pass
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, f"Lỗi cơ sở dữ liệu: {e}")
 
-UI = {
-    "title":        colors.HexColor("#0F172A"),
-    "muted":        colors.HexColor("#64748B"),
-    "patient_bg":   colors.HexColor("#EAF2FF"),
-    "patient_bd":   colors.HexColor("#D6E3FF"),
-    "exam_bg":      colors.HexColor("#F0FAF4"),
-    "exam_bd":      colors.HexColor("#CDE7D6"),
-    "chip_bg":      colors.HexColor("#E8F5E9"),
-    "chip_bd":      colors.HexColor("#43A047"),
-    "chip_txt":     colors.HexColor("#2E7D32"),
-    "price":        colors.HexColor("#16A34A"),
-    "danger":       colors.HexColor("#EF4444"),
-    "hint_bg":      colors.HexColor("#FFF7D6"),
-    "hint_bd":      colors.HexColor("#FDE68A"),
-    "icon_green":   colors.HexColor("#10B981"),
-}
+def _load_shift_waiting(schedule_id: int) -> Dict[str, Any]:
+    ds = db.query_one(
+        "SELECT id, avg_minutes_per_patient FROM doctor_schedules WHERE id=%s",
+        (schedule_id,),
+    )
+    if not ds:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Không tìm thấy ca")
+    waiting = db.query_get(
+        """
+        SELECT id, shift_number, estimated_time
+        FROM appointments
+        WHERE schedule_id=%s AND status IN (0,1)
+        ORDER BY shift_number
+        """,
+        (schedule_id,),
+    )
+    return {"avg_minutes_per_patient": ds["avg_minutes_per_patient"], "waiting": waiting}
 
-# fonts
-_FONTS_REGISTERED = False
-def _ensure_fonts():
-    global _FONTS_REGISTERED
-    if _FONTS_REGISTERED: return
-    fonts_dir = Path(__file__).resolve().parents[1] / "fonts"
-    pdfmetrics.registerFont(TTFont("DejaVu",      str(fonts_dir / "DejaVuSans.ttf")))
-    pdfmetrics.registerFont(TTFont("DejaVu-Bold", str(fonts_dir / "DejaVuSans-Bold.ttf")))
-    _FONTS_REGISTERED = True
-
-# helpers
-def _fmt_vnd(n: int | float) -> str:
-    try: n = int(n)
-    except: return str(n)
-    return f"{n:,}".replace(",", ".") + " ₫"
-
-def _qr_reader(payload: str) -> ImageReader:
-    img = qrcode.make(payload)
-    pil = img.get_image() if hasattr(img, "get_image") else img
-    b = BytesIO(); pil.save(b, format="PNG"); b.seek(0)
-    return ImageReader(b)
-
-def _round_rect(cv, x, y_top, w, h, r, fill, stroke, lw=1):
-    cv.setFillColor(fill); cv.setStrokeColor(stroke); cv.setLineWidth(lw)
-    cv.roundRect(x, y_top - h, w, h, r, stroke=1, fill=1)
-
-def _section_header(cv, x, y, text, dot_color):
-    cv.setFillColor(dot_color); cv.circle(x + 2.2*mm, y - 2.6*mm, 1.6*mm, stroke=0, fill=1)
-    cv.setFillColor(UI["title"]); cv.setFont("DejaVu-Bold", 12); cv.drawString(x + 6*mm, y, text)
-
-def _pair(cv, x, y, label, value, label_w, value_w, *, value_bold=False, value_color=None):
-    """
-    Label & value đều căn trái. Giá trị bắt đầu tại:
-        x + max(label_w, measured(label)+gap)
-    -> tránh bị dính khi label dài.
-    """
-    lbl_font, lbl_size, gap = "DejaVu-Bold", 10, 2*mm
-    cv.setFont(lbl_font, lbl_size); cv.setFillColor(UI["title"]); cv.drawString(x, y, label)
-    measured = cv.stringWidth(label, lbl_font, lbl_size)
-    value_x = x + max(label_w, measured + gap)
-    cv.setFont("DejaVu-Bold" if value_bold else "DejaVu", 10)
-    cv.setFillColor(value_color or UI["title"])
-    cv.drawString(value_x, y, str(value))
+
+def get_shift_eta(schedule_id: int) -> Dict[str, Any]:
+    """ETA của các lịch còn chờ trong ca, theo thời lượng khám quan sát được."""
+    now = datetime.now(VN_TZ).replace(tzinfo=None)
+    return eta_tracker.project(schedule_id, _load_shift_waiting, now)
 
 # data
 def _fetch_paid_appointment_for_print(appointment_id: int, patient_id: int) -> Dict[str, Any]:
@@ -594,7 +791,7 @@ def _fetch_paid_appointment_for_print(appointment_id: int, patient_id: int) -> D
         """
         SELECT
             a.id, a.patient_id, a.clinic_id, a.service_id, a.doctor_id, a.schedule_id,
-            a.queue_number, a.shift_number, a.estimated_time, a.status, a.cur_price,
+            a.queue_number, a.shift_number, a.estimated_time, a.status, a.cur_price, a.created_at,
             p.full_name AS patient_name, p.national_id,
             DATE_FORMAT(p.date_of_birth,'%%Y-%%m-%%d') AS dob,
             p.gender, p.phone,
@@ -607,12 +804,7 @@ def _fetch_paid_appointment_for_print(appointment_id: int, patient_id: int) -> D
         JOIN services  s ON s.id = a.service_id
         JOIN doctors   d ON d.id = a.doctor_id
         JOIN clinics   c ON c.id = a.clinic_id
-        LEFT JOIN (
-            SELECT t.*
-            FROM payment_orders t
-            JOIN (SELECT appointment_id, MAX(id) AS max_id
-                  FROM payment_orders GROUP BY appointment_id) z ON z.max_id = t.id
-        ) po ON po.appointment_id = a.id
+        LEFT JOIN payment_orders po ON po.id = a.latest_payment_order_id
         WHERE a.id=%s AND a.patient_id=%s
         LIMIT 1
         """,
@@ -624,123 +816,181 @@ def _fetch_paid_appointment_for_print(appointment_id: int, patient_id: int) -> D
         raise HTTPException(status.HTTP_409_CONFLICT, "Lịch hẹn chưa thanh toán xong")
     return info
 
+# Tăng khi đổi layout phiếu -> mọi key cache cũ tự mất hiệu lực
+TICKET_LAYOUT_VERSION = 3
+
+def _ticket_cache_key(appointment_id: int, patient_id: int, fmt: str = "pdf") -> str:
+    """
+    Key cache phiếu: chỉ đọc các trường in trên phiếu có thể đổi sau thanh toán
+    (đơn/paid_at, giờ khám dự kiến bị dồn lại khi lịch trước hủy, STT) + dấu
+    vân tay key ký QR check-in (đổi secret -> không trả phiếu mang QR cũ).
+    """
+    row = db.query_one(
+        """
+        SELECT a.id, a.estimated_time, a.queue_number,
+               po.order_code, po.status AS pay_status, po.paid_at
+        FROM appointments a
+        LEFT JOIN payment_orders po ON po.id = a.latest_payment_order_id
+        WHERE a.id=%s AND a.patient_id=%s
+        """,
+        (appointment_id, patient_id),
+    )
+    if not row: raise HTTPException(status.HTTP_404_NOT_FOUND, "Không tìm thấy lịch hẹn")
+    if not row.get("order_code") or row.get("pay_status") != "PAID":
+        raise HTTPException(status.HTTP_409_CONFLICT, "Lịch hẹn chưa thanh toán xong")
+    return ticket_cache.key(
+        fmt, TICKET_LAYOUT_VERSION, row["id"], row["order_code"], row["paid_at"],
+        row["estimated_time"], row["queue_number"], checkin_key_fingerprint(),
+    )
+
 # render
-def generate_visit_ticket_pdf(appointment_id: int, patient_id: int) -> tuple[bytes, str]:
-    _ensure_fonts()
+TICKET_FORMATS = {
+    # format -> (media type, đuôi file)
+    "pdf":    ("application/pdf", "pdf"),
+    "escpos": ("application/octet-stream", "bin"),
+    "png":    ("image/png", "png"),
+}
+
+def generate_visit_ticket(
+    appointment_id: int, patient_id: int, fmt: str = "pdf", width_mm: int = 80,
+) -> tuple[bytes, str, str]:
+    """Phiếu khám theo định dạng: A4 PDF hoặc khổ in nhiệt (ESC/POS / PNG 1-bit)."""
+    # reportlab / qrcode / PIL chỉ nạp ở lần in đầu tiên (hoặc trong warm-up nền)
+    from backend.appointments.ticket_render import render_visit_ticket_pdf
+    from backend.appointments.ticket_thermal import PAPER as THERMAL_PAPER, render_escpos, render_png
+
+    if fmt != "pdf" and width_mm not in THERMAL_PAPER:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Khổ giấy chỉ hỗ trợ 58 hoặc 80 mm")
+    media_type, ext = TICKET_FORMATS[fmt]
+    variant = "pdf" if fmt == "pdf" else f"{fmt}{width_mm}"
+    filename = f"phieu_kham_{appointment_id}.{ext}"
+    key = _ticket_cache_key(appointment_id, patient_id, variant)
+    cached = ticket_cache.get(key)
+    if cached is not None:
+        return cached, filename, media_type
+
     data = _fetch_paid_appointment_for_print(appointment_id, patient_id)
+    # render trong process pool riêng (503 Retry-After khi pool đầy)
+    if fmt == "escpos":
+        body = render_pool.run(render_escpos, data, width_mm, kind=fmt)
+    elif fmt == "png":
+        body = render_pool.run(render_png, data, width_mm, kind=fmt)
+    else:
+        body = render_pool.run(render_visit_ticket_pdf, data, kind=fmt)
+    ticket_cache.put(key, body)
+    return body, filename, media_type
+
+def generate_visit_ticket_pdf(appointment_id: int, patient_id: int) -> tuple[bytes, str]:
+    body, filename, _ = generate_visit_ticket(appointment_id, patient_id, "pdf")
+    return body, filename
+
+# in hàng loạt (quầy tiếp đón)
+TICKET_BATCH_MAX = 500
 
-    est = data.get("estimated_time")
-    est_str  = est.strftime("%H:%M %d/%m/%Y") if isinstance(est, datetime) else "-"
-    paid_at  = data.get("paid_at")
-    paid_str = paid_at.strftime("%H:%M %d/%m/%Y") if isinstance(paid_at, datetime) else "-"
-
-    buf = BytesIO()
-    cv = canvas.Canvas(buf, pagesize=A4)
-    w, h = A4
-    margin = 16*mm
-    content_w = w - 2*margin
-    y = h - margin
-    row = 6*mm
-
-    # Title
-    cv.setFont("DejaVu-Bold", 18); cv.setFillColor(UI["title"]); cv.drawCentredString(w/2, y, "Hoàn Thành Đăng Ký")
-    y -= 7*mm
-    cv.setFont("DejaVu", 11); cv.setFillColor(UI["muted"]); cv.drawCentredString(w/2, y, "Kiểm tra thông tin và in phiếu khám")
-    y -= 10*mm
-
-    # Card patient
-    card1_h = 42*mm
-    _round_rect(cv, margin, y, content_w, card1_h, 8, UI["patient_bg"], UI["patient_bd"])
-    inner = 9*mm
-    x = margin + inner
-    y1 = y - inner
-    _section_header(cv, x, y1, "Thông Tin Bệnh Nhân", UI["icon_green"])
-    y1 -= 9*mm
-
-    col_w = (content_w - 2*inner) / 2
-    label_w = 24*mm
-    value_w = col_w - label_w - 2*mm
-
-    _pair(cv, x,           y1,           "Họ tên:",     data["patient_name"],            label_w, value_w, value_bold=True)
-    _pair(cv, x,           y1 - row,     "Ngày sinh:",  data.get("dob") or "-",          label_w, value_w)
-    _pair(cv, x,           y1 - 2*row,   "SĐT:",        data.get("phone") or "-",        label_w, value_w)
-
-    x2 = x + col_w
-    _pair(cv, x2,          y1,           "CCCD:",       data.get("national_id") or "-",  label_w, value_w)
-    _pair(cv, x2,          y1 - row,     "Giới tính:",  (data.get("gender") or "-"),     label_w, value_w)
-
-    y = y - card1_h - 7*mm
-
-    # Card exam
-    card2_h = 58*mm
-    _round_rect(cv, margin, y, content_w, card2_h, 8, UI["exam_bg"], UI["exam_bd"])
-    x = margin + inner
-    y2 = y - inner
-    _section_header(cv, x, y2, "Thông Tin Khám", UI["icon_green"])
-    y2 -= 9*mm
-
-    col_w = (content_w - 2*inner) / 2
-    label_w = 26*mm
-    value_w = col_w - label_w - 2*mm
-
-    _pair(cv, x,           y2,           "Dịch vụ:",    data["service_name"],            label_w, value_w)
-    _pair(cv, x,           y2 - row,     "Bác sĩ:",     data["doctor_name"],             label_w, value_w)
-    _pair(cv, x,           y2 - 2*row,   "Giá:",        _fmt_vnd(data["cur_price"]),     label_w, value_w,
-          value_bold=True, value_color=UI["price"])
-
-    x2 = x + col_w
-    _pair(cv, x2,          y2,           "Phòng:",          data["clinic_name"],          label_w, value_w)
-    _pair(cv, x2,          y2 - row,     "Số thứ tự:",      str(data.get("queue_number") or "-"), label_w, value_w, value_bold=True)
-
-    # thời gian dự kiến (đo bề rộng label -> value không dính)
-    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["title"])
-    lbl = "Thời gian khám:"
-    cv.drawString(x2, y2 - 2*row, lbl)
-    value_x = x2 + max(label_w, cv.stringWidth(lbl, "DejaVu-Bold", 10) + 2*mm)
-    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["danger"])
-    cv.drawString(value_x, y2 - 2*row, est_str)
-
-    # chip + thời gian thanh toán (cũng đo bề rộng label)
-    chip_w, chip_h = 36*mm, 8*mm
-    chip_x = x; chip_y_top = y2 - 3*row + 2
-    _round_rect(cv, chip_x, chip_y_top, chip_w, chip_h, 3, UI["chip_bg"], UI["chip_bd"])
-    cv.setFont("DejaVu-Bold", 9); cv.setFillColor(UI["chip_txt"])
-    cv.drawCentredString(chip_x + chip_w/2, chip_y_top - chip_h/2 + 3, "ĐÃ THANH TOÁN")
-
-    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["title"])
-    lbl2 = "Thời gian thanh toán:"
-    cv.drawString(x2, y2 - 3*row, lbl2)
-    value_x2 = x2 + max(label_w, cv.stringWidth(lbl2, "DejaVu-Bold", 10) + 2*mm)
-    cv.setFont("DejaVu", 10); cv.setFillColor(UI["title"])
-    cv.drawString(value_x2, y2 - 3*row, paid_str)
-
-    y = y - card2_h - 8*mm
-
-    # QR
-    qr_payload = f"APPT:{data['id']}|ORDER:{data['order_code']}|PAID_AT:{paid_str}"
-    qr_img = _qr_reader(qr_payload)
-    qr_size = 48*mm
-    cv.drawImage(qr_img, (w - qr_size)/2, y - qr_size, qr_size, qr_size, preserveAspectRatio=True, mask='auto')
-    y -= (qr_size + 7*mm)
-    cv.setFont("DejaVu", 9); cv.setFillColor(UI["muted"])
-    cv.drawCentredString(w/2, y, "Mã QR dùng để check-in tại quầy")
-    y -= 10*mm
-
-    # Hint
-    hint_h = 28*mm
-    _round_rect(cv, margin, y, content_w, hint_h, 6, UI["hint_bg"], UI["hint_bd"])
-    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["title"])
-    cv.drawString(margin + 9*mm, y - 9, "Hướng dẫn:")
-    cv.setFont("DejaVu", 9)
-    for t in [
-        "Vui lòng mang theo phiếu khám tới quầy/triển khai tự động.",
-        "Nếu dùng BHYT, nhớ mang thẻ và giấy tờ liên quan.",
-        "Mọi thắc mắc vui lòng liên hệ quầy hướng dẫn.",
-    ]:
-        y -= 5*mm
-        cv.drawString(margin + 12*mm, y, f"• {t}")
-
-    cv.setTitle(f"PhieuKham-{data['id']}")
-    cv.showPage(); cv.save()
-    pdf_bytes = buf.getvalue(); buf.close()
-    return pdf_bytes, f"phieu_kham_{data['id']}.pdf"
\ No newline at end of file
+def _fetch_paid_appointments_for_print_batch(req: TicketBatchRequestModel) -> List[Dict[str, Any]]:
+    """
+    1 query cho cả lô: cùng cột với phiếu lẻ, chỉ lấy lịch đã thanh toán xong.
+    Bỏ lịch đã hủy / vắng mặt trừ khi include_inactive.
+    """
+    where, params = ["po.status='PAID'"], []
+    if not req.include_inactive:
+        where.append("a.status NOT IN (3, 4)")   # 3=no_show, 4=canceled
+    if req.appointment_ids:
+        ids = list(dict.fromkeys(req.appointment_ids))
+        if len(ids) > TICKET_BATCH_MAX:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Tối đa {TICKET_BATCH_MAX} phiếu mỗi lần in")
+        where.append(f"a.id IN ({','.join(['%s'] * len(ids))})")
+        params.extend(ids)
+    elif req.clinic_id and req.work_date:
+        where.append("a.clinic_id=%s")
+        params.append(req.clinic_id)
+        _effective_time_range(where, params, req.work_date, req.work_date, scheduled_only=True)
+    else:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Cần appointment_ids hoặc clinic_id + work_date")
+
+    params.append(TICKET_BATCH_MAX + 1)
+    rows = db.query_get(
+        f"""
+        SELECT
+            a.id, a.patient_id, a.clinic_id, a.service_id, a.doctor_id, a.schedule_id,
+            a.queue_number, a.shift_number, a.estimated_time, a.status, a.cur_price, a.created_at,
+            p.full_name AS patient_name, p.national_id,
+            DATE_FORMAT(p.date_of_birth,'%%Y-%%m-%%d') AS dob,
+            p.gender, p.phone,
+            s.name AS service_name,
+            d.full_name AS doctor_name,
+            c.name AS clinic_name,
+            po.order_code, po.status AS pay_status, po.paid_at, po.qr_code_url
+        FROM appointments a
+        JOIN patients  p ON p.id = a.patient_id
+        JOIN services  s ON s.id = a.service_id
+        JOIN doctors   d ON d.id = a.doctor_id
+        JOIN clinics   c ON c.id = a.clinic_id
+        JOIN payment_orders po ON po.id = a.latest_payment_order_id
+        WHERE {' AND '.join(where)}
+        ORDER BY a.estimated_time, a.queue_number, a.id
+        LIMIT %s
+        """,
+        tuple(params),
+    )
+    if len(rows) > TICKET_BATCH_MAX:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, f"Tối đa {TICKET_BATCH_MAX} phiếu mỗi lần in, hãy thu hẹp bộ lọc")
+    return rows
+
+def generate_visit_tickets_batch(req: TicketBatchRequestModel) -> tuple[bytes, str, int]:
+    """PDF nhiều trang cho cả lô, render song song trên process pool."""
+    rows = _fetch_paid_appointments_for_print_batch(req)
+    if not rows:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Không có lịch hẹn đã thanh toán phù hợp để in")
+    if req.appointment_ids:
+        filename = f"phieu_kham_{len(rows)}_lich.pdf"
+    else:
+        filename = f"phieu_kham_pk{req.clinic_id}_{req.work_date.isoformat()}.pdf"
+    return render_tickets_batch(rows), filename, len(rows)
+
+# check-in tại quầy (quét QR trên phiếu)
+metrics.describe("checkin_total", "Kết quả quét QR check-in tại quầy")
+
+def check_in_by_qr(payload: str) -> dict:
+    """
+    Xác thực chữ ký QR trong bộ nhớ, rồi 1 UPDATE theo khoá chính.
+    Chỉ khi UPDATE không khớp dòng nào mới đọc lại 1 dòng để báo lý do.
+    """
+    parsed = verify_checkin_payload(payload)
+    if parsed is None:
+        metrics.inc("checkin_total", result="invalid")
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Mã QR không hợp lệ")
+    appointment_id, day = parsed
+
+    now = datetime.now(VN_TZ).replace(tzinfo=None, microsecond=0)
+    if day != now.date():
+        metrics.inc("checkin_total", result="wrong_day")
+        raise HTTPException(status.HTTP_409_CONFLICT, f"Phiếu khám dành cho ngày {day:%d/%m/%Y}")
+
+    updated = db.query_put(
+        """
+        UPDATE appointments
+        SET checked_in_at=%s, printed=1
+        WHERE id=%s AND status IN (0, 1) AND checked_in_at IS NULL
+        """,
+        (now, appointment_id),
+    )
+    if updated:
+        metrics.inc("checkin_total", result="ok")
+        return {
+            "appointment_id": appointment_id, "checked_in_at": now,
+            "already_checked_in": False, "message": "Check-in thành công",
+        }
+
+    row = db.query_one("SELECT status, checked_in_at FROM appointments WHERE id=%s", (appointment_id,))
+    if not row:
+        metrics.inc("checkin_total", result="not_found")
+        raise HTTPException(status.HTTP_404_NOT_FOUND, "Không tìm thấy lịch hẹn")
+    if row["checked_in_at"] is not None:
+        metrics.inc("checkin_total", result="repeat")
+        return {
+            "appointment_id": appointment_id, "checked_in_at": row["checked_in_at"],
+            "already_checked_in": True, "message": "Lịch hẹn đã check-in trước đó",
+        }
+    metrics.inc("checkin_total", result="bad_status")
+    raise HTTPException(status.HTTP_409_CONFLICT, "Lịch hẹn đã hủy hoặc đã khám, không thể check-in")
@@ -0,0 +1,139 @@
+"""
+ETA theo thời lượng khám thực tế (in-memory, theo từng ca).
+
+Mỗi lần bác sĩ báo completed (2) / no_show (3) qua
+update_appointment_status_by_doctor, tracker ghi lại mốc thời gian:
+  - completed: khoảng cách từ mốc trước -> 1 mẫu thời lượng khám
+  - no_show:   chỉ dời mốc, không tính là 1 lượt khám
+Trung bình trượt trên WINDOW mẫu gần nhất dùng để tính lại ETA cho các lịch
+còn chờ. Kết quả projection được cache ngắn (PROJECTION_TTL giây) cho mỗi ca
+nên kiosk/điện thoại poll liên tục chỉ tốn ~1 query nhỏ mỗi TTL.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+WINDOW = 10                 # số mẫu gần nhất
+MIN_SAMPLE_MIN = 1          # bỏ mẫu quá ngắn (bấm nhầm)
+MAX_SAMPLE_MIN = 120        # bỏ mẫu quá dài (nghỉ trưa, gián đoạn)
+MAX_SHIFTS = 2048           # giới hạn số ca giữ trong bộ nhớ
+PROJECTION_TTL = 5          # giây
+
+
+@dataclass
+class _ShiftState:
+    samples: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    last_event_at: Optional[datetime] = None
+    projection: Optional[Dict[str, Any]] = None
+    projected_at: float = 0.0
+
+
+class ShiftEtaTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._shifts: "OrderedDict[int, _ShiftState]" = OrderedDict()
+
+    def _state(self, schedule_id: int) -> _ShiftState:
+        st = self._shifts.get(schedule_id)
+        if st is None:
+            st = _ShiftState()
+            self._shifts[schedule_id] = st
+            while len(self._shifts) > MAX_SHIFTS:
+                self._shifts.popitem(last=False)
+        else:
+            self._shifts.move_to_end(schedule_id)
+        return st
+
+    def record(self, schedule_id: int, at: datetime, *, completed: bool) -> None:
+        """Ghi nhận 1 sự kiện kết thúc lượt (completed / no_show) của ca."""
+        with self._lock:
+            st = self._state(schedule_id)
+            if completed and st.last_event_at is not None:
+                minutes = (at - st.last_event_at).total_seconds() / 60
+                if MIN_SAMPLE_MIN <= minutes <= MAX_SAMPLE_MIN:
+                    st.samples.append(minutes)
+            if st.last_event_at is None or at > st.last_event_at:
+                st.last_event_at = at
+            st.projection = None
+
+    def invalidate(self, schedule_id: int) -> None:
+        with self._lock:
+            st = self._shifts.get(schedule_id)
+            if st is not None:
+                st.projection = None
+
+    def observed_avg(self, schedule_id: int) -> Optional[float]:
+        with self._lock:
+            st = self._shifts.get(schedule_id)
+            if not st or not st.samples:
+                return None
+            return sum(st.samples) / len(st.samples)
+
+    def project(
+        self,
+        schedule_id: int,
+        load: Callable[[int], Dict[str, Any]],
+        now: datetime,
+    ) -> Dict[str, Any]:
+        """
+        Trả ETA cho các lịch còn chờ của ca.
+        `load(schedule_id)` trả {"avg_minutes_per_patient", "waiting": [...]} từ DB,
+        chỉ được gọi khi cache projection hết hạn.
+        """
+        with self._lock:
+            st = self._state(schedule_id)
+            if st.projection is not None and time.monotonic() - st.projected_at < PROJECTION_TTL:
+                return st.projection
+
+        base = load(schedule_id)
+
+        with self._lock:
+            st = self._state(schedule_id)
+            samples = list(st.samples)
+            last_event_at = st.last_event_at
+
+        # Endpoint công khai (kiosk/điện thoại) -> chỉ trả STT trong ca, không trả id lịch hẹn
+        waiting: List[Dict[str, Any]] = base["waiting"]
+        if samples:
+            avg = sum(samples) / len(samples)
+            # Neo vào mốc kết thúc lượt gần nhất: lịch chờ đầu tiên vào khám từ
+            # mốc đó, lịch thứ i vào sau i lượt. Mốc quá cũ (nghỉ, gián đoạn) -> neo vào now.
+            # ETA không bao giờ nằm trong quá khứ (đang trễ -> "ngay bây giờ").
+            recent = last_event_at is not None and now - last_event_at <= timedelta(minutes=MAX_SAMPLE_MIN)
+            anchor = last_event_at if recent else now
+            items = [
+                {
+                    "shift_number": w["shift_number"],
+                    "eta": max(anchor + timedelta(minutes=i * avg), now),
+                }
+                for i, w in enumerate(waiting)
+            ]
+            source = "observed"
+        else:
+            avg = float(base["avg_minutes_per_patient"])
+            items = [
+                {"shift_number": w["shift_number"], "eta": w["estimated_time"]}
+                for w in waiting
+            ]
+            source = "scheduled"
+
+        result = {
+            "schedule_id": schedule_id,
+            "avg_minutes": round(avg, 1),
+            "avg_source": source,
+            "samples": len(samples),
+            "last_event_at": last_event_at,
+            "generated_at": now,
+            "waiting": items,
+        }
+        with self._lock:
+            st = self._state(schedule_id)
+            st.projection = result
+            st.projected_at = time.monotonic()
+        return result
+
+
+eta_tracker = ShiftEtaTracker()
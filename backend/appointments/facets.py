@@ -0,0 +1,100 @@
+"""
+Facet (tổng + đếm theo status / pay_status) cho các API danh sách lịch hẹn.
+
+Một query GROUP BY (a.status, pay_status) trên cùng bộ lọc gốc (bệnh nhân /
+bác sĩ / khoảng ngày, KHÔNG gồm cursor và lựa chọn status/pay_status) cho ra
+bảng chéo; từ đó suy ra:
+  - status:     số lịch theo từng status, đã áp lựa chọn pay_status (nếu có)
+  - pay_status: số lịch theo từng pay_status, đã áp lựa chọn status (nếu có)
+  - total:      số lịch khớp đủ cả hai lựa chọn (= tổng của trang đang xem)
+Mỗi facet bỏ qua lựa chọn của chính nó nên số trên các tab UI vẫn có nghĩa
+khi đang đứng ở một tab. Bảng chéo được cache FACET_TTL giây theo bộ lọc
+gốc -> chuyển tab / sang trang không query lại. Mọi đường ghi đổi status /
+pay_status (đặt lịch, đổi trạng thái, hủy, tạo đơn, thanh toán) gọi
+invalidate_facets() sau commit nên số đếm luôn khớp danh sách trả kèm.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.database.connector import DatabaseConnector
+
+db = DatabaseConnector()
+
+FACET_TTL = 10          # giây
+MAX_ENTRIES = 1024
+
+_Cells = List[Tuple[int, str, int]]   # (status, pay_status, count)
+
+_cache: "OrderedDict[Tuple[str, tuple], Tuple[float, _Cells]]" = OrderedDict()
+_lock = threading.Lock()
+_generation = 0         # tăng mỗi lần invalidate -> bỏ kết quả đọc xen giữa lúc ghi
+
+
+def invalidate_facets() -> None:
+    global _generation
+    with _lock:
+        _generation += 1
+        _cache.clear()
+
+
+def _load_cells(where: List[str], params: list) -> _Cells:
+    rows = db.query_get(
+        f"""
+        SELECT a.status, COALESCE(po.status, 'UNPAID') AS pay_status, COUNT(*) AS cnt
+        FROM appointments a
+        LEFT JOIN payment_orders po ON po.id = a.latest_payment_order_id
+        WHERE {" AND ".join(where)}
+        GROUP BY a.status, pay_status
+        """,
+        tuple(params),
+    )
+    return [(int(r["status"]), str(r["pay_status"]), int(r["cnt"])) for r in rows]
+
+
+def _cells(where: List[str], params: list) -> _Cells:
+    key = (" AND ".join(where), tuple(params))
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(key)
+        if hit and now - hit[0] < FACET_TTL:
+            _cache.move_to_end(key)
+            return hit[1]
+        generation = _generation
+    cells = _load_cells(where, params)
+    with _lock:
+        if generation != _generation:
+            return cells
+        _cache[key] = (now, cells)
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return cells
+
+
+def facet_summary(
+    where: List[str],
+    params: list,
+    *,
+    status_sel: Optional[int] = None,
+    pay_sel: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    where/params: bộ lọc gốc chỉ tham chiếu cột của `a` (appointments).
+    status_sel / pay_sel: lựa chọn hiện tại của danh sách (nếu có).
+    """
+    pay_sel = pay_sel.upper() if pay_sel else None
+    by_status: Dict[str, int] = {}
+    by_pay: Dict[str, int] = {}
+    total = 0
+    for st, pay, cnt in _cells(where, params):
+        status_ok = status_sel is None or st == status_sel
+        pay_ok = pay_sel is None or pay == pay_sel
+        if pay_ok:
+            by_status[str(st)] = by_status.get(str(st), 0) + cnt
+        if status_ok:
+            by_pay[pay] = by_pay.get(pay, 0) + cnt
+        if status_ok and pay_ok:
+            total += cnt
+    return {"total": total, "status": by_status, "pay_status": by_pay}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, date
-from typing import Optional
+from typing import Dict, List, Optional, Literal
 
 # BỆNH NHÂN CHỌN CA
 class BookByShiftRequestModel(BaseModel):
@@ -10,6 +10,27 @@ class BookByShiftRequestModel(BaseModel):
     schedule_id: Optional[int] = None
     has_insurances: bool = False  # online có thể truyền kèm
 
+# PHÒNG CHỜ ẢO (admission control)
+class QueueJoinRequestModel(BaseModel):
+    clinic_id: int
+
+class QueueTicketResponseModel(BaseModel):
+    queue_token: str
+    clinic_id: int
+    admitted: bool             # True -> gửi lại request đặt lịch kèm X-Queue-Token
+    position: int              # vị trí trong hàng chờ (0 nếu đã được vào)
+    eta_seconds: int           # thời gian chờ ước tính
+    expires_in: Optional[int] = None  # giây còn lại để dùng lượt đã cấp
+
+class CheckInRequestModel(BaseModel):
+    qr: str = Field(..., max_length=128, description="Nội dung mã QR trên phiếu khám (CK1.<id>.<yymmdd>.<chữ ký>)")
+
+class CheckInResponseModel(BaseModel):
+    appointment_id: int
+    checked_in_at: datetime
+    already_checked_in: bool   # True -> đã check-in trước đó (quét lại)
+    message: str
+
 class AppointmentResponseModel(BaseModel):
     id: int
     patient_id: int
@@ -41,7 +62,17 @@ class AppointmentFilterModel(BaseModel):
     to_date: Optional[date] = Field(None, description="Ngày kết thúc lọc")
     status_filter: Optional[int] = Field(None, description="Lọc theo trạng thái (1=confirmed, 4=canceled,...)")
     limit: int = Field(100, ge=1, le=500, description="Số bản ghi tối đa")
-    offset: int = Field(0, ge=0, description="Bỏ qua N bản ghi đầu")
+    offset: int = Field(0, ge=0, description="Bỏ qua N bản ghi đầu (bỏ qua khi có cursor)")
+    cursor: Optional[str] = Field(None, description="Token trang sau (header X-Next-Cursor)")
+    with_facets: bool = Field(False, description="Trả kèm tổng + đếm theo status/pay_status (body dạng {items, facets})")
+
+class DoctorAppointmentFilterModel(BaseModel):
+    from_date: Optional[date] = Field(None, description="Từ ngày khám (theo giờ dự kiến)")
+    to_date: Optional[date] = Field(None, description="Đến ngày khám (bao gồm)")
+    status_filter: Optional[int] = Field(None, description="Lọc theo trạng thái (1=confirmed, 2=completed,...)")
+    limit: int = Field(100, ge=1, le=500, description="Số bản ghi tối đa")
+    cursor: Optional[str] = Field(None, description="Token trang sau (header X-Next-Cursor)")
+    with_facets: bool = Field(False, description="Trả kèm tổng + đếm theo status/pay_status (body dạng {items, facets})")
 
 class AppointmentPaymentFilterModel(BaseModel):
     # lọc theo ngày (optional)
@@ -54,7 +85,26 @@ class AppointmentPaymentFilterModel(BaseModel):
         description="PAID|AWAITING|PENDING|PARTIALLY|UNPAID"
     )
     limit: int = Field(100, ge=1, le=500)
-    offset: int = Field(0, ge=0)
+    offset: int = Field(0, ge=0, description="Bỏ qua N bản ghi đầu (bỏ qua khi có cursor)")
+    cursor: Optional[str] = Field(None, description="Token trang sau (header X-Next-Cursor)")
+    with_facets: bool = Field(False, description="Trả kèm tổng + đếm theo status/pay_status (body dạng {items, facets})")
+
+class AppointmentExportFilterModel(BaseModel):
+    # cùng bộ lọc với /appointments/admin/payment (không phân trang)
+    from_date: Optional[date] = None
+    to_date: Optional[date] = None
+    pay_status: Optional[str] = Field(
+        None,
+        description="PAID|AWAITING|PENDING|PARTIALLY|UNPAID"
+    )
+    format: Literal["csv", "xlsx"] = Field("csv", description="csv | xlsx")
+
+class TicketBatchRequestModel(BaseModel):
+    # in lại nhiều phiếu 1 lần: danh sách id HOẶC bộ lọc clinic + ngày khám
+    appointment_ids: Optional[List[int]] = Field(None, description="Danh sách id lịch hẹn (giữ thứ tự in theo giờ khám)")
+    clinic_id: Optional[int] = None
+    work_date: Optional[date] = Field(None, description="Ngày khám (theo giờ dự kiến)")
+    include_inactive: bool = Field(False, description="In cả lịch đã hủy (4) / vắng mặt (3)")
 
 class AppointmentPatientItem(BaseModel):
     appointment_id: int
@@ -105,3 +155,22 @@ class AppointmentAdminPaymentItem(BaseModel):
     pay_status: str  # PAID | AWAITING | PENDING | PARTIALLY | UNPAID
     paid_at: Optional[datetime] = None
     order_code: Optional[str] = None
+
+class ShiftEtaItem(BaseModel):
+    # không kèm id lịch hẹn: bệnh nhân tra theo STT trong ca in trên phiếu
+    shift_number: Optional[int] = None
+    eta: Optional[datetime] = None
+
+class ShiftEtaResponseModel(BaseModel):
+    schedule_id: int
+    avg_minutes: float           # phút/lượt đang dùng để tính ETA
+    avg_source: str              # 'observed' (thực tế) | 'scheduled' (cấu hình ca)
+    samples: int                 # số lượt khám thực tế đã quan sát
+    last_event_at: Optional[datetime] = None
+    generated_at: datetime
+    waiting: list[ShiftEtaItem]
+
+class AppointmentFacetsModel(BaseModel):
+    total: int                     # số lịch khớp toàn bộ bộ lọc
+    status: Dict[str, int]         # "1" -> n, "2" -> n ... (đã áp lựa chọn pay_status)
+    pay_status: Dict[str, int]     # PAID/AWAITING/PENDING/PARTIALLY/UNPAID -> n (đã áp lựa chọn status)
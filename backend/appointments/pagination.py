@@ -0,0 +1,59 @@
+"""
+Keyset (cursor) pagination cho các danh sách lịch hẹn.
+
+Cursor là token mờ (base64url của [effective_time, id]) của dòng cuối trang
+trước. Trang kế tiếp lấy các dòng có (effective_time, id) nhỏ hơn, đi thẳng
+trên index (…, effective_time, id) thay vì LIMIT/OFFSET quét rồi bỏ.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_time: datetime, row_id: int) -> str:
+    raw = json.dumps([sort_time.isoformat(), int(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Tuple[datetime, int]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        sort_time, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(sort_time), int(row_id)
+    except Exception:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "cursor không hợp lệ")
+
+
+def keyset_clause(token: str, time_col: str = "a.effective_time", id_col: str = "a.id") -> Tuple[str, list]:
+    """Điều kiện WHERE cho trang sau cursor (thứ tự DESC, DESC)."""
+    sort_time, row_id = decode_cursor(token)
+    return (
+        f"({time_col} < %s OR ({time_col} = %s AND {id_col} < %s))",
+        [sort_time, sort_time, row_id],
+    )
+
+
+def paginate(
+    rows: List[Dict[str, Any]],
+    limit: int,
+    *,
+    id_key: str,
+    time_key: str = "effective_time",
+    strip: bool = True,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    rows được lấy với LIMIT limit+1. Cắt về `limit`, trả kèm cursor trang sau
+    (None nếu hết) và bỏ cột sắp xếp nội bộ khỏi kết quả (strip=False để giữ).
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows and rows[-1].get(time_key) is not None:
+        next_cursor = encode_cursor(rows[-1][time_key], rows[-1][id_key])
+    if strip:
+        for r in rows:
+            r.pop(time_key, None)
+    return rows, next_cursor
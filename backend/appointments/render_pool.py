@@ -0,0 +1,218 @@
+"""
+Process pool render phiếu khám (ReportLab/PIL chạy ngoài GIL của process web).
+
+Mọi lần render phiếu (in lẻ PDF / ESC/POS / PNG và in hàng loạt) đi qua 1
+pool riêng có giới hạn: tối đa RENDER_POOL_SIZE việc chạy song song +
+RENDER_QUEUE_MAX việc chờ. Khi đầy, request nhận 503 kèm Retry-After (ước
+lượng từ thời gian render trung bình) thay vì xếp hàng vô hạn và giữ
+thread của threadpool mặc định.
+
+In hàng loạt: danh sách dòng dữ liệu được chia thành các chunk, mỗi worker
+render 1 chunk thành 1 PDF nhiều trang (dùng chung form tĩnh trong chunk),
+process chính ghép các chunk theo đúng thứ tự bằng pypdf.
+
+Cấu hình qua biến môi trường:
+    RENDER_POOL_SIZE        số process render (mặc định min(4, số CPU))
+    RENDER_QUEUE_MAX        số việc được chờ ngoài số đang chạy (mặc định 4 x pool)
+    RENDER_TIMEOUT          giây tối đa chờ 1 lần render (mặc định 30)
+    RENDER_CHUNK_SIZE       số phiếu mỗi chunk khi in hàng loạt (mặc định 25)
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+from backend.metrics.controllers import metrics
+
+
+def _env_int(key: str, default: int) -> int:
+    try:
+        return max(int(os.getenv(key, default)), 1)
+    except ValueError:
+        return default
+
+
+POOL_SIZE = _env_int("RENDER_POOL_SIZE", min(4, os.cpu_count() or 1))
+QUEUE_MAX = _env_int("RENDER_QUEUE_MAX", 4 * POOL_SIZE)
+TIMEOUT = _env_int("RENDER_TIMEOUT", 30)
+CHUNK_SIZE = _env_int("RENDER_CHUNK_SIZE", 25)
+
+metrics.describe("ticket_render_seconds", "Thời gian render phiếu khám (tính cả chờ trong pool)")
+metrics.describe("ticket_render_queue_depth", "Số việc render đang chạy + chờ trong pool")
+metrics.describe("ticket_render_total", "Kết quả các lần render phiếu khám")
+
+
+# ---------- chạy trong worker ----------
+def _warm_worker() -> None:
+    from backend.appointments.ticket_render import get_ticket_template
+    get_ticket_template()
+
+
+def render_ticket_chunk(rows: Sequence[Dict[str, Any]]) -> bytes:
+    """Render nhiều phiếu vào 1 PDF, mỗi phiếu 1 trang, form tĩnh định nghĩa 1 lần."""
+    from reportlab.pdfgen import canvas
+    from backend.appointments.ticket_render import get_ticket_template
+    tpl = get_ticket_template()
+    buf = BytesIO()
+    cv = canvas.Canvas(buf, pagesize=tpl.page_size)
+    for row in rows:
+        tpl.draw_page(cv, row)
+        cv.showPage()
+    cv.save()
+    return buf.getvalue()
+
+
+# ---------- process chính ----------
+class RenderPool:
+    def __init__(self, size: int = POOL_SIZE, queue_max: int = QUEUE_MAX):
+        self.size = size
+        self.limit = size + queue_max
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight = 0
+        self._avg_seconds = 0.5          # EWMA thời gian 1 việc, dùng cho Retry-After
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # gọi khi đang giữ lock
+        if self._executor is None:
+            # spawn: không kế thừa socket DB / thread của process web
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+            )
+        return self._executor
+
+    def _retry_after(self) -> int:
+        return max(math.ceil(self._avg_seconds * self._inflight / self.size), 1)
+
+    def _done(self, started: float, kind: str, fut: Future) -> None:
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._inflight -= 1
+            depth = self._inflight
+            if not fut.cancelled() and fut.exception() is None:
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * elapsed
+        metrics.set("ticket_render_queue_depth", depth)
+        metrics.observe("ticket_render_seconds", elapsed, kind=kind)
+
+    def submit_many(self, fn: Callable, args_list: Sequence[tuple], kind: str) -> List[Future]:
+        """
+        Nhận cả nhóm việc hoặc không nhận việc nào (503 Retry-After khi pool
+        không còn đủ chỗ).
+        """
+        n = len(args_list)
+        with self._lock:
+            if self._inflight + n > self.limit:
+                retry = self._retry_after()
+                metrics.inc("ticket_render_total", kind=kind, result="rejected")
+                raise HTTPException(
+                    status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail={"message": "Máy chủ đang bận in phiếu, vui lòng thử lại sau", "retry_after": retry},
+                    headers={"Retry-After": str(retry)},
+                )
+            executor = self._get_executor()
+            self._inflight += n
+            depth = self._inflight
+        metrics.set("ticket_render_queue_depth", depth)
+
+        started = time.monotonic()
+        futures: List[Future] = []
+        for i, args in enumerate(args_list):
+            try:
+                fut = executor.submit(fn, *args)
+            except (BrokenProcessPool, RuntimeError):
+                with self._lock:
+                    self._inflight -= n - i
+                self._reset(executor)
+                for f in futures:
+                    f.cancel()
+                raise self._unavailable(kind)
+            fut.add_done_callback(lambda f: self._done(started, kind, f))
+            futures.append(fut)
+        return futures
+
+    def run(self, fn: Callable, *args, kind: str = "pdf") -> Any:
+        return self.gather(self.submit_many(fn, [args], kind), kind)[0]
+
+    def map(self, fn: Callable, items: Sequence[Any], kind: str) -> List[Any]:
+        return self.gather(self.submit_many(fn, [(it,) for it in items], kind), kind)
+
+    def gather(self, futures: List[Future], kind: str) -> List[Any]:
+        deadline = time.monotonic() + TIMEOUT
+        try:
+            out = [f.result(timeout=max(deadline - time.monotonic(), 0)) for f in futures]
+        except FutureTimeout:
+            for f in futures:
+                f.cancel()
+            metrics.inc("ticket_render_total", kind=kind, result="timeout")
+            raise HTTPException(status.HTTP_504_GATEWAY_TIMEOUT, "In phiếu quá thời gian, vui lòng thử lại")
+        except BrokenProcessPool:
+            self._reset()
+            raise self._unavailable(kind)
+        metrics.inc("ticket_render_total", kind=kind, result="ok")
+        return out
+
+    def _unavailable(self, kind: str) -> HTTPException:
+        metrics.inc("ticket_render_total", kind=kind, result="broken")
+        return HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail={"message": "Tiến trình in phiếu đang khởi động lại, vui lòng thử lại", "retry_after": 1},
+            headers={"Retry-After": "1"},
+        )
+
+    def _reset(self, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        # worker chết (OOM, segfault...) -> bỏ pool hỏng, lần sau tạo lại
+        with self._lock:
+            if self._executor is not None and (executor is None or self._executor is executor):
+                broken, self._executor = self._executor, None
+            else:
+                broken = None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def warm(self) -> None:
+        """Spawn đủ worker (mỗi worker tự dựng template) trước request in đầu tiên."""
+        with self._lock:
+            executor = self._get_executor()
+        for f in [executor.submit(_warm_worker) for _ in range(self.size)]:
+            f.result(timeout=TIMEOUT)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+render_pool = RenderPool()
+
+def shutdown_render_pool() -> None:
+    render_pool.shutdown()
+
+
+def merge_pdfs(parts: List[bytes]) -> bytes:
+    if len(parts) == 1:
+        return parts[0]
+    from pypdf import PdfReader, PdfWriter
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(PdfReader(BytesIO(part)))
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def render_tickets_batch(rows: List[Dict[str, Any]]) -> bytes:
+    """Render song song theo chunk rồi ghép thành 1 PDF (giữ thứ tự rows)."""
+    # tối đa 1 chunk / worker -> lô lớn không bao giờ vượt giới hạn hàng chờ của pool
+    size = max(CHUNK_SIZE, math.ceil(len(rows) / render_pool.size))
+    chunks = [rows[i:i + size] for i in range(0, len(rows), size)]
+    return merge_pdfs(render_pool.map(render_ticket_chunk, chunks, kind="batch"))
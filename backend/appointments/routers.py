@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, status, Query, Path, HTTPException, Response
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
-from typing import Annotated, List
+from fastapi import APIRouter, Depends, status, Query, Path, HTTPException, Response, Header
+from fastapi.responses import StreamingResponse
+from typing import Annotated, List, Literal, Optional
+from backend.common.responses import FastJSONResponse
 from backend.auth.providers.auth_providers import AuthProvider
 from backend.auth.providers.partient_provider import PatientProvider
 from backend.appointments.models import (
@@ -13,6 +13,14 @@ from backend.appointments.models import (
     AppointmentPatientItem,
     AppointmentPaymentFilterModel,
     AppointmentAdminPaymentItem,
+    QueueJoinRequestModel,
+    QueueTicketResponseModel,
+    ShiftEtaResponseModel,
+    DoctorAppointmentFilterModel,
+    AppointmentExportFilterModel,
+    TicketBatchRequestModel,
+    CheckInRequestModel,
+    CheckInResponseModel,
 )
 from backend.appointments.controllers import (
     book_by_shift_online,
@@ -22,23 +30,59 @@ from backend.appointments.controllers import (
     update_appointment_status_by_doctor,
     get_my_appointments_of_doctor_user,
     list_patient_appointments_by_payment,
-    generate_visit_ticket_pdf,
+    generate_visit_ticket,
     list_all_appointments_by_payment_admin,
+    get_shift_eta,
+    export_admin_payment_csv,
+    export_admin_payment_xlsx,
+    generate_visit_tickets_batch,
+    check_in_by_qr,
 )
+from backend.appointments.admission import admission
 
 router = APIRouter(prefix="/appointments", tags=["Appointments"])
 auth_handler = AuthProvider()
 patient_handler = PatientProvider()
 
+
+def _page_response(items, next_cursor, facets=None) -> FastJSONResponse:
+    # Body giữ nguyên dạng list; cursor trang sau đi qua header.
+    # Khi with_facets=true: {"items": [...], "facets": {...}}
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    content = items if facets is None else {"items": items, "facets": facets}
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=content, headers=headers)
+
+# API: Lấy queue token vào phòng chờ ảo trước khi đặt lịch (giờ cao điểm)
+@router.post("/queue/join", response_model=QueueTicketResponseModel)
+def api_queue_join(
+    data: QueueJoinRequestModel,
+    current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
+):
+    res = admission.join(data.clinic_id, current_user["id"])
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=res)
+
+
+# API: Xem vị trí / ETA của queue token
+@router.get("/queue/{queue_token}", response_model=QueueTicketResponseModel)
+def api_queue_status(
+    queue_token: str,
+    current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
+):
+    res = admission.status(queue_token, current_user["id"])
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=res)
+
+
 # API: Đặt lịch khám online (bệnh nhân) - sử dụng lịch theo ca, có thể chọn BHYT
 @router.post("/book-online", response_model=AppointmentResponseModel)
 def api_book_by_shift_online(
     data: BookByShiftRequestModel,
     has_insurances: bool = Query(False, description="BHYT: true/false"),
+    x_queue_token: Optional[str] = Header(None, description="Token từ /appointments/queue/join"),
     current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
 ):
+    admission.admit(data.clinic_id, current_user["id"], x_queue_token)
     detail = book_by_shift_online(current_user["id"], data, has_insurances)
-    return JSONResponse(status_code=status.HTTP_201_CREATED, content=jsonable_encoder(detail))
+    return FastJSONResponse(status_code=status.HTTP_201_CREATED, content=detail)
 
 
 # API: Đặt lịch khám offline (bệnh nhân) - sử dụng lịch theo ca, có thể chọn BHYT
@@ -46,10 +90,12 @@ def api_book_by_shift_online(
 def api_book_by_shift_offline(
     data: BookByShiftRequestModel,
     has_insurances: bool = Query(False, description="BHYT: true/false"),
+    x_queue_token: Optional[str] = Header(None, description="Token từ /appointments/queue/join"),
     current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
 ):
+    admission.admit(data.clinic_id, current_user["id"], x_queue_token)
     detail = book_by_shift_offline(current_user["id"], data, has_insurances)
-    return JSONResponse(status_code=status.HTTP_201_CREATED, content=jsonable_encoder(detail))
+    return FastJSONResponse(status_code=status.HTTP_201_CREATED, content=detail)
 
 
 # API: Lấy danh sách lịch hẹn của chính bệnh nhân đang đăng nhập
@@ -58,8 +104,8 @@ def api_get_my_appointments(
     filters: AppointmentFilterModel = Depends(),
     current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
 ):
-    items = get_my_appointments(current_user["id"], filters)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(items))
+    items, next_cursor, facets = get_my_appointments(current_user["id"], filters)
+    return _page_response(items, next_cursor, facets)
 
 
 # API: Lấy danh sách lịch hẹn của bệnh nhân theo trạng thái thanh toán
@@ -68,13 +114,14 @@ def api_patient_my_appointments_payment(
     filters: AppointmentPaymentFilterModel = Depends(),
     current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
 ):
-    data = list_patient_appointments_by_payment(current_user["id"], filters)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    data, next_cursor, facets = list_patient_appointments_by_payment(current_user["id"], filters)
+    return _page_response(data, next_cursor, facets)
 
 
 # API: Lấy danh sách lịch hẹn của bác sĩ đang đăng nhập
 @router.get("/doctor/me")
 def api_get_my_appointments_for_doctor(
+    filters: DoctorAppointmentFilterModel = Depends(),
     current_user = Depends(auth_handler.get_current_doctor_user)
 ):
     user_id = current_user.get("user_id", current_user.get("id")) if isinstance(current_user, dict) \
@@ -82,8 +129,8 @@ def api_get_my_appointments_for_doctor(
     if not user_id:
         raise HTTPException(status_code=401, detail="Token thiếu user_id")
 
-    data = get_my_appointments_of_doctor_user(int(user_id))
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    data, next_cursor, facets = get_my_appointments_of_doctor_user(int(user_id), filters)
+    return _page_response(data, next_cursor, facets)
 
 
 # API: Bác sĩ cập nhật trạng thái lịch hẹn (confirmed, completed, cancelled, ...)
@@ -99,7 +146,7 @@ def api_update_status_by_doctor(
         raise HTTPException(status_code=401, detail="Token thiếu user_id")
 
     res = update_appointment_status_by_doctor(int(user_id), appointment_id, payload.status)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(res))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=res)
 
 
 # API: Admin lấy danh sách tất cả lịch hẹn theo trạng thái thanh toán
@@ -108,8 +155,64 @@ def api_admin_list_appointments_by_payment(
     filters: AppointmentPaymentFilterModel = Depends(),
     current_admin = Depends(auth_handler.get_current_admin_user),
 ):
-    data = list_all_appointments_by_payment_admin(filters)
-    return JSONResponse(status_code=200, content=jsonable_encoder(data))
+    data, next_cursor, facets = list_all_appointments_by_payment_admin(filters)
+    return _page_response(data, next_cursor, facets)
+
+
+# API: ETA trực tiếp cho các lịch còn chờ trong 1 ca (kiosk / điện thoại poll nhẹ)
+@router.get("/eta/{schedule_id}", response_model=ShiftEtaResponseModel)
+def api_shift_eta(schedule_id: int = Path(..., ge=1)):
+    data = get_shift_eta(schedule_id)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
+
+
+# API: Admin xuất toàn bộ lịch hẹn + thanh toán (CSV/XLSX, stream, cùng bộ lọc)
+@router.get("/admin/payment/export")
+def api_admin_export_appointments_by_payment(
+    filters: AppointmentExportFilterModel = Depends(),
+    current_admin = Depends(auth_handler.get_current_admin_user),
+):
+    if filters.format == "xlsx":
+        body = export_admin_payment_xlsx(filters)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        body = export_admin_payment_csv(filters)
+        media_type = "text/csv; charset=utf-8"
+    filename = f"lich_hen_thanh_toan.{filters.format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# API: Quầy tiếp đón quét QR trên phiếu để check-in (xác thực chữ ký, không join)
+@router.post("/check-in", response_model=CheckInResponseModel)
+def api_check_in(
+    req: CheckInRequestModel,
+    current_admin = Depends(auth_handler.get_current_admin_user),
+):
+    data = check_in_by_qr(req.qr)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
+
+
+# API: Admin/quầy tiếp đón in lại nhiều phiếu khám trong 1 file PDF
+@router.post("/admin/print-tickets", response_class=StreamingResponse)
+def api_admin_print_tickets(
+    req: TicketBatchRequestModel,
+    current_admin = Depends(auth_handler.get_current_admin_user),
+):
+    body, filename, count = generate_visit_tickets_batch(req)
+    chunk = 64 * 1024
+    return StreamingResponse(
+        iter([body[i:i + chunk] for i in range(0, len(body), chunk)]),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f'inline; filename="{filename}"',
+            "Content-Length": str(len(body)),
+            "X-Ticket-Count": str(count),
+        },
+    )
 
 
 # API: Bệnh nhân hủy lịch hẹn của chính mình
@@ -119,18 +222,20 @@ def api_cancel_my_appointment(
     current_user: Annotated[dict, Depends(patient_handler.get_current_patient_user)] = None,
 ):
     res = cancel_my_appointment(appointment_id, current_user["id"])
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(res))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=res)
 
 
-# API: Bệnh nhân in phiếu khám (xuất file PDF cho lịch hẹn)
+# API: Bệnh nhân in phiếu khám (PDF A4 hoặc khổ máy in nhiệt 58/80mm cho kiosk)
 @router.get("/{appointment_id}/print-ticket", response_class=Response)
 def api_print_ticket_pdf(
     appointment_id: int,
+    format: Literal["pdf", "escpos", "png"] = Query("pdf", description="pdf | escpos (ESC/POS) | png (raster 1-bit)"),
+    width: int = Query(80, description="Khổ giấy máy in nhiệt: 58 | 80 (mm), bỏ qua với pdf"),
     current_user = Depends(patient_handler.get_current_patient_user),
 ):
-    pdf_bytes, filename = generate_visit_ticket_pdf(appointment_id, current_user["id"])
+    body, filename, media_type = generate_visit_ticket(appointment_id, current_user["id"], format, width)
     return Response(
-        content=pdf_bytes,
-        media_type="application/pdf",
+        content=body,
+        media_type=media_type,
         headers={"Content-Disposition": f'inline; filename="{filename}"'}
     )
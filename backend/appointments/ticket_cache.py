@@ -0,0 +1,150 @@
+"""
+Cache phiếu khám đã render (content-addressed, 2 tầng).
+
+Phiếu của lịch đã thanh toán chỉ phụ thuộc vào vài trường (id lịch, mã đơn,
+paid_at, giờ khám dự kiến, STT...) -> key = sha256 của các trường đó + phiên
+bản layout. In lại / kiosk retry lấy thẳng bytes từ cache, không join,
+không sinh QR, không vẽ canvas.
+
+- Tầng bộ nhớ: LRU giới hạn theo tổng byte (TICKET_CACHE_MEM_BYTES).
+- Tầng đĩa: 1 file/key trong TICKET_CACHE_DIR, LRU theo mtime (chạm mtime
+  khi hit), dọn về ~90% khi vượt TICKET_CACHE_DISK_BYTES. Ghi qua file tạm +
+  os.replace nên nhiều worker dùng chung thư mục vẫn an toàn.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+from backend.metrics.controllers import metrics
+
+MEM_BYTES = int(os.getenv("TICKET_CACHE_MEM_BYTES", str(32 * 1024 * 1024)))
+DISK_BYTES = int(os.getenv("TICKET_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+CACHE_DIR = Path(os.getenv("TICKET_CACHE_DIR", Path(tempfile.gettempdir()) / "cay_kios_tickets"))
+
+metrics.describe("ticket_cache_total", "Kết quả tra cache phiếu khám theo tầng")
+
+
+def _part(v: Any) -> str:
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return "" if v is None else str(v)
+
+
+class TicketCache:
+    def __init__(self, directory: Path = CACHE_DIR, mem_bytes: int = MEM_BYTES, disk_bytes: int = DISK_BYTES):
+        self.dir = Path(directory)
+        self.mem_bytes = mem_bytes
+        self.disk_bytes = disk_bytes
+        self._lock = threading.Lock()
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_size = 0
+        self._disk_size: Optional[int] = None    # tính lười lần đầu ghi
+
+    @staticmethod
+    def key(*parts: Any) -> str:
+        return hashlib.sha256("|".join(_part(p) for p in parts).encode()).hexdigest()
+
+    # ---------- tầng bộ nhớ ----------
+    def _mem_put(self, key: str, data: bytes) -> None:
+        if len(data) > self.mem_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_size -= len(old)
+            self._mem[key] = data
+            self._mem_size += len(data)
+            while self._mem_size > self.mem_bytes:
+                _, ev = self._mem.popitem(last=False)
+                self._mem_size -= len(ev)
+
+    # ---------- tầng đĩa ----------
+    def _path(self, key: str) -> Path:
+        return self.dir / key[:2] / f"{key}.bin"
+
+    def _scan_disk(self) -> int:
+        total = 0
+        if self.dir.exists():
+            for f in self.dir.rglob("*.bin"):
+                try:
+                    total += f.stat().st_size
+                except OSError:
+                    pass
+        return total
+
+    def _evict_disk(self) -> None:
+        files = []
+        for f in self.dir.rglob("*.bin"):
+            try:
+                st = f.stat()
+                files.append((st.st_mtime, st.st_size, f))
+            except OSError:
+                pass
+        files.sort()
+        total = sum(s for _, s, _ in files)
+        target = int(self.disk_bytes * 0.9)
+        for _, size, f in files:
+            if total <= target:
+                break
+            try:
+                f.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._disk_size = total
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_size is None:
+                self._disk_size = self._scan_disk()
+            else:
+                self._disk_size += len(data)
+            if self._disk_size > self.disk_bytes:
+                self._evict_disk()
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)      # LRU: chạm mtime khi hit
+            return data
+        except OSError:
+            return None
+
+    # ---------- API ----------
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+        if data is not None:
+            metrics.inc("ticket_cache_total", tier="memory", result="hit")
+            return data
+        data = self._disk_get(key)
+        if data is not None:
+            metrics.inc("ticket_cache_total", tier="disk", result="hit")
+            self._mem_put(key, data)
+            return data
+        metrics.inc("ticket_cache_total", tier="all", result="miss")
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        self._mem_put(key, data)
+        self._disk_put(key, data)
+
+
+ticket_cache = TicketCache()
@@ -0,0 +1,357 @@
+"""
+Render phiếu khám: template tĩnh + lớp phủ động.
+
+Mọi phần không đổi giữa các phiếu (khung thẻ bo góc, tiêu đề mục, nhãn,
+chip "ĐÃ THANH TOÁN", hướng dẫn) được tính toạ độ/đo bề rộng chữ MỘT lần
+khi dựng TicketTemplate (lúc khởi động) và vẽ vào 1 form XObject
+("ticket_static"). Mỗi phiếu chỉ còn doForm(...) + vẽ giá trị bệnh nhân /
+lịch khám + QR ở các vị trí đã tính sẵn.
+
+ReportLab không cho dùng lại form giữa 2 document -> form được định nghĩa
+1 lần cho mỗi canvas; trong PDF nhiều trang (in hàng loạt) mọi trang dùng
+chung 1 form.
+
+QR vẽ trực tiếp bằng các hình chữ nhật vector (không qua PIL -> PNG ->
+ImageReader); ma trận QR theo payload được giữ trong LRU nhỏ vì cùng 1 phiếu
+thường được in/xem lại nhiều lần.
+
+Stream PDF ghi dạng nhị phân (tắt ASCII85): bản Python thuần của bộ mã hoá
+A85 chiếm phần lớn thời gian save() và làm file to thêm ~25%.
+"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import qrcode
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from backend.appointments.checkin import sign_checkin_payload
+
+UI = {
+    "title":        colors.HexColor("#0F172A"),
+    "muted":        colors.HexColor("#64748B"),
+    "patient_bg":   colors.HexColor("#EAF2FF"),
+    "patient_bd":   colors.HexColor("#D6E3FF"),
+    "exam_bg":      colors.HexColor("#F0FAF4"),
+    "exam_bd":      colors.HexColor("#CDE7D6"),
+    "chip_bg":      colors.HexColor("#E8F5E9"),
+    "chip_bd":      colors.HexColor("#43A047"),
+    "chip_txt":     colors.HexColor("#2E7D32"),
+    "price":        colors.HexColor("#16A34A"),
+    "danger":       colors.HexColor("#EF4444"),
+    "hint_bg":      colors.HexColor("#FFF7D6"),
+    "hint_bd":      colors.HexColor("#FDE68A"),
+    "icon_green":   colors.HexColor("#10B981"),
+}
+
+FORM_NAME = "ticket_static"
+FONTS_DIR = Path(__file__).resolve().parents[1] / "fonts"
+
+rl_config.useA85 = 0
+
+# fonts
+_FONTS_REGISTERED = False
+_fonts_lock = threading.Lock()
+def _ensure_fonts():
+    global _FONTS_REGISTERED
+    if _FONTS_REGISTERED: return
+    with _fonts_lock:
+        if _FONTS_REGISTERED: return
+        pdfmetrics.registerFont(TTFont("DejaVu",      str(FONTS_DIR / "DejaVuSans.ttf")))
+        pdfmetrics.registerFont(TTFont("DejaVu-Bold", str(FONTS_DIR / "DejaVuSans-Bold.ttf")))
+        _FONTS_REGISTERED = True
+
+# helpers
+def _fmt_vnd(n: int | float) -> str:
+    try: n = int(n)
+    except: return str(n)
+    return f"{n:,}".replace(",", ".") + " ₫"
+
+def _fmt_time(v: Any) -> str:
+    return v.strftime("%H:%M %d/%m/%Y") if isinstance(v, datetime) else "-"
+
+# QR: ma trận (không viền) -> các đoạn module tối liên tiếp trên từng hàng
+QR_CACHE_SIZE = 512
+QrRuns = Tuple[int, Tuple[Tuple[int, int, int], ...]]   # (số module/cạnh, ((hàng, cột, dài), ...))
+
+_qr_cache: "OrderedDict[str, QrRuns]" = OrderedDict()
+_qr_cache_lock = threading.Lock()
+
+def qr_runs(payload: str) -> QrRuns:
+    with _qr_cache_lock:
+        hit = _qr_cache.get(payload)
+        if hit is not None:
+            _qr_cache.move_to_end(payload)
+            return hit
+
+    qr = qrcode.QRCode(border=0, error_correction=qrcode.constants.ERROR_CORRECT_M)
+    qr.add_data(payload)
+    matrix = qr.get_matrix()
+    runs = []
+    for r, row in enumerate(matrix):
+        c, n = 0, len(row)
+        while c < n:
+            if row[c]:
+                start = c
+                while c < n and row[c]:
+                    c += 1
+                runs.append((r, start, c - start))
+            else:
+                c += 1
+    result: QrRuns = (len(matrix), tuple(runs))
+
+    with _qr_cache_lock:
+        _qr_cache[payload] = result
+        while len(_qr_cache) > QR_CACHE_SIZE:
+            _qr_cache.popitem(last=False)
+    return result
+
+def draw_qr(cv, payload: str, x: float, y: float, size: float, border: int = 4) -> None:
+    """Vẽ QR vuông cạnh `size` tại (x, y) = góc dưới trái; 1 path, tô 1 lần."""
+    n, runs = qr_runs(payload)
+    m = size / (n + 2 * border)
+    top = y + size - border * m
+    left = x + border * m
+    p = cv.beginPath()
+    for r, c, length in runs:
+        p.rect(left + c * m, top - (r + 1) * m, length * m, m)
+    cv.setFillColor(colors.black)
+    cv.drawPath(p, stroke=0, fill=1)
+
+VN_TZ = timezone(timedelta(hours=7))
+
+def _checkin_day(data: Dict[str, Any]) -> datetime:
+    # lịch chưa có giờ dự kiến -> lấy ngày thanh toán / ngày đặt, cuối cùng là hôm nay
+    for key in ("estimated_time", "paid_at", "created_at"):
+        v = data.get(key)
+        if isinstance(v, datetime):
+            return v
+    return datetime.now(VN_TZ).replace(tzinfo=None)
+
+def ticket_qr_payload(data: Dict[str, Any]) -> str:
+    # mã check-in có ký HMAC: quầy xác thực trong bộ nhớ, không cần join DB
+    return sign_checkin_payload(data["id"], _checkin_day(data))
+
+
+@dataclass(frozen=True)
+class _Text:
+    x: float
+    y: float
+    text: str
+    font: str
+    size: int
+    color: Any
+    centred: bool = False
+
+@dataclass(frozen=True)
+class _Card:
+    x: float
+    y_top: float
+    w: float
+    h: float
+    r: float
+    fill: Any
+    stroke: Any
+
+@dataclass(frozen=True)
+class _Field:
+    x: float
+    y: float
+    font: str
+    color: Any
+    size: int = 10
+
+
+class TicketTemplate:
+    """Hình học phiếu A4 tính 1 lần: phần tĩnh + vị trí các ô giá trị."""
+
+    def __init__(self):
+        _ensure_fonts()
+        self.page_size = A4
+        self.cards: List[_Card] = []
+        self.dots: List[Tuple[float, float, float, Any]] = []
+        self.texts: List[_Text] = []
+        self.fields: Dict[str, _Field] = {}
+
+        w, h = A4
+        margin = 16*mm
+        content_w = w - 2*margin
+        y = h - margin
+        row = 6*mm
+        inner = 9*mm
+
+        # Title
+        self.texts.append(_Text(w/2, y, "Hoàn Thành Đăng Ký", "DejaVu-Bold", 18, UI["title"], centred=True))
+        y -= 7*mm
+        self.texts.append(_Text(w/2, y, "Kiểm tra thông tin và in phiếu khám", "DejaVu", 11, UI["muted"], centred=True))
+        y -= 10*mm
+
+        # Card patient
+        card1_h = 42*mm
+        self.cards.append(_Card(margin, y, content_w, card1_h, 8, UI["patient_bg"], UI["patient_bd"]))
+        x = margin + inner
+        y1 = y - inner
+        self._section_header(x, y1, "Thông Tin Bệnh Nhân", UI["icon_green"])
+        y1 -= 9*mm
+
+        col_w = (content_w - 2*inner) / 2
+        label_w = 24*mm
+        self._pair("patient_name", x, y1,         "Họ tên:",    label_w, value_bold=True)
+        self._pair("dob",          x, y1 - row,   "Ngày sinh:", label_w)
+        self._pair("phone",        x, y1 - 2*row, "SĐT:",       label_w)
+        x2 = x + col_w
+        self._pair("national_id",  x2, y1,        "CCCD:",      label_w)
+        self._pair("gender",       x2, y1 - row,  "Giới tính:", label_w)
+
+        y = y - card1_h - 7*mm
+
+        # Card exam
+        card2_h = 58*mm
+        self.cards.append(_Card(margin, y, content_w, card2_h, 8, UI["exam_bg"], UI["exam_bd"]))
+        x = margin + inner
+        y2 = y - inner
+        self._section_header(x, y2, "Thông Tin Khám", UI["icon_green"])
+        y2 -= 9*mm
+
+        label_w = 26*mm
+        self._pair("service_name", x, y2,         "Dịch vụ:", label_w)
+        self._pair("doctor_name",  x, y2 - row,   "Bác sĩ:",  label_w)
+        self._pair("price",        x, y2 - 2*row, "Giá:",     label_w, value_bold=True, value_color=UI["price"])
+        x2 = x + col_w
+        self._pair("clinic_name",  x2, y2,        "Phòng:",          label_w)
+        self._pair("queue_number", x2, y2 - row,  "Số thứ tự:",      label_w, value_bold=True)
+        self._pair("estimated",    x2, y2 - 2*row, "Thời gian khám:", label_w, value_bold=True, value_color=UI["danger"])
+
+        # chip + thời gian thanh toán
+        chip_w, chip_h = 36*mm, 8*mm
+        chip_x = x; chip_y_top = y2 - 3*row + 2
+        self.cards.append(_Card(chip_x, chip_y_top, chip_w, chip_h, 3, UI["chip_bg"], UI["chip_bd"]))
+        self.texts.append(_Text(chip_x + chip_w/2, chip_y_top - chip_h/2 + 3, "ĐÃ THANH TOÁN",
+                                "DejaVu-Bold", 9, UI["chip_txt"], centred=True))
+        self._pair("paid_at", x2, y2 - 3*row, "Thời gian thanh toán:", label_w)
+
+        y = y - card2_h - 8*mm
+
+        # QR
+        qr_size = 48*mm
+        self.qr = ((w - qr_size)/2, y - qr_size, qr_size)
+        y -= (qr_size + 7*mm)
+        self.texts.append(_Text(w/2, y, "Mã QR dùng để check-in tại quầy", "DejaVu", 9, UI["muted"], centred=True))
+        y -= 10*mm
+
+        # Hint
+        hint_h = 28*mm
+        self.cards.append(_Card(margin, y, content_w, hint_h, 6, UI["hint_bg"], UI["hint_bd"]))
+        self.texts.append(_Text(margin + 9*mm, y - 9, "Hướng dẫn:", "DejaVu-Bold", 10, UI["title"]))
+        for t in [
+            "Vui lòng mang theo phiếu khám tới quầy/triển khai tự động.",
+            "Nếu dùng BHYT, nhớ mang thẻ và giấy tờ liên quan.",
+            "Mọi thắc mắc vui lòng liên hệ quầy hướng dẫn.",
+        ]:
+            y -= 5*mm
+            self.texts.append(_Text(margin + 12*mm, y, f"• {t}", "DejaVu", 9, UI["title"]))
+
+    # ---------- dựng layout ----------
+    def _section_header(self, x, y, text, dot_color):
+        self.dots.append((x + 2.2*mm, y - 2.6*mm, 1.6*mm, dot_color))
+        self.texts.append(_Text(x + 6*mm, y, text, "DejaVu-Bold", 12, UI["title"]))
+
+    def _pair(self, name, x, y, label, label_w, *, value_bold=False, value_color=None):
+        """
+        Label & value đều căn trái. Giá trị bắt đầu tại:
+            x + max(label_w, measured(label)+gap)
+        -> tránh bị dính khi label dài.
+        """
+        lbl_font, lbl_size, gap = "DejaVu-Bold", 10, 2*mm
+        self.texts.append(_Text(x, y, label, lbl_font, lbl_size, UI["title"]))
+        measured = pdfmetrics.stringWidth(label, lbl_font, lbl_size)
+        self.fields[name] = _Field(
+            x + max(label_w, measured + gap), y,
+            "DejaVu-Bold" if value_bold else "DejaVu",
+            value_color or UI["title"],
+        )
+
+    # ---------- vẽ ----------
+    def _draw_static(self, cv) -> None:
+        for c in self.cards:
+            cv.setFillColor(c.fill); cv.setStrokeColor(c.stroke); cv.setLineWidth(1)
+            cv.roundRect(c.x, c.y_top - c.h, c.w, c.h, c.r, stroke=1, fill=1)
+        for cx, cy, r, color in self.dots:
+            cv.setFillColor(color); cv.circle(cx, cy, r, stroke=0, fill=1)
+        for t in self.texts:
+            cv.setFont(t.font, t.size); cv.setFillColor(t.color)
+            if t.centred:
+                cv.drawCentredString(t.x, t.y, t.text)
+            else:
+                cv.drawString(t.x, t.y, t.text)
+
+    def ensure_form(self, cv) -> None:
+        """Định nghĩa form tĩnh 1 lần cho canvas này."""
+        if getattr(cv, "_ticket_form_defined", False):
+            return
+        cv.beginForm(FORM_NAME)
+        self._draw_static(cv)
+        cv.endForm()
+        cv._ticket_form_defined = True
+
+    @staticmethod
+    def values(data: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "patient_name": data["patient_name"],
+            "dob":          data.get("dob") or "-",
+            "phone":        data.get("phone") or "-",
+            "national_id":  data.get("national_id") or "-",
+            "gender":       data.get("gender") or "-",
+            "service_name": data["service_name"],
+            "doctor_name":  data["doctor_name"],
+            "price":        _fmt_vnd(data["cur_price"]),
+            "clinic_name":  data["clinic_name"],
+            "queue_number": str(data.get("queue_number") or "-"),
+            "estimated":    _fmt_time(data.get("estimated_time")),
+            "paid_at":      _fmt_time(data.get("paid_at")),
+        }
+
+    def draw_page(self, cv, data: Dict[str, Any]) -> None:
+        """Vẽ 1 phiếu lên trang hiện tại: form tĩnh + giá trị + QR (chưa showPage)."""
+        self.ensure_form(cv)
+        cv.doForm(FORM_NAME)
+        for name, value in self.values(data).items():
+            f = self.fields[name]
+            cv.setFont(f.font, f.size); cv.setFillColor(f.color)
+            cv.drawString(f.x, f.y, str(value))
+        qx, qy, qs = self.qr
+        draw_qr(cv, ticket_qr_payload(data), qx, qy, qs)
+
+    def render_pdf(self, data: Dict[str, Any]) -> bytes:
+        buf = BytesIO()
+        cv = canvas.Canvas(buf, pagesize=self.page_size)
+        self.draw_page(cv, data)
+        cv.setTitle(f"PhieuKham-{data['id']}")
+        cv.showPage(); cv.save()
+        pdf_bytes = buf.getvalue(); buf.close()
+        return pdf_bytes
+
+
+_template: Optional[TicketTemplate] = None
+_template_lock = threading.Lock()
+
+def get_ticket_template() -> TicketTemplate:
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = TicketTemplate()
+    return _template
+
+def render_visit_ticket_pdf(data: Dict[str, Any]) -> bytes:
+    return get_ticket_template().render_pdf(data)
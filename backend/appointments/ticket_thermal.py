@@ -0,0 +1,200 @@
+"""
+Phiếu khám cho máy in nhiệt 58/80 mm (kiosk), cùng dữ liệu với phiếu A4.
+
+- escpos: luồng lệnh ESC/POS; QR in bằng lệnh native (GS ( k, model 2) nên
+  máy in tự sinh mã, payload chỉ vài trăm byte. Chữ được bỏ dấu (ASCII) vì
+  code page tiếng Việt (CP1258) không thống nhất giữa các hãng máy in.
+- png:    ảnh raster 1-bit đúng bề ngang đầu in (203 dpi: 384 / 576 điểm),
+  giữ nguyên dấu tiếng Việt (font DejaVu), kiosk gửi thẳng ra máy in.
+"""
+import unicodedata
+from io import BytesIO
+from typing import Any, Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from backend.appointments.ticket_render import FONTS_DIR, TicketTemplate, qr_runs, ticket_qr_payload
+
+# khổ giấy (mm) -> (số điểm ngang @203dpi, số ký tự/dòng Font A, cỡ module QR)
+PAPER = {
+    58: (384, 32, 5),
+    80: (576, 48, 6),
+}
+
+ESC = b"\x1b"
+GS = b"\x1d"
+
+
+def _ascii(text: Any) -> str:
+    s = str(text).replace("đ", "d").replace("Đ", "D").replace("₫", "d")
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(c for c in s if not unicodedata.combining(c)).encode("ascii", "replace").decode()
+
+
+def _wrap(label: str, value: str, width: int) -> List[str]:
+    """'Label: value' gói dòng theo số ký tự, dòng sau thụt lề bằng label."""
+    first = f"{label} "
+    indent = " " * min(len(first), width // 2)
+    lines, cur = [], first
+    for word in value.split():
+        if len(cur) + len(word) > width and cur.strip():
+            lines.append(cur.rstrip())
+            cur = indent
+        cur += word + " "
+    lines.append(cur.rstrip())
+    return lines
+
+
+def _rows(data: Dict[str, Any]) -> Tuple[Dict[str, str], List[Tuple[str, str]]]:
+    v = TicketTemplate.values(data)
+    rows = [
+        ("Họ tên:", v["patient_name"]),
+        ("Ngày sinh:", v["dob"]),
+        ("CCCD:", v["national_id"]),
+        ("Dịch vụ:", v["service_name"]),
+        ("Phòng:", v["clinic_name"]),
+        ("Bác sĩ:", v["doctor_name"]),
+        ("Giá:", v["price"]),
+        ("Thanh toán:", v["paid_at"]),
+    ]
+    return v, rows
+
+
+# ============================================================
+# ESC/POS
+# ============================================================
+
+def _qr_escpos(payload: str, module: int) -> bytes:
+    data = payload.encode("ascii", "replace")
+    n = len(data) + 3
+    return b"".join([
+        GS + b"(k" + bytes([4, 0, 49, 65, 50, 0]),          # model 2
+        GS + b"(k" + bytes([3, 0, 49, 67, module]),         # cỡ module
+        GS + b"(k" + bytes([3, 0, 49, 69, 49]),             # mức sửa lỗi M
+        GS + b"(k" + bytes([n & 0xFF, n >> 8, 49, 80, 48]) + data,   # nạp dữ liệu
+        GS + b"(k" + bytes([3, 0, 49, 81, 48]),             # in
+    ])
+
+
+def render_escpos(data: Dict[str, Any], width_mm: int = 80) -> bytes:
+    _, cols, module = PAPER[width_mm]
+    v, rows = _rows(data)
+    out = bytearray()
+    line = lambda s="": out.extend(_ascii(s).encode("ascii") + b"\n")
+
+    out += ESC + b"@"                       # khởi tạo
+    out += ESC + b"a\x01"                   # căn giữa
+    out += GS + b"!\x11"; line("PHIEU KHAM"); out += GS + b"!\x00"
+    line(v["clinic_name"])
+    out += ESC + b"a\x00"
+    line("-" * cols)
+    for label, value in rows:
+        for ln in _wrap(_ascii(label), _ascii(value), cols):
+            line(ln)
+    line("-" * cols)
+
+    out += ESC + b"a\x01"
+    line("SO THU TU")
+    out += GS + b"!\x22"; line(v["queue_number"]); out += GS + b"!\x00"
+    out += ESC + b"E\x01"; line(f"Gio kham: {v['estimated']}"); out += ESC + b"E\x00"
+    line()
+    out += _qr_escpos(ticket_qr_payload(data), module)
+    line()
+    line("Ma QR dung de check-in tai quay")
+    out += ESC + b"a\x00"
+    out += ESC + b"d\x03"                   # đẩy giấy 3 dòng
+    out += GS + b"V\x42\x00"                # cắt giấy (partial)
+    return bytes(out)
+
+
+# ============================================================
+# PNG 1-bit
+# ============================================================
+
+_FONT_CACHE: Dict[Tuple[str, int], ImageFont.FreeTypeFont] = {}
+
+def _font(bold: bool, size: int) -> ImageFont.FreeTypeFont:
+    name = "DejaVuSans-Bold.ttf" if bold else "DejaVuSans.ttf"
+    key = (name, size)
+    if key not in _FONT_CACHE:
+        _FONT_CACHE[key] = ImageFont.truetype(str(FONTS_DIR / name), size)
+    return _FONT_CACHE[key]
+
+
+def _wrap_px(text: str, font, max_w: int) -> List[str]:
+    lines, cur = [], ""
+    for word in text.split():
+        trial = f"{cur} {word}".strip()
+        if cur and font.getlength(trial) > max_w:
+            lines.append(cur)
+            cur = word
+        else:
+            cur = trial
+    lines.append(cur)
+    return lines
+
+
+def render_png(data: Dict[str, Any], width_mm: int = 80) -> bytes:
+    dots, _, _ = PAPER[width_mm]
+    scale = dots / 576
+    pad = int(12 * scale)
+    body = _font(False, max(int(22 * scale), 14))
+    bold = _font(True, max(int(22 * scale), 14))
+    title = _font(True, int(34 * scale))
+    big = _font(True, int(72 * scale))
+    v, rows = _rows(data)
+
+    # (text, font, centred) - gói dòng trước để biết chiều cao ảnh
+    items: List[Tuple[str, Any, bool]] = [("PHIẾU KHÁM", title, True)]
+    items += [(ln, body, True) for ln in _wrap_px(v["clinic_name"], body, dots - 2 * pad)]
+    items.append(("-", None, False))
+    label_w = int(max(bold.getlength(label + " ") for label, _ in rows))
+    for label, value in rows:
+        for i, ln in enumerate(_wrap_px(value, body, dots - 2 * pad - label_w)):
+            items.append(((label if i == 0 else "", ln, label_w), body, False))
+    items.append(("-", None, False))
+    items.append(("SỐ THỨ TỰ", bold, True))
+    items.append((v["queue_number"], big, True))
+    items.append((f"Giờ khám: {v['estimated']}", bold, True))
+
+    n, runs = qr_runs(ticket_qr_payload(data))
+    border = 2
+    module = max(int((dots * 0.6) // (n + 2 * border)), 2)
+    qr_px = module * (n + 2 * border)
+
+    line_h = lambda f: int((f.size if f else body.size) * 1.35)
+    height = pad * 2 + sum(line_h(f) for _, f, _ in items) + qr_px + 2 * line_h(body)
+
+    img = Image.new("1", (dots, height), 1)
+    draw = ImageDraw.Draw(img)
+    y = pad
+    for text, font, centred in items:
+        if font is None:
+            draw.line((pad, y + line_h(body) // 2, dots - pad, y + line_h(body) // 2), fill=0, width=2)
+            y += line_h(body)
+            continue
+        if isinstance(text, tuple):
+            label, value, label_w = text
+            if label:
+                draw.text((pad, y), label, font=bold, fill=0)
+            draw.text((pad + label_w, y), value, font=font, fill=0)
+        elif centred:
+            draw.text(((dots - font.getlength(text)) / 2, y), text, font=font, fill=0)
+        else:
+            draw.text((pad, y), text, font=font, fill=0)
+        y += line_h(font)
+
+    x0 = (dots - qr_px) // 2 + border * module
+    y0 = y + border * module
+    for r, c, length in runs:
+        draw.rectangle(
+            (x0 + c * module, y0 + r * module, x0 + (c + length) * module - 1, y0 + (r + 1) * module - 1),
+            fill=0,
+        )
+    y += qr_px
+    cap = "Mã QR dùng để check-in tại quầy"
+    draw.text(((dots - body.getlength(cap)) / 2, y + 4), cap, font=body, fill=0)
+
+    buf = BytesIO()
+    img.save(buf, format="PNG", optimize=True)
+    return buf.getvalue()
@@ -1,5 +1,6 @@
 from fastapi import HTTPException
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.auth.providers.auth_providers import AuthProvider
 from backend.auth.models.auth_models import SignUpRequestModel
 
@@ -52,6 +53,7 @@ def signup_user(user_model: SignUpRequestModel) -> dict:
                 user["id"], 
             ),
         )
+        catalog_versions.bump("doctors")
 
     return user
 
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from backend.common.responses import FastJSONResponse
 
 from backend.auth.models.patient_models import (
     AccessTokenResponseModel,
@@ -25,9 +24,9 @@ def token_by_cccd(user_cccd: CCCDRequestModel):
     Bệnh nhân đăng nhập bằng CCCD — nếu chưa có thì trả lỗi.
     """
     result = issue_token_by_cccd(user_cccd.national_id)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(result)
+        content=result
     )
 
 @router.post("/register", response_model=UserAuthResponseModel)
@@ -38,9 +37,9 @@ def patient_register(user_details: PatientSignUpRequestModel):
     user = register_patient(user_details)
 
 
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_201_CREATED,
-        content=jsonable_encoder(user)
+        content=user
     )
 
 
@@ -50,7 +49,7 @@ def refresh_token_api(refresh_token: str):
     Làm mới access token bằng refresh token.
     """
     new_token = auth_handler.refresh_token(refresh_token)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder({"access_token": new_token}),
+        content={"access_token": new_token},
     )
@@ -0,0 +1,140 @@
+"""
+Benchmark: lọc ngày DATE(COALESCE(...)) vs khoảng nửa mở trên effective_time.
+
+Tạo bảng tạm bench_appointments (1.000.000 dòng mặc định) trong DB cấu hình
+qua biến môi trường DATABASE_*, chạy mỗi kiểu truy vấn vài lần, in EXPLAIN
+và thời gian trung vị. Bảng bị xoá khi kết thúc (trừ khi --keep).
+
+    python -m backend.benchmarks.bench_effective_time_filter --rows 1000000
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from dotenv import load_dotenv
+
+from backend.database.connector import DatabaseConnector
+
+TABLE = "bench_appointments"
+
+OLD_SQL = f"""
+    SELECT a.id FROM {TABLE} a
+    WHERE a.patient_id = %s
+      AND DATE(COALESCE(a.estimated_time, a.created_at)) >= %s
+      AND DATE(COALESCE(a.estimated_time, a.created_at)) <= %s
+    ORDER BY COALESCE(a.estimated_time, a.created_at) DESC, a.id DESC
+    LIMIT 100
+"""
+
+NEW_SQL = f"""
+    SELECT a.id FROM {TABLE} a
+    WHERE a.patient_id = %s
+      AND a.effective_time >= %s
+      AND a.effective_time < %s
+    ORDER BY a.effective_time DESC, a.id DESC
+    LIMIT 100
+"""
+
+ADMIN_OLD_SQL = f"""
+    SELECT a.id FROM {TABLE} a
+    WHERE DATE(COALESCE(a.estimated_time, a.created_at)) >= %s
+      AND DATE(COALESCE(a.estimated_time, a.created_at)) <= %s
+    ORDER BY COALESCE(a.estimated_time, a.created_at) DESC, a.id DESC
+    LIMIT 100
+"""
+
+ADMIN_NEW_SQL = f"""
+    SELECT a.id FROM {TABLE} a
+    WHERE a.effective_time >= %s AND a.effective_time < %s
+    ORDER BY a.effective_time DESC, a.id DESC
+    LIMIT 100
+"""
+
+
+def _setup(cur, rows: int, patients: int) -> None:
+    cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cur.execute(f"""
+        CREATE TABLE {TABLE} (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            patient_id INT NOT NULL,
+            estimated_time DATETIME NULL,
+            created_at DATETIME NOT NULL,
+            effective_time DATETIME AS (COALESCE(estimated_time, created_at)) STORED,
+            INDEX idx_patient_effective (patient_id, effective_time, id),
+            INDEX idx_effective (effective_time, id)
+        ) ENGINE=InnoDB
+    """)
+    start = datetime(2023, 1, 1, 7, 0)
+    batch = []
+    for i in range(rows):
+        created = start + timedelta(minutes=i % (3 * 365 * 24 * 60))
+        est = None if random.random() < 0.05 else created + timedelta(days=random.randint(0, 7))
+        batch.append((random.randint(1, patients), est, created))
+        if len(batch) == 10_000:
+            cur.executemany(
+                f"INSERT INTO {TABLE} (patient_id, estimated_time, created_at) VALUES (%s,%s,%s)", batch
+            )
+            batch.clear()
+    if batch:
+        cur.executemany(
+            f"INSERT INTO {TABLE} (patient_id, estimated_time, created_at) VALUES (%s,%s,%s)", batch
+        )
+    cur.execute(f"ANALYZE TABLE {TABLE}")
+
+
+def _time(cur, sql: str, params: tuple, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--patients", type=int, default=20_000)
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--keep", action="store_true")
+    args = ap.parse_args()
+
+    load_dotenv()
+    conn = DatabaseConnector().get_connection()
+    try:
+        with conn.cursor() as cur:
+            print(f"Tạo {args.rows:,} dòng vào {TABLE} ...")
+            t0 = time.perf_counter()
+            _setup(cur, args.rows, args.patients)
+            conn.commit()
+            print(f"  xong sau {time.perf_counter() - t0:.1f}s")
+
+            d_from, d_to = date(2024, 3, 1), date(2024, 3, 31)
+            lo = datetime.combine(d_from, datetime.min.time())
+            hi = datetime.combine(d_to + timedelta(days=1), datetime.min.time())
+            patient = random.randint(1, args.patients)
+
+            cases = [
+                ("patient / DATE(COALESCE)", OLD_SQL, (patient, d_from, d_to)),
+                ("patient / effective_time", NEW_SQL, (patient, lo, hi)),
+                ("admin   / DATE(COALESCE)", ADMIN_OLD_SQL, (d_from, d_to)),
+                ("admin   / effective_time", ADMIN_NEW_SQL, (lo, hi)),
+            ]
+            for name, sql, params in cases:
+                cur.execute("EXPLAIN " + sql, params)
+                plan = cur.fetchone()
+                ms = _time(cur, sql, params, args.repeat)
+                print(f"{name:28s} {ms:9.2f} ms  type={plan['type']} key={plan['key']} rows={plan['rows']}")
+    finally:
+        if not args.keep:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Ngân sách thời gian import `backend.main` (cold start) đo bằng `python -X importtime`.
+
+Chạy N process con sạch, lấy trung vị thời gian import luỹ kế của
+backend.main, in các module tốn nhất và kiểm tra:
+  - tổng thời gian <= --budget-ms (mặc định IMPORT_BUDGET_MS hoặc 1800 ms)
+  - các module nặng chỉ dùng khi in phiếu / gọi HTTP (reportlab, qrcode,
+    PIL, httpx, openpyxl, pypdf) KHÔNG bị nạp lúc import app
+Trả exit code 1 nếu vượt ngân sách -> dùng được như 1 bước kiểm tra CI.
+
+Không cần DB (DatabaseConnector chỉ đọc biến môi trường lúc import).
+
+    python -m backend.benchmarks.bench_import_time --runs 5 --save importtime.log
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+LAZY_MODULES = ("reportlab", "qrcode", "PIL", "httpx", "openpyxl", "pypdf")
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def _run_once() -> str:
+    env = dict(os.environ)
+    for key in ("APP_SECRET", "DATABASE_HOST", "DATABASE_USERNAME", "DATABASE_PASSWORD", "DATABASE"):
+        env.setdefault(key, "importtime")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return proc.stderr
+
+
+def parse(log: str) -> Dict[str, int]:
+    """module -> thời gian luỹ kế (µs) theo dòng `import time: self | cumulative | name`."""
+    out: Dict[str, int] = {}
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split(":", 1)[1].split("|")
+        out[name.strip()] = int(cumulative)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", "1800")))
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--save", type=Path, default=None, help="Ghi log importtime của lần chạy trung vị")
+    args = ap.parse_args()
+
+    _run_once()                                    # lần đầu ghi .pyc, không tính
+    runs: List[Tuple[int, str, Dict[str, int]]] = []
+    for _ in range(args.runs):
+        log = _run_once()
+        mods = parse(log)
+        runs.append((mods["backend.main"], log, mods))
+    runs.sort(key=lambda r: r[0])
+    total_us, log, mods = runs[len(runs) // 2]
+
+    if args.save:
+        args.save.write_text(log, encoding="utf-8")
+
+    totals_ms = [r[0] / 1000 for r in runs]
+    print(f"backend.main: trung vị {total_us / 1000:.1f} ms "
+          f"(min {min(totals_ms):.1f}, max {max(totals_ms):.1f}, stdev {statistics.pstdev(totals_ms):.1f}; {args.runs} lần)")
+    print(f"Top {args.top} module (luỹ kế):")
+    for name, us in sorted(mods.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+
+    loaded = sorted({m.split(".")[0] for m in mods} & set(LAZY_MODULES))
+    ok = total_us / 1000 <= args.budget_ms and not loaded
+    print(f"Ngân sách {args.budget_ms:.0f} ms: {'OK' if total_us / 1000 <= args.budget_ms else 'VƯỢT'}")
+    print(f"Module nặng bị nạp lúc import: {', '.join(loaded) if loaded else 'không có'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: JSONResponse(jsonable_encoder(rows)) vs FastJSONResponse(rows)
+trên 1 trang 500 lịch hẹn (cùng projection với /appointments/admin/payment,
+kiểu dữ liệu như pymysql trả về: datetime, Decimal, timedelta, None).
+
+Không cần DB. Kiểm tra 2 cách cho ra cùng JSON rồi in thời gian trung vị.
+
+    python -m backend.benchmarks.bench_json_response --rows 500 --repeat 200
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from backend.common.responses import FastJSONResponse
+
+PAY_STATUSES = ["PAID", "AWAITING", "PENDING", "PARTIALLY", "UNPAID"]
+
+
+def make_page(n: int):
+    base = datetime(2025, 1, 1, 7, 0)
+    rows = []
+    for i in range(n):
+        est = base + timedelta(minutes=15 * i)
+        paid = random.random() < 0.6
+        rows.append({
+            "patient_name": f"Nguyễn Văn {i}",
+            "patient_national_id": f"0790{i:08d}",
+            "patient_dob": "1990-05-17",
+            "patient_gender": random.choice(["Nam", "Nữ"]),
+            "patient_phone": f"09{i:08d}",
+            "appointment_id": 100000 + i,
+            "service_name": "Khám nội tổng quát",
+            "clinic_name": "Phòng khám số 3",
+            "doctor_name": "BS. Trần Thị B",
+            "shift_number": i % 40 + 1,
+            "queue_number": i + 1,
+            "price_vnd": Decimal("150000"),
+            "estimated_time": est,
+            "effective_time": est,
+            "slot_length": timedelta(minutes=15),
+            "pay_status": random.choice(PAY_STATUSES) if paid else "UNPAID",
+            "paid_at": est - timedelta(hours=1) if paid else None,
+            "order_code": f"APPT{i:010d}" if paid else None,
+        })
+    return rows
+
+
+def bench(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    page = make_page(args.rows)
+    old = lambda: JSONResponse(status_code=200, content=jsonable_encoder(page)).body
+    new = lambda: FastJSONResponse(status_code=200, content=page).body
+
+    assert json.loads(old()) == json.loads(new()), "Hai cách serialize cho kết quả khác nhau"
+
+    t_old = bench(old, args.repeat)
+    t_new = bench(new, args.repeat)
+    print(f"{args.rows} dòng, {len(new())} bytes")
+    print(f"  jsonable_encoder + JSONResponse : {t_old:8.3f} ms")
+    print(f"  FastJSONResponse (orjson)       : {t_new:8.3f} ms  (x{t_old / t_new:.1f})")
+
+
+if __name__ == "__main__":
+    main()
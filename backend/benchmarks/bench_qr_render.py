@@ -0,0 +1,95 @@
+"""
+Benchmark: QR trên phiếu khám - raster (PIL -> PNG -> ImageReader) vs vector.
+
+- raster       : qrcode.make -> PIL -> PNG (BytesIO) -> ImageReader -> drawImage
+- vector_cold  : draw_qr, xoá LRU trước mỗi lần (tính cả sinh ma trận QR)
+- vector_cache : draw_qr, ma trận lấy từ LRU (phiếu được in/xem lại)
+
+Đo 2 mức: chỉ riêng QR (1 trang chỉ có QR) và cả phiếu A4 (form tĩnh +
+giá trị + QR). Không cần DB (dữ liệu giả lập).
+
+    python -m backend.benchmarks.bench_qr_render --tickets 200
+"""
+import argparse
+import time
+from io import BytesIO
+from typing import Any, Callable, Dict
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from backend.appointments import ticket_render
+from backend.appointments.ticket_render import FORM_NAME, draw_qr, get_ticket_template, ticket_qr_payload
+from backend.benchmarks.bench_ticket_render import _qr_reader, sample
+
+QR_SIZE = 48*mm
+
+
+def _qr_raster(cv, payload: str) -> None:
+    cv.drawImage(_qr_reader(payload), 0, 0, QR_SIZE, QR_SIZE, preserveAspectRatio=True, mask='auto')
+
+def _qr_vector(cv, payload: str) -> None:
+    draw_qr(cv, payload, 0, 0, QR_SIZE)
+
+def _qr_vector_cold(cv, payload: str) -> None:
+    ticket_render._qr_cache.clear()
+    draw_qr(cv, payload, 0, 0, QR_SIZE)
+
+
+def qr_only(draw: Callable, data: Dict[str, Any]) -> int:
+    buf = BytesIO()
+    cv = canvas.Canvas(buf, pagesize=A4)
+    draw(cv, ticket_qr_payload(data))
+    cv.showPage(); cv.save()
+    return len(buf.getvalue())
+
+def full_ticket(draw: Callable, data: Dict[str, Any]) -> int:
+    tpl = get_ticket_template()
+    buf = BytesIO()
+    cv = canvas.Canvas(buf, pagesize=tpl.page_size)
+    tpl.ensure_form(cv)
+    cv.doForm(FORM_NAME)
+    for name, value in tpl.values(data).items():
+        f = tpl.fields[name]
+        cv.setFont(f.font, f.size); cv.setFillColor(f.color)
+        cv.drawString(f.x, f.y, str(value))
+    qx, qy, _ = tpl.qr
+    cv.saveState(); cv.translate(qx, qy)
+    draw(cv, ticket_qr_payload(data))
+    cv.restoreState()
+    cv.showPage(); cv.save()
+    return len(buf.getvalue())
+
+
+def run(label: str, rows, fn) -> float:
+    t0 = time.perf_counter()
+    size = sum(fn(r) for r in rows)
+    dt = (time.perf_counter() - t0) * 1000 / len(rows)
+    print(f"    {label:<13}: {dt:6.2f} ms/phiếu  ({size / len(rows) / 1024:6.1f} KB/phiếu)")
+    return dt
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickets", type=int, default=200)
+    args = ap.parse_args()
+    rows = [sample(i) for i in range(args.tickets)]
+
+    get_ticket_template()
+    for fn in (_qr_raster, _qr_vector):                 # warm-up
+        full_ticket(fn, rows[0])
+
+    print(f"{len(rows)} phiếu")
+    for title, render in (("chỉ QR", qr_only), ("cả phiếu A4", full_ticket)):
+        print(f"  {title}")
+        base = run("raster", rows, lambda r: render(_qr_raster, r))
+        cold = run("vector_cold", rows, lambda r: render(_qr_vector_cold, r))
+        for r in rows:                                   # nạp LRU
+            ticket_render.qr_runs(ticket_qr_payload(r))
+        warm = run("vector_cache", rows, lambda r: render(_qr_vector, r))
+        print(f"    -> nhanh hơn x{base / cold:.1f} (cold), x{base / warm:.1f} (cache)")
+
+
+if __name__ == "__main__":
+    main()
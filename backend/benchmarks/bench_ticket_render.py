@@ -0,0 +1,240 @@
+"""
+Benchmark: phiếu khám/giây - vẽ lại toàn bộ (cũ) vs template tĩnh + overlay.
+
+- legacy : mỗi phiếu vẽ lại khung, nhãn, đo chữ... rồi giá trị + QR
+           (stream ASCII85 như cấu hình mặc định trước đây)
+- single : TicketTemplate.render_pdf (form tĩnh + overlay, 1 PDF/phiếu)
+- batch  : N phiếu trong 1 PDF, mọi trang dùng chung 1 form tĩnh
+
+Không cần DB (dữ liệu giả lập).
+
+    python -m backend.benchmarks.bench_ticket_render --tickets 200
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import BytesIO
+from typing import Any, Dict
+
+import qrcode
+from reportlab import rl_config
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+# QR check-in cần khoá ký; benchmark không cần secret thật
+os.environ.setdefault("CHECKIN_QR_SECRET", "benchmark")
+
+from backend.appointments.ticket_render import (
+    UI, _ensure_fonts, _fmt_vnd, get_ticket_template,
+)
+
+
+def _qr_reader(payload: str) -> ImageReader:
+    # QR raster cũ: qrcode -> PIL -> PNG -> ImageReader
+    img = qrcode.make(payload)
+    pil = img.get_image() if hasattr(img, "get_image") else img
+    b = BytesIO(); pil.save(b, format="PNG"); b.seek(0)
+    return ImageReader(b)
+
+
+def _round_rect(cv, x, y_top, w, h, r, fill, stroke, lw=1):
+    cv.setFillColor(fill); cv.setStrokeColor(stroke); cv.setLineWidth(lw)
+    cv.roundRect(x, y_top - h, w, h, r, stroke=1, fill=1)
+
+def _section_header(cv, x, y, text, dot_color):
+    cv.setFillColor(dot_color); cv.circle(x + 2.2*mm, y - 2.6*mm, 1.6*mm, stroke=0, fill=1)
+    cv.setFillColor(UI["title"]); cv.setFont("DejaVu-Bold", 12); cv.drawString(x + 6*mm, y, text)
+
+def _pair(cv, x, y, label, value, label_w, value_w, *, value_bold=False, value_color=None):
+    """
+    Label & value đều căn trái. Giá trị bắt đầu tại:
+        x + max(label_w, measured(label)+gap)
+    -> tránh bị dính khi label dài.
+    """
+    lbl_font, lbl_size, gap = "DejaVu-Bold", 10, 2*mm
+    cv.setFont(lbl_font, lbl_size); cv.setFillColor(UI["title"]); cv.drawString(x, y, label)
+    measured = cv.stringWidth(label, lbl_font, lbl_size)
+    value_x = x + max(label_w, measured + gap)
+    cv.setFont("DejaVu-Bold" if value_bold else "DejaVu", 10)
+    cv.setFillColor(value_color or UI["title"])
+    cv.drawString(value_x, y, str(value))
+
+def render_legacy(data: Dict[str, Any]) -> bytes:
+    """Bản cũ: vẽ lại toàn bộ phiếu từ đầu (giữ nguyên để so sánh)."""
+    _ensure_fonts()
+
+    est = data.get("estimated_time")
+    est_str  = est.strftime("%H:%M %d/%m/%Y") if isinstance(est, datetime) else "-"
+    paid_at  = data.get("paid_at")
+    paid_str = paid_at.strftime("%H:%M %d/%m/%Y") if isinstance(paid_at, datetime) else "-"
+
+    buf = BytesIO()
+    cv = canvas.Canvas(buf, pagesize=A4)
+    w, h = A4
+    margin = 16*mm
+    content_w = w - 2*margin
+    y = h - margin
+    row = 6*mm
+
+    # Title
+    cv.setFont("DejaVu-Bold", 18); cv.setFillColor(UI["title"]); cv.drawCentredString(w/2, y, "Hoàn Thành Đăng Ký")
+    y -= 7*mm
+    cv.setFont("DejaVu", 11); cv.setFillColor(UI["muted"]); cv.drawCentredString(w/2, y, "Kiểm tra thông tin và in phiếu khám")
+    y -= 10*mm
+
+    # Card patient
+    card1_h = 42*mm
+    _round_rect(cv, margin, y, content_w, card1_h, 8, UI["patient_bg"], UI["patient_bd"])
+    inner = 9*mm
+    x = margin + inner
+    y1 = y - inner
+    _section_header(cv, x, y1, "Thông Tin Bệnh Nhân", UI["icon_green"])
+    y1 -= 9*mm
+
+    col_w = (content_w - 2*inner) / 2
+    label_w = 24*mm
+    value_w = col_w - label_w - 2*mm
+
+    _pair(cv, x,           y1,           "Họ tên:",     data["patient_name"],            label_w, value_w, value_bold=True)
+    _pair(cv, x,           y1 - row,     "Ngày sinh:",  data.get("dob") or "-",          label_w, value_w)
+    _pair(cv, x,           y1 - 2*row,   "SĐT:",        data.get("phone") or "-",        label_w, value_w)
+
+    x2 = x + col_w
+    _pair(cv, x2,          y1,           "CCCD:",       data.get("national_id") or "-",  label_w, value_w)
+    _pair(cv, x2,          y1 - row,     "Giới tính:",  (data.get("gender") or "-"),     label_w, value_w)
+
+    y = y - card1_h - 7*mm
+
+    # Card exam
+    card2_h = 58*mm
+    _round_rect(cv, margin, y, content_w, card2_h, 8, UI["exam_bg"], UI["exam_bd"])
+    x = margin + inner
+    y2 = y - inner
+    _section_header(cv, x, y2, "Thông Tin Khám", UI["icon_green"])
+    y2 -= 9*mm
+
+    col_w = (content_w - 2*inner) / 2
+    label_w = 26*mm
+    value_w = col_w - label_w - 2*mm
+
+    _pair(cv, x,           y2,           "Dịch vụ:",    data["service_name"],            label_w, value_w)
+    _pair(cv, x,           y2 - row,     "Bác sĩ:",     data["doctor_name"],             label_w, value_w)
+    _pair(cv, x,           y2 - 2*row,   "Giá:",        _fmt_vnd(data["cur_price"]),     label_w, value_w,
+          value_bold=True, value_color=UI["price"])
+
+    x2 = x + col_w
+    _pair(cv, x2,          y2,           "Phòng:",          data["clinic_name"],          label_w, value_w)
+    _pair(cv, x2,          y2 - row,     "Số thứ tự:",      str(data.get("queue_number") or "-"), label_w, value_w, value_bold=True)
+
+    # thời gian dự kiến (đo bề rộng label -> value không dính)
+    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["title"])
+    lbl = "Thời gian khám:"
+    cv.drawString(x2, y2 - 2*row, lbl)
+    value_x = x2 + max(label_w, cv.stringWidth(lbl, "DejaVu-Bold", 10) + 2*mm)
+    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["danger"])
+    cv.drawString(value_x, y2 - 2*row, est_str)
+
+    # chip + thời gian thanh toán (cũng đo bề rộng label)
+    chip_w, chip_h = 36*mm, 8*mm
+    chip_x = x; chip_y_top = y2 - 3*row + 2
+    _round_rect(cv, chip_x, chip_y_top, chip_w, chip_h, 3, UI["chip_bg"], UI["chip_bd"])
+    cv.setFont("DejaVu-Bold", 9); cv.setFillColor(UI["chip_txt"])
+    cv.drawCentredString(chip_x + chip_w/2, chip_y_top - chip_h/2 + 3, "ĐÃ THANH TOÁN")
+
+    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["title"])
+    lbl2 = "Thời gian thanh toán:"
+    cv.drawString(x2, y2 - 3*row, lbl2)
+    value_x2 = x2 + max(label_w, cv.stringWidth(lbl2, "DejaVu-Bold", 10) + 2*mm)
+    cv.setFont("DejaVu", 10); cv.setFillColor(UI["title"])
+    cv.drawString(value_x2, y2 - 3*row, paid_str)
+
+    y = y - card2_h - 8*mm
+
+    # QR
+    qr_payload = f"APPT:{data['id']}|ORDER:{data['order_code']}|PAID_AT:{paid_str}"
+    qr_img = _qr_reader(qr_payload)
+    qr_size = 48*mm
+    cv.drawImage(qr_img, (w - qr_size)/2, y - qr_size, qr_size, qr_size, preserveAspectRatio=True, mask='auto')
+    y -= (qr_size + 7*mm)
+    cv.setFont("DejaVu", 9); cv.setFillColor(UI["muted"])
+    cv.drawCentredString(w/2, y, "Mã QR dùng để check-in tại quầy")
+    y -= 10*mm
+
+    # Hint
+    hint_h = 28*mm
+    _round_rect(cv, margin, y, content_w, hint_h, 6, UI["hint_bg"], UI["hint_bd"])
+    cv.setFont("DejaVu-Bold", 10); cv.setFillColor(UI["title"])
+    cv.drawString(margin + 9*mm, y - 9, "Hướng dẫn:")
+    cv.setFont("DejaVu", 9)
+    for t in [
+        "Vui lòng mang theo phiếu khám tới quầy/triển khai tự động.",
+        "Nếu dùng BHYT, nhớ mang thẻ và giấy tờ liên quan.",
+        "Mọi thắc mắc vui lòng liên hệ quầy hướng dẫn.",
+    ]:
+        y -= 5*mm
+        cv.drawString(margin + 12*mm, y, f"• {t}")
+
+    cv.setTitle(f"PhieuKham-{data['id']}")
+    cv.showPage(); cv.save()
+    pdf_bytes = buf.getvalue(); buf.close()
+    return pdf_bytes
+
+
+def sample(i: int) -> Dict[str, Any]:
+    est = datetime(2025, 3, 1, 7, 30) + timedelta(minutes=10 * i)
+    return {
+        "id": 1000 + i, "patient_name": f"Nguyễn Văn {i}", "national_id": f"0790{i:08d}",
+        "dob": "1990-05-17", "gender": "Nam", "phone": f"09{i:08d}",
+        "service_name": "Khám nội tổng quát", "doctor_name": "BS. Trần Thị B",
+        "clinic_name": "Phòng khám số 3", "cur_price": Decimal("150000"),
+        "queue_number": i + 1, "estimated_time": est,
+        "order_code": f"APPT{i:010d}", "paid_at": est - timedelta(hours=1),
+    }
+
+
+def run(label: str, n: int, fn) -> None:
+    t0 = time.perf_counter()
+    size = fn()
+    dt = time.perf_counter() - t0
+    print(f"  {label:<8}: {n / dt:8.1f} phiếu/s  ({dt * 1000 / n:6.2f} ms/phiếu, {size / n / 1024:6.1f} KB/phiếu)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tickets", type=int, default=200)
+    args = ap.parse_args()
+    n = args.tickets
+    rows = [sample(i) for i in range(n)]
+
+    _ensure_fonts()
+    tpl = get_ticket_template()
+    render_legacy(rows[0]); tpl.render_pdf(rows[0])     # warm-up
+
+    def batch() -> int:
+        buf = BytesIO()
+        cv = canvas.Canvas(buf, pagesize=tpl.page_size)
+        for r in rows:
+            tpl.draw_page(cv, r)
+            cv.showPage()
+        cv.save()
+        return len(buf.getvalue())
+
+    def legacy() -> int:
+        rl_config.useA85 = 1
+        try:
+            return sum(len(render_legacy(r)) for r in rows)
+        finally:
+            rl_config.useA85 = 0
+
+    print(f"{n} phiếu")
+    run("legacy", n, legacy)
+    run("single", n, lambda: sum(len(tpl.render_pdf(r)) for r in rows))
+    run("batch", n, batch)
+
+
+if __name__ == "__main__":
+    main()
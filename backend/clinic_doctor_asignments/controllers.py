@@ -1,5 +1,6 @@
 from fastapi import HTTPException, status
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.clinic_doctor_asignments.models import (
     ClinicDoctorAssignmentCreateRequest,
     ClinicDoctorAssignmentUpdateRequest,
@@ -24,7 +25,9 @@ def create_assignment(data: ClinicDoctorAssignmentCreateRequest) -> int:
         VALUES (%s, %s)
     """
     params = (data.clinic_id, data.doctor_id)
-    return database.query_post(sql, params)
+    new_id = database.query_post(sql, params)
+    catalog_versions.bump("assignments")
+    return new_id
 
 def update_assignment(data: ClinicDoctorAssignmentUpdateRequest) -> int:
     sql = """
@@ -32,10 +35,13 @@ def update_assignment(data: ClinicDoctorAssignmentUpdateRequest) -> int:
         SET clinic_id = %s, doctor_id = %s
         WHERE id = %s
     """
-    return database.query_put(sql, (data.clinic_id, data.doctor_id, data.id))
+    affected = database.query_put(sql, (data.clinic_id, data.doctor_id, data.id))
+    catalog_versions.bump("assignments")
+    return affected
 
 def delete_assignment(id: int) -> None:
     sql = "DELETE FROM clinic_doctor_assignments WHERE id = %s"
     affected = database.query_put(sql, (id,))
     if affected == 0:
         raise HTTPException(status_code=404, detail="Không tìm thấy phân công")
+    catalog_versions.bump("assignments")
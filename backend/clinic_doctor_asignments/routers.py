@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer
+from backend.common.responses import FastJSONResponse
 from backend.auth.providers.auth_providers import AuthProvider, AdminUser
 from backend.clinic_doctor_asignments.models import (
     ClinicDoctorAssignmentResponse,
@@ -25,7 +24,7 @@ router = APIRouter(prefix="/clinic-doctor-assignments", tags=["Clinic Doctor Ass
 @router.get("/", response_model=list[ClinicDoctorAssignmentResponse])
 def get_all_assignments_api():
     rows = get_all_assignments()
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(rows))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=rows)
 
 
 @router.get("/{assignment_id}", response_model=ClinicDoctorAssignmentResponse)
@@ -34,7 +33,7 @@ def get_assignment_api(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     row = get_assignment_by_id(assignment_id)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(row))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=row)
 
 
 @router.post("/", response_model=ClinicDoctorAssignmentResponse, status_code=status.HTTP_201_CREATED)
@@ -44,7 +43,7 @@ def create_assignment_api(
 ):
     new_id = create_assignment(data)
     created = get_assignment_by_id(new_id)
-    return JSONResponse(status_code=status.HTTP_201_CREATED, content=jsonable_encoder(created))
+    return FastJSONResponse(status_code=status.HTTP_201_CREATED, content=created)
 
 
 @router.put("/{assignment_id}", response_model=ClinicDoctorAssignmentResponse)
@@ -54,13 +53,13 @@ def update_assignment_api(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     if assignment_id != data.id:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"detail": "ID trong URL và body không khớp"},
         )
     update_assignment(data)
     updated = get_assignment_by_id(assignment_id)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(updated))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=updated)
 
 
 @router.delete("/{assignment_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -69,4 +68,4 @@ def delete_assignment_api(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     delete_assignment(assignment_id)
-    return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
+    return FastJSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
@@ -1,5 +1,6 @@
 from typing import List, Optional
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.clinics.models import (
     ClinicCreateModel,
     ClinicUpdateModel,
@@ -35,6 +36,7 @@ def create_clinic(data: ClinicCreateModel) -> ClinicResponseModel:
         "sp_create_clinic",
         [data.name, data.location, data.status]
     )
+    catalog_versions.bump("clinics")
     return ClinicResponseModel(**rows[0])
 # -------------------------------
 # Update clinic
@@ -44,12 +46,14 @@ def update_clinic(clinic_id: int, data: ClinicUpdateModel) -> ClinicResponseMode
         "sp_update_clinic",
         [clinic_id, data.name, data.location, data.status]
     )
+    catalog_versions.bump("clinics")
     return ClinicResponseModel(**rows[0])
 # -------------------------------
 # Delete clinic
 # -------------------------------
 def delete_clinic(clinic_id: int) -> None:
     db.call_procedure("sp_delete_clinic", [clinic_id])
+    catalog_versions.bump("clinics")
 # -------------------------------
 # Lấy clinics theo service
 # -------------------------------
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from typing import List
+from datetime import datetime, timedelta, timezone
+from backend.common.responses import FastJSONResponse
+from backend.common.etag import catalog_versions, etag_matches, not_modified, etag_headers
 from backend.auth.providers.auth_providers import AuthProvider, AdminUser, DoctorUser
 from backend.clinics.models import (
     ClinicCreateModel,
@@ -18,14 +21,18 @@ from backend.clinics.controllers import (
 
 auth_handler = AuthProvider()
 router = APIRouter(prefix="/clinics", tags=["Clinics"])
+VN_TZ = timezone(timedelta(hours=7))
 
 
 
 # GET: Lấy tất cả clinics
 
 @router.get("/", response_model=List[ClinicResponseModel])
-def list_clinics():
-    return get_all_clinics()
+def list_clinics(request: Request):
+    etag = catalog_versions.etag("clinics")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=get_all_clinics(), headers=etag_headers(etag))
 
 
 
@@ -84,5 +91,14 @@ def remove_clinic(
 # GET: Lấy clinics theo service
 
 @router.get("/by-service/{service_id}")
-def api_clinics_by_service(service_id: int):
-    return get_clinics_by_service(service_id)
+def api_clinics_by_service(service_id: int, request: Request):
+    # SP ghép clinic + bác sĩ + lịch -> phụ thuộc nhiều danh mục và ngày hiện tại
+    today = datetime.now(VN_TZ).date().isoformat()
+    etag = catalog_versions.etag(
+        "clinics", "services", "doctors", "assignments", "schedules",
+        extra=f"s{service_id}-{today}",
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    data = get_clinics_by_service(service_id)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data, headers=etag_headers(etag))
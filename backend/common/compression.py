@@ -0,0 +1,188 @@
+"""
+Middleware nén response (gzip / brotli) theo Accept-Encoding, viết dạng ASGI
+thuần để không buffer StreamingResponse (export CSV, SSE...).
+
+- Response 1 khối (JSON thường): chỉ nén khi body >= COMPRESS_MIN_SIZE byte,
+  Content-Length được tính lại.
+- Response stream (more_body): nén từng chunk và flush ngay (Z_SYNC_FLUSH /
+  brotli flush) -> client nhận dữ liệu liên tục, không chờ hết stream.
+- Bỏ qua: đã có Content-Encoding, text/event-stream (SSE cần đẩy từng sự
+  kiện), nội dung vốn đã nén (PDF, ảnh, xlsx/zip...).
+
+Cấu hình:
+    COMPRESS_MIN_SIZE        ngưỡng byte (mặc định 1024)
+    COMPRESS_GZIP_LEVEL      1-9 (mặc định 6)
+    COMPRESS_BROTLI_QUALITY  0-11 (mặc định 4; thư viện brotli là tuỳ chọn)
+"""
+import os
+import zlib
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:      # không có brotli -> chỉ dùng gzip
+    brotli = None
+
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+# Content-type không nén (đã nén sẵn hoặc cần đẩy từng gói)
+SKIP_TYPES = (
+    "text/event-stream",
+    "application/pdf",
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument.",
+    "application/octet-stream",
+)
+
+
+def _parse_accept_encoding(accept: str) -> Dict[str, float]:
+    """Accept-Encoding -> {coding: q}. q thiếu = 1, q sai cú pháp = 0 (từ chối)."""
+    accepted: Dict[str, float] = {}
+    for part in accept.lower().split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = min(max(float(value.strip()), 0.0), 1.0)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def _pick_encoding(accept: str) -> Optional[str]:
+    """
+    Chọn coding có q cao nhất trong số server hỗ trợ (br ưu tiên khi bằng q).
+    q=0 là từ chối tường minh; "*" áp cho các coding không được liệt kê.
+    """
+    accepted = _parse_accept_encoding(accept)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in ("br", "gzip"):
+        if name == "br" and brotli is None:
+            continue
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)   # wbits 31 = gzip
+
+    def chunk(self, data: bytes) -> bytes:
+        """Nén 1 chunk và flush để client nhận được ngay."""
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _pick_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressedResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self._send)
+
+    def _skip(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return True
+        ctype = headers.get("content-type", "").lower()
+        return any(ctype.startswith(t) for t in SKIP_TYPES)
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+    async def _send(self, message: Message) -> None:
+        mtype = message["type"]
+        if mtype == "http.response.start":
+            # Giữ lại start cho tới khi thấy chunk body đầu tiên
+            self.start = message
+            self.passthrough = self._skip(Headers(raw=message["headers"]))
+            if self.passthrough:
+                await self.send(message)
+            return
+
+        if mtype != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is None and self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body:
+                # Response 1 khối
+                if len(body) < self.minimum_size:
+                    self.passthrough = True
+                    await self.send(start)
+                    await self.send(message)
+                    return
+                data = _Compressor(self.encoding).finish(body)
+                self._set_encoding_headers(headers)
+                headers["Content-Length"] = str(len(data))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": data})
+                return
+            # Response stream: không biết trước kích thước -> nén từng chunk
+            self.compressor = _Compressor(self.encoding)
+            self._set_encoding_headers(headers)
+            if "content-length" in headers:
+                del headers["Content-Length"]
+            await self.send(start)
+
+        if more_body:
+            data = self.compressor.chunk(body) if body else b""
+            if data:
+                await self.send({"type": "http.response.body", "body": data, "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.finish(body)})
@@ -0,0 +1,60 @@
+"""
+ETag theo version cho các danh mục gần như tĩnh (dịch vụ, phòng khám, bác sĩ,
+BHYT...). Mỗi danh mục có 1 bộ đếm in-process; controller create/update/delete
+gọi catalog_versions.bump(...) sau khi ghi thành công. Route GET tính ETag
+từ version TRƯỚC khi đọc DB (dữ liệu chỉ có thể mới hơn ETag, không cũ hơn)
+và trả 304 ngay khi khớp If-None-Match -> không gọi stored procedure.
+
+ETag kèm boot id của process nên restart luôn làm client tải lại. Bộ đếm nằm
+trong 1 process -> chạy 1 worker uvicorn (giống SSE availability).
+"""
+import secrets
+import threading
+from typing import Dict
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class CatalogVersions:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._boot = secrets.token_hex(4)
+
+    def bump(self, *names: str) -> None:
+        with self._lock:
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def etag(self, *names: str, extra: str = "") -> str:
+        with self._lock:
+            parts = "-".join(f"{n}{self._versions.get(n, 0)}" for n in names)
+        suffix = f"-{extra}" if extra else ""
+        return f'W/"{self._boot}-{parts}{suffix}"'
+
+
+catalog_versions = CatalogVersions()
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _opaque(etag)
+    return any(_opaque(t) == target for t in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
@@ -0,0 +1,49 @@
+"""
+Response JSON nhanh dùng chung cho mọi router.
+
+JSONResponse(content=jsonable_encoder(rows)) duyệt đệ quy từng dict bằng
+Python thuần; FastJSONResponse serialize thẳng bằng orjson (C), xử lý sẵn
+datetime/date/time. Các kiểu pymysql trả về mà orjson không hiểu được map
+trong `_default` theo đúng quy ước của jsonable_encoder để body không đổi:
+    Decimal   -> int (nếu là số nguyên) / float
+    timedelta -> số giây (float)
+    BaseModel -> dict
+    set/bytes/Enum -> list / str / value
+"""
+from decimal import Decimal
+from datetime import timedelta
+from enum import Enum
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json") if hasattr(obj, "model_dump") else obj.dict()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Không serialize được kiểu {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,127 @@
+"""
+Warm-up lúc khởi động + trạng thái readiness.
+
+Chạy nền sau startup (không chặn liveness "/"), lần lượt từng bước:
+  - fonts / ticket_template: đăng ký DejaVu + dựng TicketTemplate
+  - render_pool:  spawn đủ process render (mỗi worker tự dựng template)
+  - database:     SELECT 1 (DNS, bắt tay, xác thực MySQL)
+  - today_counters: seed bộ đếm "hôm nay" từ MySQL
+  - catalog:      chạy 1 lần các truy vấn danh mục (dịch vụ, phòng khám,
+                  bác sĩ, BHYT) -> nạp buffer pool MySQL + đường code
+Bước lỗi được thử lại sau WARMUP_RETRY_SECONDS (mặc định 5) cho tới khi
+xong. GET /ready chỉ trả 200 khi mọi bước đã thành công, ngược lại 503.
+Nội dung lỗi chỉ ghi log, /ready chỉ trả ok / số lần thử / thời gian; số lần
+lỗi theo bước đếm vào metrics warmup_step_failures_total{step=...}.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.metrics.controllers import metrics
+
+RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+logger = logging.getLogger(__name__)
+
+metrics.describe("warmup_step_failures_total", "Số lần 1 bước warm-up bị lỗi (theo bước)")
+metrics.describe("warmup_ready", "1 khi mọi bước warm-up đã xong (/ready trả 200)")
+
+
+def _fonts() -> None:
+    from backend.appointments.ticket_render import _ensure_fonts
+    _ensure_fonts()
+
+def _ticket_template() -> None:
+    from backend.appointments.ticket_render import get_ticket_template
+    get_ticket_template()
+
+def _render_pool() -> None:
+    from backend.appointments.render_pool import render_pool
+    render_pool.warm()
+
+def _database() -> None:
+    from backend.database.connector import DatabaseConnector
+    DatabaseConnector().query_one("SELECT 1 AS ok")
+
+def _today_counters() -> None:
+    from backend.statistics.today import today_counters
+    today_counters.reconcile()
+
+def _catalog() -> None:
+    from backend.clinics.controllers import get_all_clinics
+    from backend.doctors.controllers import get_all_doctors
+    from backend.insurances.controllers import get_all_insurances
+    from backend.services.controllers import get_all_services
+    get_all_services(False)
+    get_all_services(True)
+    get_all_clinics()
+    get_all_doctors()
+    get_all_insurances()
+
+
+STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("fonts", _fonts),
+    ("ticket_template", _ticket_template),
+    ("render_pool", _render_pool),
+    ("database", _database),
+    ("today_counters", _today_counters),
+    ("catalog", _catalog),
+]
+
+
+def _error_text(e: Exception) -> str:
+    detail = getattr(e, "detail", None)
+    return str(detail) if detail else repr(e)
+
+
+class WarmupState:
+    def __init__(self):
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {
+            name: {"ok": False, "seconds": None, "attempts": 0} for name, _ in STEPS
+        }
+
+    @property
+    def ready(self) -> bool:
+        return all(s["ok"] for s in self.steps.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "warmup_seconds": (
+                round(self.finished_at - self.started_at, 3)
+                if self.started_at is not None and self.finished_at is not None else None
+            ),
+            "steps": {name: dict(step) for name, step in self.steps.items()},
+        }
+
+    async def run(self) -> None:
+        self.started_at = time.monotonic()
+        metrics.set("warmup_ready", 0)
+        while True:
+            for name, fn in STEPS:
+                step = self.steps[name]
+                if step["ok"]:
+                    continue
+                step["attempts"] += 1
+                t0 = time.perf_counter()
+                try:
+                    await run_in_threadpool(fn)
+                except Exception as e:
+                    metrics.inc("warmup_step_failures_total", step=name)
+                    logger.warning("warmup step %s failed: %s", name, _error_text(e))
+                else:
+                    step["ok"] = True
+                step["seconds"] = round(time.perf_counter() - t0, 3)
+            if self.ready:
+                self.finished_at = time.monotonic()
+                metrics.set("warmup_ready", 1)
+                return
+            await asyncio.sleep(RETRY_SECONDS)
+
+
+warmup = WarmupState()
@@ -73,6 +73,33 @@ class DatabaseConnector:
                 status_code=500, detail=f"Database error: {str(e)}"
             )
 
+    def query_stream(self, sql: str, param=(), batch_size: int = 1000):
+        """
+        Duyệt nhiều rows qua server-side cursor (SSDictCursor), không nạp hết vào RAM.
+        Chạy autocommit + READ COMMITTED -> chỉ là consistent read, không giữ
+        transaction dài hay khoá chặn các luồng đặt lịch.
+        """
+        connection = self.get_connection()
+        try:
+            connection.autocommit(True)
+            with connection.cursor() as cursor:
+                cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED;")
+            with connection.cursor(pymysql.cursors.SSDictCursor) as cursor:
+                cursor.execute(sql, param)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield from rows
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500, detail=f"Database error: {str(e)}"
+            )
+        finally:
+            connection.close()
+
     def query_put(self, sql: str, param=()):
         """Update/Delete"""
         try:
@@ -0,0 +1,4 @@
+-- Re-sequence estimated_time khi 1 lịch rời ca (hủy / no-show):
+-- UPDATE ... WHERE schedule_id=? AND shift_number > ? chỉ quét phần đuôi của ca.
+CREATE INDEX idx_appointments_schedule_shift
+    ON appointments (schedule_id, shift_number);
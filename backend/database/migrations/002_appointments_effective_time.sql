@@ -0,0 +1,11 @@
+-- Khóa sắp xếp của các danh sách lịch hẹn: COALESCE(estimated_time, created_at).
+-- Cột generated STORED để index phục vụ được ORDER BY + keyset pagination.
+ALTER TABLE appointments
+    ADD COLUMN effective_time DATETIME
+        AS (COALESCE(estimated_time, created_at)) STORED;
+
+CREATE INDEX idx_appointments_patient_effective
+    ON appointments (patient_id, effective_time, id);
+
+CREATE INDEX idx_appointments_effective
+    ON appointments (effective_time, id);
@@ -0,0 +1,18 @@
+-- Con trỏ tới đơn thanh toán mới nhất của lịch hẹn, thay cho subquery
+-- SELECT appointment_id, MAX(id) FROM payment_orders GROUP BY appointment_id
+-- chạy trên toàn bảng ở mỗi request. Được cập nhật trong create_payment_order
+-- và handle_sepay_webhook.
+ALTER TABLE appointments
+    ADD COLUMN latest_payment_order_id BIGINT NULL;
+
+CREATE INDEX idx_appointments_latest_payment_order
+    ON appointments (latest_payment_order_id);
+
+-- Backfill 1 lần
+UPDATE appointments a
+JOIN (
+    SELECT appointment_id, MAX(id) AS max_id
+    FROM payment_orders
+    GROUP BY appointment_id
+) z ON z.appointment_id = a.id
+SET a.latest_payment_order_id = z.max_id;
@@ -0,0 +1,7 @@
+-- /appointments/doctor/me: lọc theo a.doctor_id (không join d.user_id),
+-- keyset theo (created_at, id) và cửa sổ ngày theo effective_time.
+CREATE INDEX idx_appointments_doctor_created
+    ON appointments (doctor_id, created_at, id);
+
+CREATE INDEX idx_appointments_doctor_effective
+    ON appointments (doctor_id, effective_time, id);
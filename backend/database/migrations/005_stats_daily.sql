@@ -0,0 +1,50 @@
+-- Bảng rollup cho thống kê admin: 1 dòng / (ngày, phòng khám, bác sĩ, dịch vụ).
+-- bookings/completions/no_shows/cancellations tính theo DATE(effective_time) - cả backfill
+-- lẫn cộng dồn trực tiếp (bump_rollup) dùng cùng cơ sở này,
+-- paid_orders/revenue_vnd tính theo ngày thanh toán (paid_at).
+-- Được cộng dồn khi đặt lịch / đổi trạng thái / webhook PAID (backend/statistics/controllers.py).
+CREATE TABLE IF NOT EXISTS stats_daily (
+    stat_date      DATE    NOT NULL,
+    clinic_id      INT     NOT NULL,
+    doctor_id      INT     NOT NULL,
+    service_id     INT     NOT NULL,
+    bookings       INT     NOT NULL DEFAULT 0,
+    completions    INT     NOT NULL DEFAULT 0,
+    no_shows       INT     NOT NULL DEFAULT 0,
+    cancellations  INT     NOT NULL DEFAULT 0,
+    paid_orders    INT     NOT NULL DEFAULT 0,
+    revenue_vnd    BIGINT  NOT NULL DEFAULT 0,
+    updated_at     TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (stat_date, clinic_id, doctor_id, service_id),
+    KEY idx_stats_daily_clinic  (clinic_id, stat_date),
+    KEY idx_stats_daily_doctor  (doctor_id, stat_date),
+    KEY idx_stats_daily_service (service_id, stat_date)
+);
+
+-- Backfill từ dữ liệu hiện có (chạy 1 lần khi tạo bảng)
+INSERT INTO stats_daily
+    (stat_date, clinic_id, doctor_id, service_id, bookings, completions, no_shows, cancellations)
+SELECT DATE(a.effective_time), a.clinic_id, a.doctor_id, a.service_id,
+       COUNT(*),
+       SUM(a.status = 2),
+       SUM(a.status = 3),
+       SUM(a.status = 4)
+FROM appointments a
+GROUP BY DATE(a.effective_time), a.clinic_id, a.doctor_id, a.service_id
+ON DUPLICATE KEY UPDATE
+    bookings      = VALUES(bookings),
+    completions   = VALUES(completions),
+    no_shows      = VALUES(no_shows),
+    cancellations = VALUES(cancellations);
+
+INSERT INTO stats_daily
+    (stat_date, clinic_id, doctor_id, service_id, paid_orders, revenue_vnd)
+SELECT DATE(po.paid_at), a.clinic_id, a.doctor_id, a.service_id,
+       COUNT(*), SUM(po.amount_vnd)
+FROM payment_orders po
+JOIN appointments a ON a.id = po.appointment_id
+WHERE po.status = 'PAID' AND po.paid_at IS NOT NULL
+GROUP BY DATE(po.paid_at), a.clinic_id, a.doctor_id, a.service_id
+ON DUPLICATE KEY UPDATE
+    paid_orders = VALUES(paid_orders),
+    revenue_vnd = VALUES(revenue_vnd);
@@ -0,0 +1,4 @@
+-- Check-in tại quầy bằng QR có ký HMAC: xác thực trong bộ nhớ rồi
+-- UPDATE 1 dòng theo khoá chính (appointments.id), không join.
+ALTER TABLE appointments
+    ADD COLUMN checked_in_at DATETIME NULL;
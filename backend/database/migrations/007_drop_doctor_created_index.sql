@@ -0,0 +1,4 @@
+-- /appointments/doctor/me giờ sắp xếp + keyset theo (effective_time, id), cùng
+-- cột với cửa sổ ngày -> idx_appointments_doctor_effective phục vụ cả lọc lẫn
+-- ORDER BY (không filesort). Index theo created_at của migration 004 không còn dùng.
+DROP INDEX idx_appointments_doctor_created ON appointments;
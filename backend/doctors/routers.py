@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, status, HTTPException, Request
 from fastapi.security import HTTPBearer
-from fastapi.responses import JSONResponse
 from backend.auth.providers.auth_providers import AuthProvider, DoctorUser
 from typing import List
+from backend.common.responses import FastJSONResponse
+from backend.common.etag import catalog_versions, etag_matches, not_modified, etag_headers
 
 from backend.doctors.controllers import (
     get_all_doctors,
@@ -26,12 +26,17 @@ router = APIRouter(prefix="/doctors", tags=["Doctors"])
 # API: Lấy danh sách tất cả bác sĩ (chỉ admin)
 @router.get("/", response_model=List[DoctorResponseModel])
 async def get_all_doctors_api(
+    request: Request,
     current_user: DoctorUser = Depends(auth_handler.get_current_admin_user)
 ):
+    etag = catalog_versions.etag("doctors")
+    if etag_matches(request, etag):
+        return not_modified(etag)
     doctors = get_all_doctors()
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(doctors)
+        content=doctors,
+        headers=etag_headers(etag),
     )
 
 
@@ -84,7 +89,7 @@ async def get_doctor_api(
     current_user: dict = Depends(auth_handler.get_current_admin_user),
 ):
     doctor = get_doctor_by_id(doctor_id)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(doctor))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=doctor)
 
 
 # API: Cập nhật thông tin 1 bác sĩ theo ID (chỉ admin)
@@ -95,7 +100,7 @@ def update_doctor_api(
     current_user: DoctorUser = Depends(auth_handler.get_current_admin_user),
 ):
     if doctor_id != doctor_details.id:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"detail": "ID trong URL và payload không khớp"},
         )
@@ -110,7 +115,7 @@ def update_doctor_api(
     )
 
     updated = get_doctor_by_id(doctor_id)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(updated))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=updated)
 
 
 # API: Xóa 1 bác sĩ theo ID (chỉ admin)
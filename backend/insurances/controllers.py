@@ -1,6 +1,7 @@
 # backend/insurances/controllers.py
 from fastapi import HTTPException, status
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.insurances.models import InsuranceCreateModel
 
 database = DatabaseConnector()
@@ -20,8 +21,10 @@ def create_insurance(data: InsuranceCreateModel):
         raise HTTPException(status_code=409, detail="Bệnh nhân đã có BHYT")
 
     call_procedure("sp_create_insurance", (data.national_id, data.insurance_number, data.expiry_date))
+    catalog_versions.bump("insurances")
     return {"message": "Tạo bảo hiểm thành công"}
 
 def delete_insurance_by_id(insurance_id: int):
     call_procedure("sp_delete_insurance", (insurance_id,))
+    catalog_versions.bump("insurances")
     return {"message": "Đã xóa bảo hiểm thành công"}
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, Depends, status, Response
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, status, Response, Request
+from backend.common.responses import FastJSONResponse
+from backend.common.etag import catalog_versions, etag_matches, not_modified, etag_headers
 from backend.auth.providers.auth_providers import AuthProvider, AdminUser
 from backend.insurances.controllers import (
     get_all_insurances,
@@ -22,12 +23,16 @@ def check_insurance(national_id: str):
 
 @router.get("/")
 def list_insurances(
+    request: Request,
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user)
 ):
     """
     Chỉ admin được xem danh sách BHYT.
     """
-    return get_all_insurances()
+    etag = catalog_versions.etag("insurances")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=get_all_insurances(), headers=etag_headers(etag))
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def create(
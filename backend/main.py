@@ -14,7 +14,15 @@ from backend.clinic_doctor_asignments.routers import router as clinic_doctor_asi
 from backend.users.routers import router as users_router
 from backend.schedule_doctors.routers import router as schedule_doctors_router
 from backend.payments.routers import router as payments_router
+from backend.metrics.routers import router as metrics_router
+from backend.statistics.routers import router as statistics_router
+from backend.statistics.today import reconcile_loop
+from backend.common.responses import FastJSONResponse
+from backend.common.compression import CompressionMiddleware
+from backend.common.warmup import warmup
+from backend.appointments.render_pool import shutdown_render_pool
 from dotenv import load_dotenv
+import asyncio
 import os
 
 load_dotenv()
@@ -31,6 +39,7 @@ app = FastAPI(
     docs_url="/v1/docs",
     redoc_url="/v1/redoc",
     openapi_url="/v1/openapi.json",
+    default_response_class=FastJSONResponse,
 )
 
 # Middleware set timezone +7
@@ -43,11 +52,39 @@ class TimezoneMiddleware(BaseHTTPMiddleware):
 
 # Đăng ký middleware
 app.add_middleware(TimezoneMiddleware)
+# Nén gzip/brotli theo Accept-Encoding (bỏ qua PDF, ảnh, xlsx, SSE)
+app.add_middleware(CompressionMiddleware)
+
+# Warm-up nền (font, template phiếu, process render, DB, bộ đếm "hôm nay",
+# danh mục) + task đối soát bộ đếm định kỳ. /ready trả 200 khi warm-up xong.
+@app.on_event("startup")
+async def start_background_tasks():
+    app.state.warmup_task = asyncio.create_task(warmup.run())
+    app.state.today_reconcile_task = asyncio.create_task(reconcile_loop())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    for name in ("warmup_task", "today_reconcile_task"):
+        task = getattr(app.state, name, None)
+        if task:
+            task.cancel()
+
+@app.on_event("shutdown")
+def stop_render_pool():
+    shutdown_render_pool()
 
 @app.get("/")
 def root():
     return {"message": "Cay KIOS API is running!"}
 
+# Readiness: chỉ sẵn sàng nhận traffic khi warm-up đã hoàn tất
+@app.get("/ready")
+def ready():
+    state = warmup.snapshot()
+    if state["ready"]:
+        return state
+    return FastJSONResponse(status_code=503, content=state, headers={"Retry-After": "5"})
+
 # Set CORS
 origins = [
     "http://localhost",
@@ -67,6 +104,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
 
 # Auth APIs
@@ -83,3 +121,5 @@ app.include_router(clinic_doctor_asignments_router)
 app.include_router(schedule_doctors_router)
 app.include_router(users_router)
 app.include_router(payments_router)
+app.include_router(statistics_router)
+app.include_router(metrics_router)
@@ -0,0 +1,100 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Tuple, Any
+
+# Khoá nhãn: tuple (("clinic_id","1"), ("result","direct"))
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    inner = ",".join(f'{k}="{v}"' for k, v in key)
+    return "{" + inner + "}"
+
+
+class MetricsRegistry:
+    """
+    Bộ đếm in-process (counter / gauge / summary) xuất ra định dạng text Prometheus.
+    Dùng chung cho mọi module, thread-safe vì route sync chạy trong threadpool.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = defaultdict(dict)
+        self._gauges: Dict[str, Dict[LabelKey, float]] = defaultdict(dict)
+        self._summaries: Dict[str, Dict[LabelKey, list]] = defaultdict(dict)  # [count, sum, max]
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._gauges[name][key] = value
+
+    def add(self, name: str, value: float, **labels) -> None:
+        """Cộng dồn vào gauge (có thể âm)."""
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges[name]
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            s = self._summaries[name].setdefault(key, [0, 0.0, 0.0])
+            s[0] += 1
+            s[1] += value
+            s[2] = max(s[2], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Trả dict JSON-friendly (dùng cho debug / dashboard)."""
+        with self._lock:
+            out: Dict[str, Any] = {}
+            for name, series in self._counters.items():
+                out[name] = {_fmt_labels(k) or "_": v for k, v in series.items()}
+            for name, series in self._gauges.items():
+                out[name] = {_fmt_labels(k) or "_": v for k, v in series.items()}
+            for name, series in self._summaries.items():
+                out[name] = {
+                    _fmt_labels(k) or "_": {"count": c, "sum": round(s, 6), "max": round(m, 6)}
+                    for k, (c, s, m) in series.items()
+                }
+            return out
+
+    def render(self) -> str:
+        """Định dạng text exposition của Prometheus."""
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name, series in sorted(store.items()):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for key, v in series.items():
+                        lines.append(f"{name}{_fmt_labels(key)} {v}")
+            for name, series in sorted(self._summaries.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} summary")
+                for key, (c, s, m) in series.items():
+                    lbl = _fmt_labels(key)
+                    lines.append(f"{name}_count{lbl} {c}")
+                    lines.append(f"{name}_sum{lbl} {s}")
+                    lines.append(f"{name}_max{lbl} {m}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
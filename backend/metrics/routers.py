@@ -0,0 +1,32 @@
+import hmac
+import os
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import PlainTextResponse
+
+from backend.auth.providers.auth_providers import AuthProvider, CREDENTIALS_EXCEPTION
+from backend.metrics.controllers import metrics
+
+router = APIRouter(tags=["Metrics"])
+auth_handler = AuthProvider()
+
+# Token riêng cho hệ thống giám sát (Prometheus: authorization.credentials), không đặt -> chỉ admin
+METRICS_SCRAPE_TOKEN = os.getenv("METRICS_SCRAPE_TOKEN")
+
+
+async def verify_metrics_access(Authorization: Optional[str] = Header(None)) -> None:
+    """Cho qua nếu Bearer = METRICS_SCRAPE_TOKEN, ngược lại bắt buộc JWT admin / lễ tân."""
+    scheme, _, credentials = (Authorization or "").partition(" ")
+    credentials = credentials.strip()
+    if scheme.lower() != "bearer" or not credentials:
+        raise CREDENTIALS_EXCEPTION
+    if METRICS_SCRAPE_TOKEN and hmac.compare_digest(credentials.encode(), METRICS_SCRAPE_TOKEN.encode()):
+        return
+    await auth_handler.get_current_admin_user(credentials)
+
+
+# API: Xuất metrics in-process (định dạng Prometheus) cho hệ thống giám sát scrape
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(verify_metrics_access)])
+def api_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
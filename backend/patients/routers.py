@@ -1,8 +1,7 @@
 from typing import Optional
 from fastapi import APIRouter, Depends, Query, status
-from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer
-from fastapi.responses import JSONResponse
+from backend.common.responses import FastJSONResponse
 
 from backend.auth.providers.partient_provider import PatientProvider, AuthUser
 from backend.auth.providers.auth_providers import AuthProvider, AdminUser
@@ -28,9 +27,9 @@ auth_patient_handler = PatientProvider()
 @router.get("/me", response_model=PatientResponseModel)
 def get_me(current_user: AuthUser = Depends(auth_patient_handler.get_current_patient_user)):
     patient = get_patient_profile(current_user)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(patient)
+        content=patient
     )
 
 
@@ -43,9 +42,9 @@ def update_me_api(
     patient_id = current_user["id"]
     update_patient(patient_id, data)
     updated = get_patient_by_id(patient_id)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(updated)
+        content=updated
     )
 
 # Admin: Lấy danh sách bệnh nhân
@@ -57,9 +56,9 @@ def get_all_patients_api(
     search: str = Query("", description="Từ khóa tìm kiếm (tên, CCCD, SDT, ...)")
 ):
     result = get_all_patients(limit, offset, search)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(result)
+        content=result
     )
 
 # Admin: Lấy chi tiết bệnh nhân theo ID
@@ -69,9 +68,9 @@ def get_patient_api(
     current_user: AdminUser = Depends(auth_admin_handler.get_current_admin_user),
 ):
     patient = get_patient_by_id(patient_id)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(patient)
+        content=patient
     )
 # Admin: Cập nhật thông tin bệnh nhân theo ID
 @router.put("/{patient_id}", response_model=PatientResponseModel)
@@ -81,15 +80,15 @@ def update_patient_api(
     current_user: AdminUser = Depends(auth_admin_handler.get_current_admin_user),
 ):
     if patient_id != patient_details.id:
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"detail": "ID trong URL và trong payload không khớp"},
         )
     update_patient(patient_id, patient_details)
     updated = get_patient_by_id(patient_id)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status.HTTP_200_OK,
-        content=jsonable_encoder(updated)
+        content=updated
     )
 
 
@@ -100,4 +99,4 @@ def delete_patient_api(
     current_user: AdminUser = Depends(auth_admin_handler.get_current_admin_user),
 ):
     delete_patient_by_id(patient_id)
-    return JSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
+    return FastJSONResponse(status_code=status.HTTP_204_NO_CONTENT, content=None)
@@ -1,8 +1,12 @@
-import os, time, secrets, json, httpx
+import os, time, secrets, json
 from typing import Optional, Dict, Any
 from fastapi import HTTPException, status
 from backend.database.connector import DatabaseConnector
 from .models import Bank_informayion
+from .waiters import order_waiters
+from backend.statistics.controllers import record_payment
+from backend.statistics.today import today_counters
+from backend.appointments.facets import invalidate_facets
 import re
 
 # ENV
@@ -61,9 +65,14 @@ async def create_payment_order(
                 """, (appointment_id, appt["patient_id"], appt["clinic_id"],
                       appt["service_id"], order_code, amount))
                 po_id = cur.lastrowid
+                # Con trỏ đơn mới nhất (đọc danh sách/phiếu khám join thẳng, không GROUP BY)
+                cur.execute("""
+                    UPDATE appointments SET latest_payment_order_id=%s WHERE id=%s
+                """, (po_id, appointment_id))
             conn.commit()
     except Exception as e:
         raise HTTPException(500, f"DB error: {e}")
+    invalidate_facets()
 
     bank_if = db.query_get("""
         SELECT a.account_number, a.bank_name, a.va
@@ -86,6 +95,7 @@ async def create_payment_order(
         SET status='AWAITING', sepay_order_id=%s, va_number=%s, qr_code_url=%s
         WHERE id=%s
     """, (appointment_id, va, qr_code_url, po_id))
+    invalidate_facets()
 
     return {
         "payment_order_id": po_id,
@@ -150,6 +160,33 @@ def extract_order_code_from_content(content: str) -> Optional[str]:
         return match.group(0)
     return None
 
+def _mark_order_paid(payment_order_id: int) -> None:
+    """PAID + con trỏ đơn mới nhất + rollup doanh thu trong cùng 1 transaction."""
+    conn = db.get_connection()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    UPDATE payment_orders po
+                    LEFT JOIN appointments a ON a.id = po.appointment_id
+                    SET po.status='PAID', po.paid_at=NOW(),
+                        a.latest_payment_order_id = GREATEST(COALESCE(a.latest_payment_order_id, 0), po.id)
+                    WHERE po.id=%s AND po.status IN ('PENDING','AWAITING')
+                """, (payment_order_id,))
+                # Chỉ cộng doanh thu nếu chính request này chuyển đơn sang PAID
+                changed = cur.rowcount > 0
+                if changed:
+                    record_payment(cur, payment_order_id)
+                    cur.execute("SELECT clinic_id FROM payment_orders WHERE id=%s", (payment_order_id,))
+                    po = cur.fetchone()
+            conn.commit()
+            if changed and po:
+                today_counters.on_paid(po["clinic_id"])
+            if changed:
+                invalidate_facets()
+    except Exception as e:
+        raise HTTPException(500, f"DB error: {e}")
+
 def handle_sepay_webhook(payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Xử lý webhook biến động/VA: idempotent + map về payment_orders bằng code.
@@ -187,13 +224,18 @@ def handle_sepay_webhook(payload: Dict[str, Any]) -> Dict[str, Any]:
             po = rows[0]
             if po["status"] in ("PENDING", "AWAITING"):
                 if amount >= po["amount_vnd"]:
+                    _mark_order_paid(po["id"])
+                    order_waiters.notify(order_code, "PAID")
+                elif 0 < amount < po["amount_vnd"]:
                     db.query_put("""
-                        UPDATE payment_orders
-                        SET status='PAID', paid_at=NOW()
-                        WHERE id=%s
+                        UPDATE payment_orders po
+                        LEFT JOIN appointments a ON a.id = po.appointment_id
+                        SET po.status='PARTIALLY',
+                            a.latest_payment_order_id = GREATEST(COALESCE(a.latest_payment_order_id, 0), po.id)
+                        WHERE po.id=%s
                     """, (po["id"],))
-                elif 0 < amount < po["amount_vnd"]:
-                    db.query_put("UPDATE payment_orders SET status='PARTIALLY' WHERE id=%s", (po["id"],))
+                    invalidate_facets()
+                    order_waiters.notify(order_code, "PARTIALLY")
     else:
         return {"success": "khong co code"}
 
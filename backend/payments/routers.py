@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException, Header, Request, Depends, status
+import asyncio
+from fastapi import APIRouter, HTTPException, Header, Request, Depends, Query, status
+from starlette.concurrency import run_in_threadpool
+from backend.common.responses import FastJSONResponse
 from .models import CreateOrderIn, CreateOrderOut, PaymentOrderOut, Bank_informayion
 from backend.auth.providers.partient_provider import PatientProvider, AuthUser
 from backend.auth.providers.auth_providers import AuthProvider, AdminUser
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
 from .controllers import (
     create_payment_order,
     get_payment_order_by_code,
@@ -12,6 +13,7 @@ from .controllers import (
     update_bank_account,
     get_bank_information
 )
+from .waiters import order_waiters
 
 auth_patient_handler = PatientProvider()
 auth_user_handler = AuthProvider()
@@ -43,6 +45,26 @@ def get_order(
         raise HTTPException(status_code=404, detail="Order not found")
     return data
 
+# Long-poll: giữ request tới khi webhook báo PAID/PARTIALLY hoặc hết timeout
+@router.get("/orders/{order_code}/wait", response_model=PaymentOrderOut)
+async def wait_order(
+    order_code: str,
+    timeout: int = Query(25, ge=1, le=55, description="Số giây tối đa giữ request"),
+    current_user: AuthUser = Depends(auth_patient_handler.get_current_patient_user),
+):
+    # đăng ký waiter trước rồi mới đọc DB: webhook tới giữa 2 bước vẫn đánh thức được
+    with order_waiters.subscribe(order_code) as fut:
+        data = await run_in_threadpool(get_payment_order_by_code, order_code, current_user["id"])
+        if not data:
+            raise HTTPException(status_code=404, detail="Order not found")
+        if data["status"] in ("PAID", "PARTIALLY"):
+            return data
+        try:
+            await asyncio.wait_for(fut, timeout=timeout)
+        except asyncio.TimeoutError:
+            return data
+    return await run_in_threadpool(get_payment_order_by_code, order_code, current_user["id"])
+
 # Webhook từ SePay (money-in)
 @router.post("/webhooks/sepay")
 async def sepay_webhook(request: Request, Authorization: str = Header(None)):
@@ -62,4 +84,4 @@ async def get_bank(
     current_user: AdminUser = Depends(auth_user_handler.get_current_admin_user)
     ):
     bank = get_bank_information()
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(bank))
\ No newline at end of file
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=bank)
\ No newline at end of file
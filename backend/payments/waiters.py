@@ -0,0 +1,64 @@
+"""
+Long-poll cho trạng thái đơn thanh toán.
+
+Request GET /payments/orders/{order_code}/wait "đỗ" trên 1 future theo
+order_code; handle_sepay_webhook gọi notify() khi đơn chuyển PAID/PARTIALLY
+để đánh thức. Client không còn poll DB mỗi 5 giây.
+Waiter nằm trong process -> webhook và client phải tới cùng worker.
+"""
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Set, Tuple
+
+_Waiter = Tuple[asyncio.AbstractEventLoop, asyncio.Future]
+
+
+def _resolve(fut: asyncio.Future, value: str) -> None:
+    if not fut.done():
+        fut.set_result(value)
+
+
+class OrderWaiters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Set[_Waiter]] = {}
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(v) for v in self._waiters.values())
+
+    @contextmanager
+    def subscribe(self, order_code: str) -> Iterator[asyncio.Future]:
+        """
+        Đăng ký future chờ order_code; luôn huỷ đăng ký khi ra khỏi khối with.
+        Đăng ký TRƯỚC khi đọc trạng thái từ DB -> webhook tới xen giữa không bị lỡ.
+        """
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        waiter = (loop, fut)
+        with self._lock:
+            self._waiters.setdefault(order_code, set()).add(waiter)
+        try:
+            yield fut
+        finally:
+            with self._lock:
+                ws = self._waiters.get(order_code)
+                if ws is not None:
+                    ws.discard(waiter)
+                    if not ws:
+                        self._waiters.pop(order_code, None)
+
+    def notify(self, order_code: str, new_status: str) -> int:
+        """Đánh thức mọi request đang chờ order_code (gọi được từ thread bất kỳ)."""
+        with self._lock:
+            ws = list(self._waiters.get(order_code, ()))
+        for loop, fut in ws:
+            try:
+                loop.call_soon_threadsafe(_resolve, fut, new_status)
+            except RuntimeError:
+                pass
+        return len(ws)
+
+
+order_waiters = OrderWaiters()
@@ -0,0 +1,101 @@
+"""
+Publisher in-process cho số chỗ còn lại của ca (SSE).
+
+Các luồng làm thay đổi booked_patients (đặt lịch, hủy, bác sĩ đổi trạng thái)
+gọi publish_schedule(row) sau khi commit; mọi client đang nghe stream
+(clinic_id, doctor_id, work_date) nhận sự kiện "remaining" thay vì poll
+/schedule-doctors/day-shifts. Code ghi chạy trong threadpool nên việc đẩy vào
+asyncio.Queue của từng subscriber đi qua loop.call_soon_threadsafe.
+
+Lưu ý: fan-out nằm trong 1 process -> chạy 1 worker uvicorn (hoặc sticky).
+"""
+import asyncio
+import threading
+from datetime import date, datetime
+from typing import Any, Dict, Set, Tuple
+
+StreamKey = Tuple[int, int, str]   # (clinic_id, doctor_id, 'YYYY-MM-DD')
+
+QUEUE_SIZE = 100
+
+
+def stream_key(clinic_id: int, doctor_id: int, work_date: Any) -> StreamKey:
+    if isinstance(work_date, datetime):
+        work_date = work_date.date()
+    if isinstance(work_date, date):
+        work_date = work_date.isoformat()
+    return int(clinic_id), int(doctor_id), str(work_date)
+
+
+class _Subscriber:
+    __slots__ = ("loop", "queue")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        # Chạy trên event loop của subscriber
+        if self.queue.full():
+            # số chỗ là trạng thái -> bỏ sự kiện cũ nhất, giữ cái mới
+            try:
+                self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+        self.queue.put_nowait(event)
+
+
+class AvailabilityPublisher:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: Dict[StreamKey, Set[_Subscriber]] = {}
+
+    def subscribe(self, key: StreamKey) -> _Subscriber:
+        sub = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subs.setdefault(key, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, key: StreamKey, sub: _Subscriber) -> None:
+        with self._lock:
+            subs = self._subs.get(key)
+            if subs is None:
+                return
+            subs.discard(sub)
+            if not subs:
+                self._subs.pop(key, None)
+
+    def subscriber_count(self, key: StreamKey) -> int:
+        with self._lock:
+            return len(self._subs.get(key, ()))
+
+    def publish(self, key: StreamKey, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subs.get(key, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:
+                # loop đã đóng (client rớt khi shutdown)
+                self.unsubscribe(key, sub)
+
+
+availability_publisher = AvailabilityPublisher()
+
+
+def publish_schedule(row: Dict[str, Any]) -> None:
+    """
+    row: 1 dòng doctor_schedules có id, clinic_id, doctor_id, work_date,
+    max_patients, booked_patients (giá trị SAU khi cập nhật).
+    """
+    if not row:
+        return
+    key = stream_key(row["clinic_id"], row["doctor_id"], row["work_date"])
+    booked = int(row["booked_patients"])
+    max_p = int(row["max_patients"])
+    availability_publisher.publish(key, {
+        "schedule_id": int(row["id"]),
+        "booked_patients": booked,
+        "max_patients": max_p,
+        "remaining": max(max_p - booked, 0),
+    })
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta, date, time, timezone
 from fastapi import HTTPException, status
 
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.schedule_doctors.models import (
     ShiftCreateRequestModel,
     MultiShiftBulkCreateRequestModel,
@@ -131,6 +132,7 @@ def create_shift(payload: ShiftCreateRequestModel) -> Dict[str, Any]:
             """,
             (sched_id,),
         )
+        catalog_versions.bump("schedules")
         if not row:
             raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, "Không đọc được ca vừa tạo")
         return row
@@ -403,6 +405,8 @@ def update_day_shifts_for_doctor(doctor_id: int, payload: DayUpsertRequest) -> D
         except Exception as e:
             raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {repr(e)}")
 
+    if updated:
+        catalog_versions.bump("schedules")
     return {"message": "Cập nhật ca trong ngày thành công", "updated": updated, "missing_schedule_ids": missing}
 
 def update_day_shifts_for_user(current_user: Any, payload: DayUpsertRequest) -> Dict[str, Any]:
@@ -423,6 +427,8 @@ def delete_shifts_by_ids_for_doctor(doctor_id: int, clinic_id: int, schedule_ids
     """
     try:
         affected = db.query_put(sql, (doctor_id, clinic_id, *schedule_ids))
+        if affected:
+            catalog_versions.bump("schedules")
         return {"deleted": affected or 0}
     except Exception as e:
         raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database error: {repr(e)}")
@@ -1,8 +1,10 @@
+import asyncio
 from typing import List
 from datetime import date as date_type
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from backend.common.responses import FastJSONResponse, dumps
 
 from backend.auth.providers.partient_provider import PatientProvider, AuthUser
 from backend.auth.providers.auth_providers import AuthProvider, DoctorUser, AdminUser
@@ -26,6 +28,7 @@ from backend.schedule_doctors.controllers import (
     delete_shifts_by_ids_for_user,
     delete_shifts_by_ids_for_doctor,
 )
+from backend.schedule_doctors.availability import availability_publisher, stream_key
 
 router = APIRouter(prefix="/schedule-doctors", tags=["Schedule Doctors"])
 auth_handler = AuthProvider()
@@ -37,12 +40,49 @@ patient_handler = PatientProvider()
 @router.get("/calendar", response_model=List[CalendarDayDTO])
 def api_calendar(doctor_id: int, clinic_id: int, month: str):
     data = get_calendar_days(doctor_id, clinic_id, month)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 @router.get("/day-shifts", response_model=List[DayShiftDTO])
 def api_day_shifts(doctor_id: int, clinic_id: int, work_date: str):
     data = get_day_shifts(doctor_id, clinic_id, work_date)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
+
+SSE_HEARTBEAT_SECONDS = 15
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+# Stream SSE số chỗ còn lại theo (clinic, doctor, ngày) -> kiosk không cần poll day-shifts
+@router.get("/stream")
+async def api_day_shifts_stream(request: Request, doctor_id: int, clinic_id: int, work_date: date_type):
+    key = stream_key(clinic_id, doctor_id, work_date)
+
+    async def events():
+        # subscribe trong generator: client rớt trước lần lặp đầu -> không có subscriber mồ côi;
+        # đăng ký trước khi lấy snapshot để không lỡ sự kiện xen giữa
+        sub = availability_publisher.subscribe(key)
+        try:
+            try:
+                snapshot = await run_in_threadpool(get_day_shifts, doctor_id, clinic_id, work_date)
+            except HTTPException:
+                snapshot = []
+            yield _sse("snapshot", snapshot)
+            while True:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                    yield _sse("remaining", event)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keep-alive\n\n"
+        finally:
+            availability_publisher.unsubscribe(key, sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # =======================
 # TẠO 1 CA (single)
@@ -53,7 +93,7 @@ def api_create_shift_self(
     current_user: DoctorUser = Depends(auth_handler.get_current_doctor_user),
 ):
     data = create_shift_for_user(current_user, payload)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 @router.post("/shifts/{doctor_id}", response_model=ShiftResponseModel)
 def api_create_shift_for_doctor_route(
@@ -62,7 +102,7 @@ def api_create_shift_for_doctor_route(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     data = create_shift_for_doctor(doctor_id, payload)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 # =======================
 # TẠO NHIỀU NGÀY (bulk)
@@ -73,7 +113,7 @@ def api_bulk_create_shifts(
     current_user: DoctorUser = Depends(auth_handler.get_current_doctor_user),
 ):
     data = bulk_create_shifts(payload)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 @router.post("/shifts/bulk/{doctor_id}")
 def api_bulk_create_shifts_for_doctor_route(
@@ -82,7 +122,7 @@ def api_bulk_create_shifts_for_doctor_route(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     data = bulk_create_shifts_for_doctor(doctor_id, payload)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 # =======================
 # UPDATE THEO NGÀY (schedule_id)
@@ -93,7 +133,7 @@ def api_day_update_self(
     current_user: DoctorUser = Depends(auth_handler.get_current_doctor_user),
 ):
     data = update_day_shifts_for_user(current_user, payload)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 @router.put("/day/{doctor_id}")
 def api_day_update_admin(
@@ -102,7 +142,7 @@ def api_day_update_admin(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     data = update_day_shifts_for_doctor(doctor_id, payload)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 # =======================
 # DELETE THEO schedule_id (nhiều id một lần)
@@ -114,7 +154,7 @@ def api_day_delete_self(
     current_user: DoctorUser = Depends(auth_handler.get_current_doctor_user),
 ):
     data = delete_shifts_by_ids_for_user(current_user, clinic_id, schedule_ids)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 @router.delete("/day/{doctor_id}")
 def api_day_delete_admin(
@@ -124,5 +164,5 @@ def api_day_delete_admin(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
 ):
     data = delete_shifts_by_ids_for_doctor(doctor_id, clinic_id, schedule_ids)
-    return JSONResponse(status_code=status.HTTP_200_OK, content=jsonable_encoder(data))
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
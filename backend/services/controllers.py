@@ -1,6 +1,7 @@
 from fastapi import HTTPException, status
 from typing import List, Dict, Any
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.services.models import ServiceCreateModel, ServiceUpdateModel
 
 db = DatabaseConnector()
@@ -45,6 +46,7 @@ def create_service(data: ServiceCreateModel) -> Dict[str, Any]:
             "sp_create_service",
             (data.name, data.description, data.price)
         )
+        catalog_versions.bump("services")
         return result[0] if result else {}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stored procedure error: {e}")
@@ -58,6 +60,7 @@ def update_service(data: ServiceUpdateModel) -> Dict[str, Any]:
         )
         if not result:
             raise HTTPException(status_code=404, detail="Dịch vụ không tồn tại")
+        catalog_versions.bump("services")
         return result[0]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stored procedure error: {e}")
@@ -66,5 +69,6 @@ def update_service(data: ServiceUpdateModel) -> Dict[str, Any]:
 def delete_service(service_id: int) -> None:
     try:
         db.call_procedure("sp_delete_service", (service_id,))
+        catalog_versions.bump("services")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Stored procedure error: {e}")
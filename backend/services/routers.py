@@ -1,8 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request
 from typing import List
-from fastapi.encoders import jsonable_encoder
 from typing import Annotated
+from backend.common.responses import FastJSONResponse
+from backend.common.etag import catalog_versions, etag_matches, not_modified, etag_headers
 from backend.auth.providers.auth_providers import AuthProvider, AdminUser
 
 from backend.services.controllers import (
@@ -22,9 +22,14 @@ router = APIRouter(prefix="/services", tags=["Services"])
 # API: Lấy danh sách dịch vụ (có thể filter theo bảo hiểm)
 @router.get("/")
 def list_services(
+    request: Request,
     has_insurances: Annotated[bool, Query(description="Có sử dụng bảo hiểm hay không")] = False
 ):
-    return get_all_services(has_insurances)
+    etag = catalog_versions.etag("services", extra=f"ins{int(has_insurances)}")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    data = get_all_services(has_insurances)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data, headers=etag_headers(etag))
 
 
 # API: Lấy chi tiết 1 dịch vụ theo ID
@@ -45,7 +50,7 @@ def get_my_services(current_user = Depends(auth_handler.get_current_doctor_user)
         raise HTTPException(status_code=401, detail="Token thiếu user_id")
 
     data = get_my_services_by_user(int(user_id))
-    return jsonable_encoder(data)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
 
 
 # API: Tạo mới dịch vụ (chỉ admin)
@@ -55,7 +60,7 @@ def api_create_service(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user)
 ):
     create_service(data)
-    return JSONResponse(status_code=201, content={"message": "Tạo dịch vụ thành công"})
+    return FastJSONResponse(status_code=201, content={"message": "Tạo dịch vụ thành công"})
 
 
 # API: Cập nhật dịch vụ (chỉ admin)
@@ -65,7 +70,7 @@ def api_update_service(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user)
 ):
     update_service(data)
-    return JSONResponse(status_code=200, content={"message": "Cập nhật dịch vụ thành công"})
+    return FastJSONResponse(status_code=200, content={"message": "Cập nhật dịch vụ thành công"})
 
 
 # API: Xoá 1 dịch vụ theo ID (chỉ admin)
@@ -75,4 +80,4 @@ def api_delete_service(
     current_user: AdminUser = Depends(auth_handler.get_current_admin_user)
 ):
     delete_service(service_id)
-    return JSONResponse(status_code=200, content={"message": "Xoá dịch vụ thành công"})
+    return FastJSONResponse(status_code=200, content={"message": "Xoá dịch vụ thành công"})
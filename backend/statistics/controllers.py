@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from backend.database.connector import DatabaseConnector
+from backend.statistics.models import StatisticsFilterModel
+
+db = DatabaseConnector()
+VN_TZ = timezone(timedelta(hours=7))
+
+# trạng thái lịch hẹn -> cột rollup
+STATUS_COLUMNS = {2: "completions", 3: "no_shows", 4: "cancellations"}
+_COUNTER_COLUMNS = ("bookings", "completions", "no_shows", "cancellations", "paid_orders", "revenue_vnd")
+
+# ============================================================
+# Ghi rollup (gọi bên trong transaction của luồng nghiệp vụ)
+# ============================================================
+
+def bump_rollup(cur, appointment_id: int, **deltas: int) -> None:
+    """
+    Cộng dồn delta vào dòng stats_daily của 1 lịch hẹn (upsert).
+    Ngày = DATE(a.effective_time), cùng cơ sở với backfill trong migration 005
+    -> backfill lại lịch sử không làm lệch tổng theo ngày.
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    for k in deltas:
+        if k not in _COUNTER_COLUMNS:
+            raise ValueError(f"Cột rollup không hợp lệ: {k}")
+    cols = ", ".join(deltas)
+    marks = ", ".join(["%s"] * len(deltas))
+    updates = ", ".join(f"{k} = {k} + VALUES({k})" for k in deltas)
+    cur.execute(
+        f"""
+        INSERT INTO stats_daily (stat_date, clinic_id, doctor_id, service_id, {cols})
+        SELECT DATE(a.effective_time), a.clinic_id, a.doctor_id, a.service_id, {marks}
+        FROM appointments a
+        WHERE a.id = %s
+        ON DUPLICATE KEY UPDATE {updates}
+        """,
+        (*deltas.values(), appointment_id),
+    )
+
+def record_booking(cur, appt: Dict[str, Any]) -> None:
+    bump_rollup(cur, appt["id"], bookings=1)
+
+def record_status_change(cur, appt: Dict[str, Any], old_status: int, new_status: int) -> None:
+    """appt cần id (ngày / phòng khám / bác sĩ / dịch vụ đọc lại từ appointments)."""
+    deltas: Dict[str, int] = {}
+    if old_status in STATUS_COLUMNS:
+        deltas[STATUS_COLUMNS[old_status]] = deltas.get(STATUS_COLUMNS[old_status], 0) - 1
+    if new_status in STATUS_COLUMNS:
+        deltas[STATUS_COLUMNS[new_status]] = deltas.get(STATUS_COLUMNS[new_status], 0) + 1
+    bump_rollup(cur, appt["id"], **deltas)
+
+def record_payment(cur, payment_order_id: int) -> None:
+    """Đơn vừa chuyển PAID -> cộng doanh thu vào ngày thanh toán."""
+    cur.execute(
+        """
+        INSERT INTO stats_daily (stat_date, clinic_id, doctor_id, service_id, paid_orders, revenue_vnd)
+        SELECT DATE(po.paid_at), a.clinic_id, a.doctor_id, a.service_id, 1, po.amount_vnd
+        FROM payment_orders po
+        JOIN appointments a ON a.id = po.appointment_id
+        WHERE po.id = %s AND po.status = 'PAID'
+        ON DUPLICATE KEY UPDATE
+            paid_orders = paid_orders + VALUES(paid_orders),
+            revenue_vnd = revenue_vnd + VALUES(revenue_vnd)
+        """,
+        (payment_order_id,),
+    )
+
+# ============================================================
+# Đọc thống kê
+# ============================================================
+
+_GROUPS = {
+    "day":     ("DATE_FORMAT(sd.stat_date, '%%Y-%%m-%%d')", "NULL", ""),
+    "clinic":  ("sd.clinic_id",  "c.name",      "LEFT JOIN clinics  c ON c.id = sd.clinic_id"),
+    "doctor":  ("sd.doctor_id",  "d.full_name", "LEFT JOIN doctors  d ON d.id = sd.doctor_id"),
+    "service": ("sd.service_id", "s.name",      "LEFT JOIN services s ON s.id = sd.service_id"),
+}
+
+def _row(r: Dict[str, Any]) -> Dict[str, Any]:
+    out = {"key": str(r["key"]), "label": r.get("label")}
+    for k in _COUNTER_COLUMNS:
+        out[k] = int(r.get(k) or 0)
+    return out
+
+def get_statistics_summary(filters: StatisticsFilterModel) -> Dict[str, Any]:
+    today = datetime.now(VN_TZ).date()
+    to_date = filters.to_date or today
+    from_date = filters.from_date or (to_date - timedelta(days=29))
+    if from_date > to_date:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "from_date phải <= to_date")
+
+    key_expr, label_expr, join = _GROUPS[filters.group_by]
+    where = ["sd.stat_date BETWEEN %s AND %s"]
+    params: list = [from_date, to_date]
+    for col in ("clinic_id", "doctor_id", "service_id"):
+        val = getattr(filters, col)
+        if val is not None:
+            where.append(f"sd.{col} = %s")
+            params.append(val)
+
+    sums = ", ".join(f"SUM(sd.{k}) AS {k}" for k in _COUNTER_COLUMNS)
+    rows = db.query_get(
+        f"""
+        SELECT {key_expr} AS `key`, {label_expr} AS label, {sums}
+        FROM stats_daily sd
+        {join}
+        WHERE {" AND ".join(where)}
+        GROUP BY `key`, label
+        ORDER BY `key`
+        """,
+        tuple(params),
+    )
+    items = [_row(r) for r in rows]
+    totals = {"key": "total", "label": None}
+    for k in _COUNTER_COLUMNS:
+        totals[k] = sum(i[k] for i in items)
+    return {
+        "from_date": from_date,
+        "to_date": to_date,
+        "group_by": filters.group_by,
+        "totals": totals,
+        "rows": items,
+    }
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from datetime import date, datetime
+from typing import Optional, Literal
+
+class StatisticsFilterModel(BaseModel):
+    from_date: Optional[date] = Field(None, description="Mặc định: 30 ngày trước")
+    to_date: Optional[date] = Field(None, description="Mặc định: hôm nay")
+    group_by: Literal["day", "clinic", "doctor", "service"] = "day"
+    clinic_id: Optional[int] = None
+    doctor_id: Optional[int] = None
+    service_id: Optional[int] = None
+
+class StatisticsRowModel(BaseModel):
+    key: str                   # ngày (YYYY-MM-DD) hoặc id phòng khám / bác sĩ / dịch vụ
+    label: Optional[str] = None
+    bookings: int
+    completions: int
+    no_shows: int
+    cancellations: int
+    paid_orders: int
+    revenue_vnd: int
+
+class StatisticsSummaryModel(BaseModel):
+    from_date: date
+    to_date: date
+    group_by: str
+    totals: StatisticsRowModel
+    rows: list[StatisticsRowModel]
+
+class TodayCounterModel(BaseModel):
+    booked: int
+    waiting: int
+    completed: int
+    paid: int
+
+class TodayClinicCounterModel(TodayCounterModel):
+    clinic_id: int
+
+class TodayCountersModel(BaseModel):
+    stat_date: Optional[date] = None
+    reconciled_at: Optional[datetime] = None
+    totals: TodayCounterModel
+    clinics: list[TodayClinicCounterModel]
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, status
+from backend.common.responses import FastJSONResponse
+
+from backend.auth.providers.auth_providers import AuthProvider, AdminUser
+from backend.statistics.models import StatisticsFilterModel, StatisticsSummaryModel, TodayCountersModel
+from backend.statistics.controllers import get_statistics_summary
+from backend.statistics.today import today_counters
+
+router = APIRouter(prefix="/statistics", tags=["Statistics"])
+auth_handler = AuthProvider()
+
+
+# API: Thống kê đặt lịch / hoàn thành / vắng / doanh thu theo ngày, phòng khám, bác sĩ, dịch vụ
+@router.get("/summary", response_model=StatisticsSummaryModel)
+def api_statistics_summary(
+    filters: StatisticsFilterModel = Depends(),
+    current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
+):
+    data = get_statistics_summary(filters)
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
+
+
+# API: Số liệu "hôm nay" theo phòng khám (đọc từ bộ nhớ, không query DB)
+@router.get("/today", response_model=TodayCountersModel)
+def api_statistics_today(
+    current_user: AdminUser = Depends(auth_handler.get_current_admin_user),
+):
+    data = today_counters.snapshot()
+    return FastJSONResponse(status_code=status.HTTP_200_OK, content=data)
@@ -0,0 +1,165 @@
+"""
+Bộ đếm "hôm nay" theo phòng khám, giữ trong bộ nhớ cho dashboard admin.
+
+- booked:    số lịch đặt cho hôm nay (không trừ khi hủy)
+- waiting:   số lịch đang chờ (status 0/1)
+- completed: số lịch đã khám xong (status 2)
+- paid:      số đơn thanh toán PAID trong ngày
+
+Seed từ MySQL khi khởi động / khi sang ngày mới, các luồng đặt lịch, hủy,
+đổi trạng thái và webhook thanh toán cập nhật trực tiếp, và một task nền
+đối soát lại với DB định kỳ (RECONCILE_SECONDS) để sửa lệch do nhiều worker
+hoặc thay đổi ngoài ứng dụng. Lần đối soát lỗi được ghi log và đếm vào
+metrics (today_counters_reconcile_failures_total); gauge
+today_counters_last_reconcile_ok = 0 nghĩa là bộ đếm có thể đang lệch DB.
+"""
+import asyncio
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from backend.database.connector import DatabaseConnector
+from backend.metrics.controllers import metrics
+
+db = DatabaseConnector()
+logger = logging.getLogger(__name__)
+VN_TZ = timezone(timedelta(hours=7))
+RECONCILE_SECONDS = int(os.getenv("TODAY_COUNTERS_RECONCILE_SECONDS", "300"))
+FIELDS = ("booked", "waiting", "completed", "paid")
+
+
+def _today() -> date:
+    return datetime.now(VN_TZ).date()
+
+
+def _as_date(v: Any) -> Optional[date]:
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    return None
+
+
+class TodayCounterStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._day: Optional[date] = None
+        self._counts: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        self._reconciled_at: Optional[datetime] = None
+
+    # ---------- seed / đối soát ----------
+    def _load(self, day: date) -> Dict[int, Dict[str, int]]:
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        counts: Dict[int, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+        for r in db.query_get(
+            """
+            SELECT clinic_id,
+                   COUNT(*)                AS booked,
+                   SUM(status IN (0,1))    AS waiting,
+                   SUM(status = 2)         AS completed
+            FROM appointments
+            WHERE effective_time >= %s AND effective_time < %s
+            GROUP BY clinic_id
+            """,
+            (start, end),
+        ):
+            c = counts[int(r["clinic_id"])]
+            c["booked"] = int(r["booked"] or 0)
+            c["waiting"] = int(r["waiting"] or 0)
+            c["completed"] = int(r["completed"] or 0)
+        for r in db.query_get(
+            """
+            SELECT clinic_id, COUNT(*) AS paid
+            FROM payment_orders
+            WHERE status = 'PAID' AND paid_at >= %s AND paid_at < %s
+            GROUP BY clinic_id
+            """,
+            (start, end),
+        ):
+            counts[int(r["clinic_id"])]["paid"] = int(r["paid"] or 0)
+        return counts
+
+    def reconcile(self) -> None:
+        """Nạp lại toàn bộ số đếm hôm nay từ MySQL (seed / đối soát / sang ngày)."""
+        day = _today()
+        counts = self._load(day)
+        with self._lock:
+            self._day = day
+            self._counts = counts
+            self._reconciled_at = datetime.now(VN_TZ).replace(tzinfo=None)
+
+    def _ensure_day(self) -> None:
+        with self._lock:
+            stale = self._day != _today()
+        if stale:
+            self.reconcile()
+
+    # ---------- cập nhật từ các luồng nghiệp vụ ----------
+    def _apply(self, clinic_id: int, day: Any, **deltas: int) -> None:
+        d = _as_date(day) or _today()
+        with self._lock:
+            if self._day is None or d != self._day:
+                # chưa seed hoặc không thuộc hôm nay -> không cần đếm
+                return
+            c = self._counts[int(clinic_id)]
+            for k, v in deltas.items():
+                c[k] = max(c[k] + v, 0)
+
+    def on_booked(self, clinic_id: int, estimated_time: Any) -> None:
+        self._apply(clinic_id, estimated_time, booked=1, waiting=1)
+
+    def on_status_change(self, clinic_id: int, effective_time: Any, old_status: int, new_status: int) -> None:
+        # effective_time = COALESCE(estimated_time, created_at), cùng cơ sở với _load
+        deltas: Dict[str, int] = {}
+        if old_status in (0, 1) and new_status not in (0, 1):
+            deltas["waiting"] = -1
+        elif old_status not in (0, 1) and new_status in (0, 1):
+            deltas["waiting"] = 1
+        if new_status == 2 and old_status != 2:
+            deltas["completed"] = 1
+        elif old_status == 2 and new_status != 2:
+            deltas["completed"] = -1
+        if deltas:
+            self._apply(clinic_id, effective_time, **deltas)
+
+    def on_paid(self, clinic_id: int) -> None:
+        self._apply(clinic_id, _today(), paid=1)
+
+    # ---------- đọc ----------
+    def snapshot(self) -> Dict[str, Any]:
+        self._ensure_day()
+        with self._lock:
+            clinics = [{"clinic_id": cid, **c} for cid, c in sorted(self._counts.items())]
+            totals = {k: sum(c[k] for c in self._counts.values()) for k in FIELDS}
+            return {
+                "stat_date": self._day,
+                "reconciled_at": self._reconciled_at,
+                "totals": totals,
+                "clinics": clinics,
+            }
+
+
+today_counters = TodayCounterStore()
+
+metrics.describe("today_counters_reconcile_failures_total", "Số lần đối soát bộ đếm hôm nay với DB bị lỗi")
+metrics.describe("today_counters_last_reconcile_ok", "1 nếu lần đối soát gần nhất thành công, 0 nếu bộ đếm có thể lệch DB")
+
+
+async def reconcile_loop() -> None:
+    """Task nền: đối soát định kỳ (và tự sang ngày mới)."""
+    while True:
+        await asyncio.sleep(RECONCILE_SECONDS)
+        try:
+            await run_in_threadpool(today_counters.reconcile)
+        except Exception:
+            metrics.inc("today_counters_reconcile_failures_total")
+            metrics.set("today_counters_last_reconcile_ok", 0)
+            logger.exception("today_counters reconcile failed")
+        else:
+            metrics.set("today_counters_last_reconcile_ok", 1)
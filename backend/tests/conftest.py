@@ -0,0 +1,11 @@
+"""
+Test các phần thuần Python (không cần MySQL / SePay).
+
+    python -m pytest backend/tests -q
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
@@ -0,0 +1,162 @@
+import pytest
+from fastapi import HTTPException
+
+from backend.appointments import admission as admission_mod
+from backend.appointments.admission import AdmissionController
+
+CLINIC = 1
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = Clock()
+    monkeypatch.setattr(admission_mod.time, "monotonic", c)
+    monkeypatch.setattr(admission_mod, "ADMIT_RATE", 1.0)
+    monkeypatch.setattr(admission_mod, "ADMIT_BURST", 2.0)
+    monkeypatch.setattr(admission_mod, "RATE_OVERRIDES", {})
+    monkeypatch.setattr(admission_mod, "QUEUE_MAX", 10)
+    monkeypatch.setattr(admission_mod, "ADMIT_TTL", 60.0)
+    monkeypatch.setattr(admission_mod, "QUEUE_IDLE_TTL", 120.0)
+    return c
+
+
+@pytest.fixture
+def ctl(clock):
+    return AdmissionController()
+
+
+def _queued(ctl: AdmissionController, patient_id: int, token=None) -> dict:
+    with pytest.raises(HTTPException) as exc:
+        ctl.admit(CLINIC, patient_id, token)
+    assert exc.value.status_code == 503
+    assert int(exc.value.headers["Retry-After"]) >= 1
+    return exc.value.detail
+
+
+def test_direct_admit_within_burst_then_queue(ctl):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    detail = _queued(ctl, 3)
+    assert detail["admitted"] is False
+    assert detail["position"] == 1
+    assert detail["queue_token"]
+
+
+def test_retry_without_token_reuses_ticket(ctl):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    first = _queued(ctl, 3)
+    again = _queued(ctl, 3)
+    assert again["queue_token"] == first["queue_token"]
+    assert ctl.join(CLINIC, 3)["queue_token"] == first["queue_token"]
+
+
+def test_queued_ticket_admitted_after_refill_and_consumed(ctl, clock):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    token = _queued(ctl, 3)["queue_token"]
+    _queued(ctl, 3, token)                # quay lại -> đủ điều kiện cấp lượt
+    clock.advance(1.0)
+    assert ctl.status(token, 3)["admitted"] is True
+    ctl.admit(CLINIC, 3, token)
+    with pytest.raises(HTTPException) as exc:
+        ctl.status(token, 3)
+    assert exc.value.status_code == 404
+
+
+def test_fifo_between_polled_tickets(ctl, clock):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    t3 = _queued(ctl, 3)["queue_token"]
+    t4 = _queued(ctl, 4)["queue_token"]
+    assert ctl.status(t3, 3)["position"] == 1
+    assert ctl.status(t4, 4)["position"] == 2
+    clock.advance(1.0)
+    assert ctl.status(t4, 4)["admitted"] is False
+    assert ctl.status(t3, 3)["admitted"] is True
+    assert ctl.status(t4, 4)["position"] == 1
+
+
+def test_polled_ticket_blocks_direct_admit(ctl, clock):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    token = _queued(ctl, 3)["queue_token"]
+    ctl.status(token, 3)
+    clock.advance(0.5)                    # chưa đủ 1 token -> bệnh nhân 3 vẫn chờ
+    detail = _queued(ctl, 5)
+    assert detail["position"] == 2
+
+
+def test_unpolled_ticket_does_not_hold_capacity(ctl, clock):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    _queued(ctl, 3)                       # client bỏ đi, không bao giờ quay lại
+    clock.advance(1.0)
+    ctl.admit(CLINIC, 5)                  # token của bucket không bị giữ cho vé bỏ rơi
+
+
+def test_idle_ticket_expires(ctl, clock):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    token = _queued(ctl, 3)["queue_token"]
+    clock.advance(admission_mod.QUEUE_IDLE_TTL + 1)
+    with pytest.raises(HTTPException) as exc:
+        ctl.status(token, 3)
+    assert exc.value.status_code == 404
+
+
+def test_admitted_slot_expires_after_ttl(ctl, clock):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    token = _queued(ctl, 3)["queue_token"]
+    clock.advance(1.0)
+    assert ctl.status(token, 3)["admitted"] is True
+    clock.advance(admission_mod.ADMIT_TTL + 1)
+    with pytest.raises(HTTPException) as exc:
+        ctl.status(token, 3)
+    assert exc.value.status_code == 404
+
+
+def test_token_of_other_patient_is_rejected(ctl):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    token = _queued(ctl, 3)["queue_token"]
+    with pytest.raises(HTTPException) as exc:
+        ctl.status(token, 4)
+    assert exc.value.status_code == 404
+    # token lạ không cho bệnh nhân 4 chen lên đầu hàng
+    detail = _queued(ctl, 4, token)
+    assert detail["queue_token"] != token
+
+
+def test_queue_full_sheds(ctl, monkeypatch):
+    monkeypatch.setattr(admission_mod, "QUEUE_MAX", 1)
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    _queued(ctl, 3)
+    detail = _queued(ctl, 4)
+    assert "queue_token" not in detail
+    assert detail["retry_after"] >= 1
+
+
+def test_clinics_have_separate_buckets(ctl):
+    ctl.admit(CLINIC, 1)
+    ctl.admit(CLINIC, 2)
+    _queued(ctl, 3)
+    ctl.admit(CLINIC + 1, 3)
+
+
+def test_parse_overrides():
+    assert admission_mod._parse_overrides("1:10, 3:2.5,bad,4:x,") == {1: 10.0, 3: 2.5}
+    assert admission_mod._parse_overrides(None) == {}
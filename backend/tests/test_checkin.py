@@ -0,0 +1,93 @@
+from datetime import date, datetime
+
+import pytest
+
+from backend.appointments import checkin
+from backend.appointments.checkin import checkin_key_fingerprint, sign_checkin_payload, verify_checkin_payload
+
+DAY = date(2026, 10, 19)
+
+
+@pytest.fixture(autouse=True)
+def secret(monkeypatch):
+    monkeypatch.setenv("CHECKIN_QR_SECRET", "test-secret")
+    monkeypatch.setattr(checkin, "_key", None)
+
+
+def test_sign_format():
+    payload = sign_checkin_payload(123, DAY)
+    prefix, appt, day, sig = payload.split(".")
+    assert (prefix, appt, day) == ("CK1", "123", "261019")
+    assert len(sig) == 16 and sig.isalnum() and sig.isupper()
+
+
+def test_roundtrip():
+    assert verify_checkin_payload(sign_checkin_payload(123, DAY)) == (123, DAY)
+
+
+def test_accepts_datetime():
+    assert sign_checkin_payload(5, datetime(2026, 10, 19, 14, 0)) == sign_checkin_payload(5, DAY)
+
+
+def test_tolerates_case_and_whitespace():
+    payload = sign_checkin_payload(9, DAY)
+    assert verify_checkin_payload(f"  {payload.lower()}\n") == (9, DAY)
+
+
+@pytest.mark.parametrize("field, value", [(1, "124"), (2, "261020")])
+def test_tampered_body_rejected(field, value):
+    parts = sign_checkin_payload(123, DAY).split(".")
+    parts[field] = value
+    assert verify_checkin_payload(".".join(parts)) is None
+
+
+def test_tampered_signature_rejected():
+    payload = sign_checkin_payload(123, DAY)
+    last = "A" if payload[-1] != "A" else "B"
+    assert verify_checkin_payload(payload[:-1] + last) is None
+
+
+def test_other_key_rejected(monkeypatch):
+    payload = sign_checkin_payload(123, DAY)
+    monkeypatch.setenv("CHECKIN_QR_SECRET", "rotated")
+    monkeypatch.setattr(checkin, "_key", None)
+    assert verify_checkin_payload(payload) is None
+
+
+@pytest.mark.parametrize("payload", [
+    None, "", "CK1", "CK1.1.261019", "CK2.1.261019.AAAAAAAAAAAAAAAA",
+    "CK1.x.261019.AAAAAAAAAAAAAAAA", "CK1.1.2610.AAAAAAAAAAAAAAAA", "CK1.1.261019.AAAA.EXTRA",
+])
+def test_malformed_rejected(payload):
+    assert verify_checkin_payload(payload) is None
+
+
+def test_validly_signed_impossible_date_rejected():
+    body = "CK1.1.261399"
+    assert verify_checkin_payload(f"{body}.{checkin._sign(body)}") is None
+
+
+def test_key_derived_from_app_secret(monkeypatch):
+    monkeypatch.delenv("CHECKIN_QR_SECRET")
+    monkeypatch.setenv("APP_SECRET", "app")
+    payload = sign_checkin_payload(1, DAY)
+    assert verify_checkin_payload(payload) == (1, DAY)
+    # khoá dẫn xuất khác hẳn APP_SECRET thô
+    monkeypatch.setenv("CHECKIN_QR_SECRET", "app")
+    monkeypatch.setattr(checkin, "_key", None)
+    assert verify_checkin_payload(payload) is None
+
+
+def test_missing_secrets_raise(monkeypatch):
+    monkeypatch.delenv("CHECKIN_QR_SECRET")
+    monkeypatch.delenv("APP_SECRET", raising=False)
+    with pytest.raises(EnvironmentError):
+        sign_checkin_payload(1, DAY)
+
+
+def test_fingerprint_follows_key(monkeypatch):
+    fp = checkin_key_fingerprint()
+    assert len(fp) == 8 and "test-secret" not in fp
+    monkeypatch.setenv("CHECKIN_QR_SECRET", "rotated")
+    monkeypatch.setattr(checkin, "_key", None)
+    assert checkin_key_fingerprint() != fp
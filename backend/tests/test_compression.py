@@ -0,0 +1,37 @@
+import pytest
+
+from backend.common import compression
+from backend.common.compression import _parse_accept_encoding, _pick_encoding
+
+
+@pytest.fixture
+def with_brotli(monkeypatch):
+    if compression.brotli is None:
+        monkeypatch.setattr(compression, "brotli", object())
+
+
+def test_parse_q_values():
+    assert _parse_accept_encoding("gzip;q=0.5, BR ; q=1 ,identity;q=0, deflate;q=abc, x;foo=1;q=2") == {
+        "gzip": 0.5, "br": 1.0, "identity": 0.0, "deflate": 0.0, "x": 1.0,
+    }
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip;q=1, br;q=0.5", "gzip"),
+    ("br;q=0, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.3, br;q=0", "gzip"),
+    ("gzip;q=0, *", "br"),
+    ("identity", None),
+    ("", None),
+])
+def test_pick_encoding(with_brotli, accept, expected):
+    assert _pick_encoding(accept) == expected
+
+
+def test_pick_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert _pick_encoding("br") is None
+    assert _pick_encoding("br, gzip;q=0.1") == "gzip"
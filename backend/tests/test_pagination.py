@@ -0,0 +1,65 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from backend.appointments.pagination import decode_cursor, encode_cursor, keyset_clause, paginate
+
+T = datetime(2026, 10, 19, 8, 30, 15)
+
+
+def test_cursor_roundtrip():
+    token = encode_cursor(T, 42)
+    assert "=" not in token                      # base64url không padding, an toàn trong header/query
+    assert decode_cursor(token) == (T, 42)
+
+
+def test_cursor_roundtrip_microseconds():
+    t = T.replace(microsecond=123456)
+    assert decode_cursor(encode_cursor(t, 1)) == (t, 1)
+
+
+@pytest.mark.parametrize("token", ["", "!!!", "bm90LWpzb24", encode_cursor(T, 1)[:-3], "WzEsMiwzXQ"])
+def test_decode_rejects_garbage(token):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(token)
+    assert exc.value.status_code == 400
+
+
+def test_keyset_clause_desc():
+    clause, params = keyset_clause(encode_cursor(T, 7))
+    assert clause == "(a.effective_time < %s OR (a.effective_time = %s AND a.id < %s))"
+    assert params == [T, T, 7]
+
+
+def test_keyset_clause_custom_columns():
+    clause, _ = keyset_clause(encode_cursor(T, 7), time_col="x.t", id_col="x.id")
+    assert clause == "(x.t < %s OR (x.t = %s AND x.id < %s))"
+
+
+def _rows(n):
+    return [{"id": i, "effective_time": datetime(2026, 10, 19, 8, i)} for i in range(n, 0, -1)]
+
+
+def test_paginate_has_more():
+    rows, cursor = paginate(_rows(3), 2, id_key="id")
+    assert [r["id"] for r in rows] == [3, 2]
+    assert all("effective_time" not in r for r in rows)
+    assert decode_cursor(cursor) == (datetime(2026, 10, 19, 8, 2), 2)
+
+
+def test_paginate_last_page():
+    rows, cursor = paginate(_rows(2), 2, id_key="id")
+    assert len(rows) == 2 and cursor is None
+
+
+def test_paginate_keeps_sort_column():
+    rows, _ = paginate(_rows(3), 2, id_key="id", strip=False)
+    assert "effective_time" in rows[0]
+
+
+def test_paginate_null_sort_time_has_no_cursor():
+    rows = _rows(3)
+    rows[1]["effective_time"] = None
+    _, cursor = paginate(rows, 2, id_key="id")
+    assert cursor is None
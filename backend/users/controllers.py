@@ -1,5 +1,6 @@
 from fastapi import HTTPException
 from backend.database.connector import DatabaseConnector
+from backend.common.etag import catalog_versions
 from backend.auth.providers.auth_providers import AuthProvider
 from backend.users.models import UserCreateModel, UserUpdateModel
 
@@ -16,6 +17,8 @@ def create_user(user_data: UserCreateModel):
         user_data.phone,
         user_data.role
     ))
+    # user role doctor có bản ghi doctors đi kèm -> danh mục bác sĩ đổi
+    catalog_versions.bump("doctors")
     return result[0]
 
 def get_all_users():
@@ -45,9 +48,11 @@ def update_user(user_id: int, update_data: UserUpdateModel):
     ))
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
+    catalog_versions.bump("doctors")
     return result[0]
 
 def delete_user(user_id: int):
     db = DatabaseConnector()
     result = db.call_procedure("sp_delete_user", (user_id,))
+    catalog_versions.bump("doctors")
     return result[0]
@@ -135,7 +135,7 @@ const PrintTicket: React.FC = () => {
 
     // Kiểm tra trạng thái thanh toán
 
-    const checkPaymentStatus = async () => {
+    const checkPaymentStatus = async (): Promise<string | undefined> => {
         if (!order_code) {
             console.log(
                 'Không có order_code để kiểm tra trạng thái thanh toán'
@@ -148,8 +148,10 @@ const PrintTicket: React.FC = () => {
         );
         try {
             if (QR !== null) {
+                // Long-poll: server giữ request tới khi webhook báo thanh toán
                 const response = await api.get(
-                    `/payments/orders/${order_code}`
+                    `/payments/orders/${order_code}/wait`,
+                    { params: { timeout: 25 } }
                 );
                 console.log('Phản hồi trạng thái thanh toán:', response.data);
                 setPaymentStatus(response.data.status);
@@ -162,12 +164,10 @@ const PrintTicket: React.FC = () => {
                 ) {
                     setQR(response.data.qr_code_url);
                 }
+                return response.data.status;
             }
         } catch (error) {
             console.error('Lỗi khi kiểm tra trạng thái thanh toán:', error);
-            alert(
-                'Không thể kiểm tra trạng thái thanh toán. Vui lòng thử lại.'
-            );
         }
     };
 
@@ -200,19 +200,28 @@ const PrintTicket: React.FC = () => {
         }
     }, [appointment?.id]);
 
-    // Kiểm tra trạng thái thanh toán định kỳ
+    // Chờ trạng thái thanh toán bằng long-poll (mỗi request giữ tối đa 25s)
     useEffect(() => {
         if (QR !== null) {
-            let interval: NodeJS.Timeout | null = null;
+            let cancelled = false;
             if (order_code && paymentStatus !== 'PAID') {
                 console.log(
-                    'Bắt đầu polling trạng thái thanh toán với order_code:',
+                    'Bắt đầu chờ trạng thái thanh toán với order_code:',
                     order_code
                 );
-                interval = setInterval(checkPaymentStatus, 5000);
+                (async () => {
+                    while (!cancelled) {
+                        const status = await checkPaymentStatus();
+                        if (status === 'PAID' || status === 'PARTIALLY') break;
+                        if (status === undefined) {
+                            // lỗi mạng -> nghỉ 5s rồi thử lại
+                            await new Promise(r => setTimeout(r, 5000));
+                        }
+                    }
+                })();
             }
             return () => {
-                if (interval) clearInterval(interval);
+                cancelled = true;
             };
         }
     }, [order_code, paymentStatus]);
@@ -11,6 +11,10 @@ import type { Service, Room } from '../context/AppContext';
 import api from '../axios/api';
 import { useToast } from '@/app/components/ui/use-toast';
 
+// Phòng chờ ảo: 503 kèm queue_token + Retry-After -> chờ rồi gửi lại với X-Queue-Token
+const MAX_QUEUE_WAIT_MS = 5 * 60 * 1000;
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const ServiceSelection: React.FC = () => {
     const {
         setCurrentStep,
@@ -70,12 +74,44 @@ const ServiceSelection: React.FC = () => {
                       'has_insurances'
                   )}`;
 
-            const appointmentData = await api.post(apiEndpoint, {
+            const payload = {
                 service_id: selectedService.id,
                 clinic_id: roomToUse.clinic_id,
                 doctor_id: roomToUse.doctor_id,
                 ...(isOnline && { schedule_id }),
-            });
+            };
+
+            let queueToken: string | undefined;
+            const startedAt = Date.now();
+            let appointmentData: any;
+            for (;;) {
+                try {
+                    appointmentData = await api.post(apiEndpoint, payload, {
+                        headers: queueToken ? { 'X-Queue-Token': queueToken } : {},
+                    });
+                    break;
+                } catch (err: any) {
+                    const detail = err.response?.data?.detail;
+                    if (
+                        err.response?.status !== 503 ||
+                        !detail?.queue_token ||
+                        Date.now() - startedAt > MAX_QUEUE_WAIT_MS
+                    ) {
+                        throw err;
+                    }
+                    queueToken = detail.queue_token;
+                    const retryAfter =
+                        Number(err.response.headers?.['retry-after']) ||
+                        detail.retry_after ||
+                        detail.eta_seconds ||
+                        1;
+                    toast({
+                        title: 'Đang xếp hàng đặt lịch',
+                        description: `Vị trí ${detail.position || 1}, thử lại sau ${retryAfter} giây`,
+                    });
+                    await sleep(Math.max(retryAfter, 1) * 1000);
+                }
+            }
 
             setAppointment(appointmentData?.data);
             setShowCalendarModal(false);
@@ -86,8 +122,10 @@ const ServiceSelection: React.FC = () => {
                 response: error.response?.data,
                 status: error.response?.status,
             });
+            const detail = error.response?.data?.detail;
             const errorMessage =
-                error.response?.data?.detail || 'Đã có lỗi xảy ra khi đặt lịch';
+                (typeof detail === 'string' ? detail : detail?.message) ||
+                'Đã có lỗi xảy ra khi đặt lịch';
             toast({
                 title: 'Lỗi đặt lịch',
                 description: errorMessage,